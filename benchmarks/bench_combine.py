@@ -0,0 +1,65 @@
+"""
+Benchmark of the combination of the responses of a load: successive `combine_data` calls against the single-pass
+`FrameAccumulator`.
+
+Every synthetic response is one month of hourly bars of a symbol (16 per trading day), as transformed by
+`transform_intraday`, and one in ten responses repeats an earlier one, as a resumed or overlapping load does.
+Both approaches are checked to return the same frame first.
+
+Usage:
+    python -m benchmarks.bench_combine [--responses 500]
+"""
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader.data_transform as transformer
+from loader.data_loader import combine_data, TASK_SUBSET_COLUMNS
+from loader.frame_accumulator import FrameAccumulator
+from benchmarks.bench_streaming_ingestion import SyntheticClient
+
+
+def make_responses(count):
+    client = SyntheticClient()
+    months = [f'{2000 + index // 12}-{index % 12 + 1:02d}' for index in range(count)]
+    responses = [transformer.transform_intraday('NVDA', client.get_intraday_data('NVDA', month)) for month in months]
+    return [responses[index - 5] if index % 10 == 9 else response for index, response in enumerate(responses)]
+
+
+def successive_combine(responses):
+    df = pd.DataFrame()
+    for response in responses:
+        df = combine_data(df, response, subset_columns=TASK_SUBSET_COLUMNS['ticker'])
+    return df
+
+
+def single_pass(responses):
+    accumulator = FrameAccumulator({'ticker': pd.DataFrame()}, TASK_SUBSET_COLUMNS)
+    for response in responses:
+        accumulator.add('ticker', response)
+    return accumulator.combine()['ticker']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=500)
+    args = parser.parse_args()
+
+    responses = make_responses(args.responses)
+    rows = sum(len(response) for response in responses)
+
+    timings = {}
+    results = {}
+    for name, function in [('successive', successive_combine), ('single pass', single_pass)]:
+        start = time.perf_counter()
+        results[name] = function(responses)
+        timings[name] = time.perf_counter() - start
+    pd.testing.assert_frame_equal(results['single pass'], results['successive'])
+
+    for name, elapsed in timings.items():
+        print(f'{name:>11}: {args.responses} responses, {rows:,} rows -> {len(results[name]):,} rows in {elapsed:.2f} s '
+              f'({timings["successive"] / elapsed:.1f}x)')
@@ -0,0 +1,127 @@
+"""
+Benchmark of the gap filling of `CheckTecDataset`: the vectorized `fill_missing_days` and `fill_missing_hours`
+against the previous loops, which scanned the whole dataset for every missing day (or every day) and built the
+filled rows one `Series` at a time.
+
+The synthetic dataset has the shape of `merged_tec_info` for a single symbol: several years of hourly bars from 4
+to 19 hours on weekdays, with a few market holidays and a few missing hours, split into date fields as
+`split_date` leaves them. The weekends and holidays are the missing days. Both implementations are run on the same
+data and checked to return the same frame before their times are reported.
+
+Usage:
+    python -m benchmarks.bench_fill_missing [--years 5] [--columns 30]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gen_dataset.check_tec_dataset import CheckTecDataset
+from utils.schema import apply_schema
+
+
+def legacy_fill_missing_days(df):
+    df['datetime'] = pd.to_datetime(df[['year', 'month', 'day']]) + pd.to_timedelta(df['time'], unit='h')
+    full_date_range = pd.date_range(start=df['datetime'].min().normalize(),
+                                    end=df['datetime'].max().normalize() - pd.Timedelta(days=1), freq='D')
+    existing_dates = df['datetime'].dt.date.unique()
+    missing_dates = sorted(set(full_date_range.date) - set(existing_dates))
+
+    filled_rows = []
+    for missing_date in missing_dates:
+        previous_day_data = df[df['datetime'].dt.date < missing_date]
+        if previous_day_data.empty:
+            continue
+        last_day_data = previous_day_data[previous_day_data['datetime'] == previous_day_data['datetime'].max()]
+        for hour in range(24):
+            row = last_day_data.iloc[0].copy()
+            row['year'], row['month'], row['day'], row['time'] = (missing_date.year, missing_date.month,
+                                                                  missing_date.day, hour)
+            row['datetime'] = pd.Timestamp(year=row['year'], month=row['month'], day=row['day'], hour=row['time'])
+            filled_rows.append(row)
+
+    if filled_rows:
+        df = pd.concat([df, pd.DataFrame(filled_rows)], ignore_index=True)
+
+    return df.sort_values(by=['datetime']).reset_index(drop=True)
+
+
+def legacy_fill_missing_hours(df):
+    unique_days = df[['year', 'month', 'day']].drop_duplicates()
+    filled_rows = []
+    for year, month, day in unique_days.itertuples(index=False, name=None):
+        day_data = df[(df['year'] == year) & (df['month'] == month) & (df['day'] == day)]
+        missing_hours = sorted(set(range(24)) - set(day_data['time'].unique()))
+        if not day_data.empty:
+            first_hour_data = day_data[day_data['time'] == day_data['time'].min()].iloc[0]
+            last_hour_data = day_data[day_data['time'] == day_data['time'].max()].iloc[0]
+            for hour in missing_hours:
+                row = None
+                if hour < day_data['time'].min():
+                    row = first_hour_data.copy()
+                elif hour > day_data['time'].max():
+                    row = last_hour_data.copy()
+                if row is not None:
+                    row['time'] = hour
+                    filled_rows.append(row)
+
+    if filled_rows:
+        df = pd.concat([df, pd.DataFrame(filled_rows)], ignore_index=True)
+    df['hour'] = df['time'].astype(int)
+    df['datetime'] = pd.to_datetime(df[['year', 'month', 'day', 'hour']])
+
+    return df.drop(columns=['hour'])
+
+
+def make_df(years, columns):
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range('2020-01-01', periods=years * 365 * 24, freq='h')
+    sessions = (datetimes.hour >= 4) & (datetimes.hour <= 19) & (datetimes.dayofweek < 5)
+    holidays = datetimes.normalize().isin(pd.DatetimeIndex(rng.choice(datetimes.normalize().unique(), 10 * years)))
+    datetimes = datetimes[sessions & ~holidays & (rng.random(len(datetimes)) > 0.02)]
+
+    df = pd.DataFrame({'ticker': 'NVDA', 'datetime': datetimes, 'close': rng.normal(100, 10, len(datetimes)),
+                       'volume': rng.integers(0, 10 ** 7, len(datetimes))})
+    for index in range(columns):
+        df[f'sma_{index}'] = rng.normal(size=len(df))
+    df['date'] = df['datetime'].dt.normalize()
+    df['year_month'] = df['datetime'].dt.strftime('%Y-%m')
+    checker = CheckTecDataset(apply_schema(df, 'merged_tec_info'))
+
+    return checker.split_date()
+
+
+def measure(function, df):
+    start = time.perf_counter()
+    df = function(df.copy())
+    return df, time.perf_counter() - start
+
+
+def fill_with(method):
+    def fill(df):
+        checker = CheckTecDataset(df)
+        return getattr(checker, method)()
+    return fill
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--columns', type=int, default=30)
+    args = parser.parse_args()
+
+    df = make_df(args.years, args.columns)
+    print(f'{len(df):,} hourly bars over {args.years} years, {df.shape[1]} columns')
+    for name, legacy in [('fill_missing_days', legacy_fill_missing_days),
+                         ('fill_missing_hours', legacy_fill_missing_hours)]:
+        df_legacy, legacy_time = measure(legacy, df)
+        df_vectorized, vectorized_time = measure(fill_with(name), df)
+        # The loops turn the categorical ticker into strings
+        pd.testing.assert_frame_equal(df_vectorized.astype({'ticker': str}), df_legacy, check_dtype=False)
+        print(f'{name:>18}: {len(df_vectorized) - len(df):>7,} rows filled, loop {legacy_time:7.2f} s, '
+              f'vectorized {vectorized_time:6.3f} s ({legacy_time / vectorized_time:.0f}x faster)')
+        df = df_vectorized
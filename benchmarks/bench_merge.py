@@ -0,0 +1,98 @@
+"""
+Benchmark of `merge_datasets`: the pivot and single join engine against the previous chain of merges.
+
+The synthetic datasets have the configured shape: hourly bars of several symbols, MACD, three SMA and three RSI
+periods in long format, and three monthly economic series. The time and the peak memory allocated by each
+implementation (measured with tracemalloc) are reported, after checking that both return the same frame.
+
+Usage:
+    python -m benchmarks.bench_merge [--symbols 20] [--bars 20000]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.utils as ut
+import loader.data_transform as transformer
+from loader.data_loader import merge_datasets
+
+CONFIG = ut.load_config('loader_config')
+
+
+def legacy_transform_indicators(dfs, period, tech_indicator):
+    df_transformed = dfs[tech_indicator][dfs[tech_indicator]['period'] == period][['ticker', 'datetime', tech_indicator]].copy()
+    df_transformed.rename(columns={tech_indicator: f'{tech_indicator}_{period}'}, inplace=True)
+    return df_transformed
+
+
+def legacy_merge_datasets(dfs, periods, tec_columns, economic_columns):
+    for key in periods.keys():
+        for period in periods[key]:
+            dfs[f'{key}_{period}'] = legacy_transform_indicators(dfs, period, key)
+
+    dfs['merged_tec_info'] = dfs['ticker']
+    for key, cols in tec_columns.items():
+        dfs['merged_tec_info'] = pd.merge(dfs['merged_tec_info'], dfs[key][cols], on=['ticker', 'datetime'], how='left')
+
+    for key, col_name in economic_columns.items():
+        dfs['merged_tec_info'] = pd.merge(
+            dfs['merged_tec_info'],
+            dfs[key][['year_month', 'value']].rename(columns={'value': col_name}),
+            on='year_month',
+            how='left'
+        )
+
+    return dfs
+
+
+def make_dfs(symbols, bars):
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range('2022-01-03 04:00', periods=bars, freq='h')
+    ticker = pd.DataFrame({'ticker': np.repeat([f'SYM{index:02d}' for index in range(symbols)], bars),
+                           'datetime': np.tile(datetimes, symbols)})
+    keys = ticker.copy()
+    for column in ['open', 'high', 'low', 'close', 'volume']:
+        ticker[column] = rng.normal(100, 10, len(ticker))
+    dfs = {'ticker': transformer.manage_dates(ticker, None),
+           'macd': keys.assign(MACD=rng.normal(size=len(keys)), MACD_Signal=0.1, MACD_Hist=0.2)}
+    for key, periods in CONFIG['periods'].items():
+        dfs[key] = pd.concat([keys.assign(**{key: rng.normal(size=len(keys)), 'period': period}) for period in periods],
+                             ignore_index=True)
+    months = pd.period_range('2021-01', periods=120, freq='M').astype(str)
+    for key in CONFIG['economic_columns']:
+        dfs[key] = pd.DataFrame({'year_month': months, 'value': rng.normal(size=len(months))})
+    return dfs
+
+
+def measure(function, symbols, bars):
+    dfs = make_dfs(symbols, bars)
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = function(dfs, CONFIG['periods'], CONFIG['tec_columns'], CONFIG['economic_columns'])['merged_tec_info']
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=20000)
+    args = parser.parse_args()
+
+    df_legacy, legacy_time, legacy_peak = measure(legacy_merge_datasets, args.symbols, args.bars)
+    df_pivot, pivot_time, pivot_peak = measure(merge_datasets, args.symbols, args.bars)
+    pd.testing.assert_frame_equal(df_pivot, df_legacy)
+
+    output = df_pivot.memory_usage(deep=True).sum() / 2 ** 20
+    print(f'merged_tec_info: {len(df_pivot):,} rows x {df_pivot.shape[1]} columns, {output:.0f} MB')
+    print(f'  chained merges: {legacy_time:6.2f} s, peak {legacy_peak / 2 ** 20:6.0f} MB')
+    print(f'    pivot + join: {pivot_time:6.2f} s, peak {pivot_peak / 2 ** 20:6.0f} MB '
+          f'({legacy_time / pivot_time:.1f}x faster, {legacy_peak / pivot_peak:.1f}x less memory)')
@@ -0,0 +1,74 @@
+"""
+Benchmark of the hourly aggregation of the news in `CheckNewsDataset`: `aggregate_by_datetime`, a single grouped
+pass of built-in reductions, against the previous `groupby(...).agg` with a Python lambda for every column, which
+called a function for every hour and column.
+
+The synthetic news have the shape of the rows that `ticker_topic_rows` returns: years of articles spread over the
+hours, with float32 scores as `ensure_correct_dtypes` leaves them, and the weighted scores of
+`weight_ticker_metrics`. Both implementations are run on the same data and checked to agree up to one unit of the
+6th decimal before their times are reported.
+
+Usage:
+    python -m benchmarks.bench_news_aggregation [--years 5] [--articles 200000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gen_dataset.check_news_dataset import CheckNewsDataset
+
+SCORES = ['overall_sentiment_score', 'relevance_score', 'ticker_sentiment_score', 'affected_topic_relevance_score']
+WEIGHTED = ['w_ticker_ossm', 'w_ticker_ssm', 'w_ticker_atrsm']
+
+
+def legacy_aggregation(df):
+    means = {column: lambda x: round(x.mean(), 6) for column in SCORES}
+    weighted_means = {column: lambda x: round(x.sum() / max(x.count(), 1), 6) for column in WEIGHTED}
+    return df.groupby('datetime').agg({**means, **weighted_means, 'article_id': 'nunique'}).reset_index()
+
+
+def make_df(years, articles):
+    rng = np.random.default_rng(0)
+    hours = years * 365 * 24
+    df = pd.DataFrame({'datetime': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, hours, articles),
+                                                                                unit='h'),
+                       'article_id': rng.integers(0, articles // 2, articles)})
+    for column in SCORES:
+        df[column] = rng.normal(size=articles).round(6).astype('float32')
+    for column, score in zip(WEIGHTED, ['overall_sentiment_score', 'ticker_sentiment_score',
+                                        'affected_topic_relevance_score']):
+        df[column] = df[score] * df['relevance_score']
+
+    return df
+
+
+def measure(function, df):
+    start = time.perf_counter()
+    df = function(df)
+    return df, time.perf_counter() - start
+
+
+def kernel_aggregation(df):
+    checker = CheckNewsDataset.__new__(CheckNewsDataset)
+    return checker.aggregate_by_datetime(df, means=SCORES, weighted_means=WEIGHTED, nunique='article_id')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--articles', type=int, default=200000)
+    args = parser.parse_args()
+
+    df = make_df(args.years, args.articles)
+    df_legacy, legacy_time = measure(legacy_aggregation, df)
+    df_kernel, kernel_time = measure(kernel_aggregation, df)
+    # The float32 lambdas accumulated the sums with error, and the means on a rounding tie may go either way
+    pd.testing.assert_frame_equal(df_kernel, df_legacy, check_exact=False, rtol=0, atol=1.5e-6)
+    print(f'{len(df):,} news rows over {df_kernel.shape[0]:,} hours, {len(SCORES) + len(WEIGHTED)} columns: '
+          f'lambdas {legacy_time:6.2f} s, built-in reductions {kernel_time:6.3f} s '
+          f'({legacy_time / kernel_time:.0f}x faster)')
@@ -0,0 +1,86 @@
+"""
+Benchmark of the size of the normalized news tables against the previous wide news dataset.
+
+The previous `transform_news_data` wrote one row per ticker and topic of every article, repeating its title,
+time and overall sentiment in each of them. The synthetic feed has the shape of a busy topic: articles with
+several tickers and topics. The memory of the frames and the size of their CSV files are compared.
+
+Usage:
+    python -m benchmarks.bench_news_tables [--articles 5000] [--tickers 10] [--topics 8]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import pandas as pd
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader.data_transform as transformer
+
+
+def legacy_transform_news_data(data, topic):
+    records = []
+    for item in data:
+        title = item['title'].replace(',', '')
+        timepublished = pd.to_datetime(
+            datetime.strptime(item['time_published'][:8] + ' ' + item['time_published'][9:11], '%Y%m%d %H')
+            .strftime('%Y-%m-%d %H:00:00')
+        )
+        for ticker_data in item['ticker_sentiment']:
+            for topic_data in item['topics']:
+                records.append([
+                    title, timepublished, item['overall_sentiment_score'], item['overall_sentiment_label'],
+                    ticker_data['ticker'], ticker_data['relevance_score'], ticker_data['ticker_sentiment_score'],
+                    ticker_data['ticker_sentiment_label'], topic_data['topic'], topic_data['relevance_score'], topic
+                ])
+    return pd.DataFrame(records, columns=[
+        'title', 'datetime', 'overall_sentiment_score', 'overall_sentiment_label', 'ticker', 'relevance_score',
+        'ticker_sentiment_score', 'ticker_sentiment_label', 'affected_topic', 'affected_topic_relevance_score',
+        'topic'
+    ])
+
+
+def make_feed(articles, tickers, topics):
+    start = datetime(2024, 1, 1)
+    return [{
+        'title': f'Headline number {index} about the markets and the companies in the news today',
+        'time_published': (start + timedelta(minutes=7 * index)).strftime('%Y%m%dT%H%M%S'),
+        'overall_sentiment_score': '0.123456',
+        'overall_sentiment_label': 'Somewhat-Bullish',
+        'ticker_sentiment': [{'ticker': f'TCK{(index + ticker) % 500}', 'relevance_score': '0.456789',
+                              'ticker_sentiment_score': '0.234567', 'ticker_sentiment_label': 'Neutral'}
+                             for ticker in range(tickers)],
+        'topics': [{'topic': f'Topic {topic}', 'relevance_score': '0.876543'} for topic in range(topics)]
+    } for index in range(articles)]
+
+
+def csv_size(df, directory, name):
+    path = os.path.join(directory, f'{name}.csv')
+    df.to_csv(path, index=False)
+    return os.path.getsize(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--topics', type=int, default=8)
+    args = parser.parse_args()
+
+    feed = make_feed(args.articles, args.tickers, args.topics)
+    df_wide = legacy_transform_news_data(feed, 'technology')
+    tables = transformer.transform_news_data(feed, 'technology')
+
+    with tempfile.TemporaryDirectory() as directory:
+        wide_memory = df_wide.memory_usage(deep=True).sum()
+        wide_csv = csv_size(df_wide, directory, 'wide')
+        tables_memory = sum(df.memory_usage(deep=True).sum() for df in tables.values())
+        tables_csv = sum(csv_size(df, directory, name) for name, df in tables.items())
+
+    print(f'    wide: {len(df_wide):>9,} rows, {wide_memory / 2 ** 20:8.1f} MB in memory, '
+          f'{wide_csv / 2 ** 20:8.1f} MB of CSV')
+    print(f'  tables: {sum(len(df) for df in tables.values()):>9,} rows, {tables_memory / 2 ** 20:8.1f} MB in memory, '
+          f'{tables_csv / 2 ** 20:8.1f} MB of CSV '
+          f'({wide_memory / tables_memory:.1f}x / {wide_csv / tables_csv:.1f}x smaller)')
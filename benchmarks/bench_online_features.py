@@ -0,0 +1,116 @@
+"""
+Benchmark of the online generation of the newest row of the dataset with `OnlineFeatureEngine` against the batch
+path, which generates the whole dataset from the history to use its last row (`get_df_prediction`).
+
+The synthetic history has the shape of the inputs of `run_gen_dataset` for a single symbol: several years of
+hourly bars from 4 to 19 hours on weekdays, with a few missing hours, and news articles stamped to the minute with
+their tickers and topics. The engine is built on the history but the last bars, which are then added one at a
+time with their news. The row of the last update is checked to be equal to the last row of the batch dataset
+before the times are reported.
+
+Usage:
+    python -m benchmarks.bench_online_features [--years 3] [--articles 50000] [--updates 200]
+"""
+import os
+import sys
+import time
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader.data_transform as transformer
+from gen_dataset.online_features import OnlineFeatureEngine, run_batch_stages
+from utils.schema import apply_schema
+
+NEWS_TABLES = ['news', 'news_tickers', 'news_topics']
+TOPICS = ['Technology', 'Financial Markets', 'Economy - Macro', 'Earnings', 'Blockchain']
+
+
+def make_inputs(years, articles):
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range('2022-01-03', periods=years * 365 * 24, freq='h')
+    datetimes = datetimes[(datetimes.hour >= 4) & (datetimes.hour <= 19) & (datetimes.dayofweek < 5)]
+    datetimes = datetimes[rng.random(len(datetimes)) > 0.02]
+    size = len(datetimes)
+    close = 100 + np.cumsum(rng.normal(size=size)).round(4)
+    tec = pd.DataFrame({'ticker': 'NVDA', 'datetime': datetimes, 'open': close + rng.normal(0, 0.1, size).round(4),
+                        'high': close + 0.5, 'low': close - 0.5, 'close': close,
+                        'volume': rng.integers(1000, 10 ** 6, size)})
+    tec = transformer.manage_dates(tec, None)
+    for column in ['MACD', 'MACD_Signal', 'MACD_Hist', 'sma_5', 'sma_10', 'sma_12', 'rsi_5', 'rsi_7', 'rsi_9']:
+        tec[column] = rng.normal(50, 10, size).round(4)
+    tec.loc[rng.random(size) < 0.01, 'sma_5'] = np.nan
+    for column in ['cpi', 'nonfarm_payroll', 'unemployment']:
+        tec[column] = 1.0
+
+    ids = np.arange(articles)
+    minutes = pd.date_range(datetimes[0], datetimes[-1], freq='min')
+    news = pd.DataFrame({'article_id': ids, 'title': [f'Headline {index}' for index in ids],
+                         'datetime': np.sort(rng.choice(minutes, articles)),
+                         'overall_sentiment_score': rng.normal(size=articles).round(6),
+                         'overall_sentiment_label': 'Neutral', 'topic': 'technology'})
+    news_tickers = pd.DataFrame({'article_id': np.repeat(ids, 3),
+                                 'ticker': rng.choice(['NVDA', 'AAPL', 'MSFT', 'AMD'], 3 * articles),
+                                 'relevance_score': rng.random(3 * articles).round(6),
+                                 'ticker_sentiment_score': rng.normal(size=3 * articles).round(6),
+                                 'ticker_sentiment_label': 'Neutral'})
+    news_topics = pd.DataFrame({'article_id': np.repeat(ids, 2), 'affected_topic': rng.choice(TOPICS, 2 * articles),
+                                'affected_topic_relevance_score': rng.random(2 * articles).round(6)})
+
+    return {'tec_info': apply_schema(tec, 'merged_tec_info'), 'news': news, 'news_tickers': news_tickers,
+            'news_topics': news_topics}
+
+
+def select(dfs, end, start=None):
+    """
+    Selects the bars up to a datetime, and the news up to it, after the start if given.
+    """
+    news = dfs['news'][dfs['news']['datetime'] <= end]
+    if start is not None:
+        news = news[news['datetime'] > start]
+    tables = {'tec_info': dfs['tec_info'][dfs['tec_info']['datetime'] <= end].reset_index(drop=True), 'news': news}
+    for key in ['news_tickers', 'news_topics']:
+        tables[key] = dfs[key][dfs[key]['article_id'].isin(news['article_id'])]
+
+    return tables
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--updates', type=int, default=200)
+    args = parser.parse_args()
+
+    dfs = make_inputs(args.years, args.articles)
+    datetimes = dfs['tec_info']['datetime']
+    first_update = len(datetimes) - args.updates
+    print(f'{len(datetimes):,} hourly bars and {args.articles:,} articles over {args.years} years, '
+          f'{args.updates} updates')
+
+    with contextlib.redirect_stdout(None):
+        start = time.perf_counter()
+        expected = run_batch_stages(dfs)['features'].iloc[[-1]]
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine = OnlineFeatureEngine(select(dfs, datetimes.iloc[first_update - 1]))
+        init_time = time.perf_counter() - start
+
+        update_times = []
+        for index in range(first_update, len(datetimes)):
+            news_tables = select(dfs, datetimes.iloc[index], datetimes.iloc[index - 1])
+            start = time.perf_counter()
+            row = engine.update(dfs['tec_info'].iloc[[index]], {key: news_tables[key] for key in NEWS_TABLES})
+            update_times.append(time.perf_counter() - start)
+
+    pd.testing.assert_frame_equal(row, expected.reset_index(drop=True))
+    update_times = np.array(update_times) * 1000
+    print(f'{"batch dataset":>15}: {batch_time:8.2f} s')
+    print(f'{"engine build":>15}: {init_time:8.2f} s')
+    print(f'{"update":>15}: median {np.median(update_times):.1f} ms, p90 {np.percentile(update_times, 90):.1f} ms, '
+          f'max {update_times.max():.1f} ms ({batch_time * 1000 / np.median(update_times):.0f}x faster than '
+          f'the batch dataset)')
@@ -0,0 +1,128 @@
+"""
+Benchmark of the token bucket rate limiters.
+
+Measures the cost of an acquire, and the request rate achieved by several threads sharing a TokenBucket
+and by several processes sharing a SqliteTokenBucket, compared with the configured limit. Then measures
+how the rate achieved by a KeyPool scales with its number of keys.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--seconds 10] [--rpm 600]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loader.key_pool import KeyPool
+from loader.rate_limiter import TokenBucket, SqliteTokenBucket
+
+
+def legacy_control_rate_limit(requests_made, current_time):
+    """
+    Sliding window check of the previous ApiClient implementation, without the sleep.
+    """
+    requests_made = [t for t in requests_made if current_time - t < 60]
+    requests_made.append(current_time)
+    return requests_made
+
+
+def bench_acquire_cost(iterations=200000):
+    bucket = TokenBucket(requests_per_minute=10 ** 12, burst=10 ** 9)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        bucket.acquire()
+    token_bucket_cost = (time.perf_counter() - start) / iterations
+
+    requests_made = []
+    start = time.perf_counter()
+    now = time.time()
+    for _ in range(iterations // 10):
+        requests_made = legacy_control_rate_limit(requests_made[-74:], now)
+    legacy_cost = (time.perf_counter() - start) / (iterations // 10)
+
+    print(f'Acquire cost: token bucket {token_bucket_cost * 1e6:.2f} us, '
+          f'legacy sliding window (75 requests) {legacy_cost * 1e6:.2f} us')
+
+
+def run_threads(limiter, workers, seconds):
+    counter = {'requests': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            limiter.acquire()
+            with lock:
+                counter['requests'] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return counter['requests']
+
+
+def process_worker(path, rpm, burst, seconds, queue):
+    limiter = SqliteTokenBucket(path, 'bench', rpm, burst)
+    requests = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        limiter.acquire()
+        requests += 1
+    queue.put(requests)
+
+
+def bench_achieved_rate(seconds, rpm, burst=5, workers=8, processes=4):
+    start = time.monotonic()
+    requests = run_threads(TokenBucket(rpm, burst), workers, seconds)
+    elapsed = time.monotonic() - start
+    print(f'TokenBucket, {workers} threads: {requests} requests in {elapsed:.1f} s -> '
+          f'{(requests - burst) / elapsed * 60:.1f} requests/min after the burst (refill {rpm - burst}/min, '
+          f'max allowed {burst + (rpm - burst) * elapsed / 60:.0f})')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rate_limit.sqlite')
+        SqliteTokenBucket(path, 'bench', rpm, burst)
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=process_worker, args=(path, rpm, burst, seconds, queue))
+                   for _ in range(processes)]
+        start = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - start
+        requests = sum(queue.get() for _ in workers)
+
+    print(f'SqliteTokenBucket, {processes} processes: {requests} requests in {elapsed:.1f} s -> '
+          f'{(requests - burst) / elapsed * 60:.1f} requests/min after the burst (refill {rpm - burst}/min, '
+          f'max allowed {burst + (rpm - burst) * elapsed / 60:.0f})')
+
+
+def bench_key_pool(seconds, rpm, burst=5, workers=8):
+    for keys in [1, 2, 4]:
+        pool = KeyPool([f'key-{index}' for index in range(keys)], [TokenBucket(rpm, burst) for _ in range(keys)])
+        start = time.monotonic()
+        requests = run_threads(pool, workers, seconds)
+        elapsed = time.monotonic() - start
+        print(f'KeyPool, {keys} keys: {requests} requests in {elapsed:.1f} s -> '
+              f'{(requests - burst * keys) / elapsed * 60:.1f} requests/min after the burst '
+              f'(refill {(rpm - burst) * keys}/min), per key {pool.stats()}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rpm', type=int, default=600)
+    args = parser.parse_args()
+
+    bench_acquire_cost()
+    bench_achieved_rate(args.seconds, args.rpm)
+    bench_key_pool(args.seconds, args.rpm)
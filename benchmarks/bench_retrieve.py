@@ -0,0 +1,77 @@
+"""
+Benchmark of the offline run of the loader (`charge_new_values: false`): reading every saved dataset with
+`retrieve_data` against the lazy `DatasetRegistry`, which only reads the datasets returned by `loader_results`.
+
+Every dataset of 'dataframes' in the configuration is saved with synthetic data: the indicator datasets are
+projections of a synthetic `merged_tec_info` (long ones for 'sma' and 'rsi'), and the news tables are built from a
+synthetic feed.
+
+Usage:
+    python -m benchmarks.bench_retrieve [--rows 200000] [--articles 20000] [--format csv]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.utils as ut
+import loader.data_transform as transformer
+from loader.data_loader import retrieve_data
+from loader.loader import loader_results
+from utils.storage import create_backend, write_dataset
+from benchmarks.bench_storage import make_merged_tec_info
+from benchmarks.bench_news_tables import make_feed
+
+CONFIG = ut.load_config('loader_config')
+
+
+def make_datasets(rows, articles):
+    df = make_merged_tec_info(rows)
+    datasets = {'merged_tec_info': df, 'ticker': df[['ticker', 'datetime', 'open', 'high', 'low', 'close', 'volume',
+                                                     'date', 'year_month']]}
+    for key, cols in CONFIG['tec_columns'].items():
+        datasets[key] = df[cols]
+    for key, periods in CONFIG['periods'].items():
+        datasets[key] = pd.concat([df[['ticker', 'datetime', f'{key}_{period}']].rename(
+            columns={f'{key}_{period}': key}).assign(period=period) for period in periods], ignore_index=True)
+    for key in CONFIG['economic_indicators']:
+        datasets[key] = df[['year_month', key]].drop_duplicates('year_month').rename(columns={key: 'value'})
+    datasets.update(transformer.transform_news_data(make_feed(articles, 10, 8), 'technology'))
+    return datasets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet', 'feather'])
+    args = parser.parse_args()
+
+    backend = create_backend({'format': args.format, 'compression': 'zstd'})
+    datasets = make_datasets(args.rows, args.articles)
+    assert set(datasets) == set(CONFIG['dataframes'])
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The datasets are read from the 'data' folder of the working directory
+        os.chdir(directory)
+        os.makedirs('data')
+        for name, df in datasets.items():
+            write_dataset(df, name, backend)
+
+        timings = {}
+        results = {}
+        for lazy in [False, True]:
+            start = time.perf_counter()
+            h_dataframes = retrieve_data({key: pd.DataFrame() for key in CONFIG['dataframes']}, backend, lazy=lazy)
+            results[lazy] = loader_results(h_dataframes)
+            timings[lazy] = time.perf_counter() - start
+        for table, df in results[False].items():
+            pd.testing.assert_frame_equal(results[True][table], df)
+
+    print(f'{args.format}: {len(datasets)} datasets saved, {len(results[True])} returned')
+    print(f'  eager: {timings[False]:6.2f} s')
+    print(f'   lazy: {timings[True]:6.2f} s ({timings[False] / timings[True]:.1f}x)')
@@ -0,0 +1,114 @@
+"""
+Benchmark of the memory used by the datasets of the loader with the compact types of `utils.schema` against the
+previous types: 64-bit floats and integers, string tickers, topics and labels, 'YYYY-MM' string months and
+`datetime.date` objects.
+
+The synthetic datasets cover several years of hourly bars of a few symbols: the 'ticker', 'macd', long 'sma' and
+'rsi' datasets (three periods each), the monthly economic indicators, the normalized news tables and the merged
+`merged_tec_info`. The memory is measured with `memory_usage(deep=True)`, which includes the contents of the
+strings and of the Python objects.
+
+Usage:
+    python -m benchmarks.bench_schema [--symbols 5] [--years 3] [--articles 100000]
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.utils as ut
+import loader.data_transform as transformer
+from utils.schema import apply_schema, memory_usage_mb
+
+CONFIG = ut.load_config('loader_config')
+LABELS = ['Bearish', 'Somewhat-Bearish', 'Neutral', 'Somewhat-Bullish', 'Bullish']
+TOPICS = ['Technology', 'Financial Markets', 'Economy - Macro', 'Earnings', 'Blockchain', 'Finance']
+
+
+def make_datasets(symbols, years, articles):
+    """
+    Builds the datasets with the types they had before the schema, as `manage_dates` leaves them.
+    """
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range('2022-01-03 04:00', periods=years * 252 * 16, freq='h')
+    keys = pd.DataFrame({'ticker': np.repeat([f'SYM{index}' for index in range(symbols)], len(datetimes)),
+                         'datetime': np.tile(datetimes, symbols)})
+    keys = transformer.manage_dates(keys, None)
+    rows = len(keys)
+
+    datasets = {'ticker': keys.assign(**{column: rng.normal(100, 10, rows).round(4) for column in
+                                         ['open', 'high', 'low', 'close']}, volume=rng.integers(0, 10 ** 7, rows)),
+                'macd': keys.assign(**{column: rng.normal(size=rows).round(4) for column in
+                                       ['MACD', 'MACD_Signal', 'MACD_Hist']})}
+    for key, periods in CONFIG['periods'].items():
+        datasets[key] = pd.concat([keys.assign(**{key: rng.normal(50, 10, rows).round(4)}, period=period)
+                                   for period in periods], ignore_index=True)
+    months = pd.DataFrame({'datetime': pd.date_range('2021-01-01', periods=12 * (years + 1), freq='MS')})
+    for key in CONFIG['economic_indicators']:
+        datasets[key] = transformer.manage_dates(months.assign(value=rng.normal(size=len(months))), 'economics')
+
+    article_ids = rng.integers(-2 ** 63, 2 ** 63 - 1, articles)
+    datasets['news'] = pd.DataFrame({
+        'article_id': article_ids, 'title': [f'Headline {index} about the markets' for index in range(articles)],
+        'datetime': rng.choice(datetimes, articles), 'overall_sentiment_score': rng.normal(size=articles).round(6),
+        'overall_sentiment_label': rng.choice(LABELS, articles), 'topic': rng.choice(CONFIG['topics'], articles)})
+    datasets['news_tickers'] = pd.DataFrame({
+        'article_id': np.repeat(article_ids, 5), 'ticker': rng.choice([f'TCK{index}' for index in range(500)],
+                                                                      articles * 5),
+        'relevance_score': rng.random(articles * 5).round(6),
+        'ticker_sentiment_score': rng.normal(size=articles * 5).round(6),
+        'ticker_sentiment_label': rng.choice(LABELS, articles * 5)})
+    datasets['news_topics'] = pd.DataFrame({
+        'article_id': np.repeat(article_ids, 4), 'affected_topic': rng.choice(TOPICS, articles * 4),
+        'affected_topic_relevance_score': rng.random(articles * 4).round(6)})
+
+    df_merged = datasets['ticker'].merge(datasets['macd'].drop(columns=['date', 'year_month']), on=['ticker', 'datetime'])
+    for key, periods in CONFIG['periods'].items():
+        for period in periods:
+            df_merged[f'{key}_{period}'] = datasets[key].loc[datasets[key]['period'] == period, key].to_numpy()
+    for key, column in CONFIG['economic_columns'].items():
+        df_merged = df_merged.merge(datasets[key][['year_month', 'value']].rename(columns={'value': column}),
+                                    on='year_month', how='left')
+    datasets['merged_tec_info'] = df_merged
+
+    return datasets
+
+
+def check_values(df, df_compact):
+    """
+    Checks that the compact types keep the values: the same labels and dates, and the same numbers up to the
+    precision of float32.
+    """
+    for column in df.columns:
+        before, after = df[column], df_compact[column]
+        if isinstance(after.dtype, pd.CategoricalDtype):
+            after = after.astype(before.dtype)
+        if pd.api.types.is_datetime64_any_dtype(after):
+            before = pd.to_datetime(before)
+        if pd.api.types.is_float_dtype(after):
+            np.testing.assert_allclose(after.to_numpy(), before.to_numpy(), rtol=1e-6)
+        else:
+            pd.testing.assert_series_equal(after, before, check_dtype=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=5)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--articles', type=int, default=100000)
+    args = parser.parse_args()
+
+    totals = [0, 0]
+    print(f'pandas {pd.__version__}')
+    for name, df in make_datasets(args.symbols, args.years, args.articles).items():
+        df_compact = apply_schema(df, name)
+        check_values(df, df_compact)
+        before, after = memory_usage_mb(df), memory_usage_mb(df_compact)
+        totals[0] += before
+        totals[1] += after
+        print(f'{name:>16}: {len(df):>10,} rows, {before:8.1f} MB -> {after:7.1f} MB ({before / after:4.1f}x)')
+    print(f'{"total":>16}: {totals[0]:8.1f} MB -> {totals[1]:7.1f} MB '
+          f'({totals[0] / totals[1]:.1f}x, {totals[0] - totals[1]:.1f} MB saved)')
@@ -0,0 +1,82 @@
+"""
+Benchmark of the load time of the saved datasets with every storage backend.
+
+A synthetic `merged_tec_info` (minute bars with the indicators and economic columns) and the normalized news
+tables are saved as CSV, Parquet and Feather, and read back as `retrieve_data` does, parsing the dates which
+are not already typed. A projected read of three columns is also timed.
+
+Usage:
+    python -m benchmarks.bench_storage [--rows 500000] [--articles 50000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import create_backend, read_dataset, write_dataset, dataset_path
+from benchmarks.bench_news_tables import make_feed
+import loader.data_transform as transformer
+
+INDICATOR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'MACD', 'MACD_Signal', 'MACD_Hist', 'rsi_5', 'rsi_7',
+                     'rsi_9', 'sma_5', 'sma_10', 'sma_12', 'unemployment', 'nonfarm_payroll', 'cpi']
+
+
+def make_merged_tec_info(rows):
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range('2022-01-03 04:00', periods=rows, freq='min')
+    df = pd.DataFrame({'ticker': 'NVDA', 'datetime': datetimes})
+    for column in INDICATOR_COLUMNS:
+        df[column] = rng.normal(100, 10, rows).round(4)
+    df['date'] = datetimes.date
+    df['year_month'] = datetimes.strftime('%Y-%m')
+    return df
+
+
+def retrieve(name, backend, directory, columns=None):
+    df = read_dataset(name, backend, columns, directory)
+    for column in ['datetime', 'date', 'year_month']:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+    return df
+
+
+def seconds(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    datasets = {'merged_tec_info': make_merged_tec_info(args.rows),
+                **transformer.transform_news_data(make_feed(args.articles, 10, 8), 'technology')}
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = {}
+        for storage_format in ['csv', 'parquet', 'feather']:
+            backend = create_backend({'format': storage_format, 'compression': 'zstd'})
+            for name, df in datasets.items():
+                write_dataset(df, name, backend, directory)
+            size = sum(os.path.getsize(dataset_path(name, backend, directory)) for name in datasets)
+
+            tec = seconds(lambda: retrieve('merged_tec_info', backend, directory), args.repeat)
+            news = seconds(lambda: [retrieve(name, backend, directory) for name in datasets if 'news' in name],
+                           args.repeat)
+            projected = seconds(lambda: retrieve('merged_tec_info', backend, directory, ['datetime', 'close', 'rsi_5']),
+                                args.repeat)
+            baseline.setdefault('tec', tec)
+            baseline.setdefault('news', news)
+            print(f'{storage_format:>8}: {size / 2 ** 20:7.1f} MB, merged_tec_info {tec:6.3f} s '
+                  f'({baseline["tec"] / tec:5.1f}x), news {news:6.3f} s ({baseline["news"] / news:5.1f}x), '
+                  f'3 columns of merged_tec_info {projected:6.3f} s')
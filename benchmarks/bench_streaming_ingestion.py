@@ -0,0 +1,92 @@
+"""
+Benchmark of the peak memory of the in-memory and streaming ingestion modes of `load_tasks`.
+
+A synthetic client returns hourly bars (16 per trading day) for every requested month, so no network or rate
+limit is involved. Every mode runs in its own process, which reports its peak RSS.
+
+Usage:
+    python -m benchmarks.bench_streaming_ingestion [--symbols 20] [--years 3] [--workers 1]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loader.data_loader import load_tasks, build_fetch_tasks
+from utils.storage import PartitionedStore
+
+PERIODS = {'sma': [5, 10, 12], 'rsi': [5, 7, 9]}
+
+
+class SyntheticClient:
+    """
+    Client returning responses with the format and size of the Alpha Vantage ones.
+    """
+
+    @staticmethod
+    def bars(month):
+        days = pd.bdate_range(f'{month}-01', periods=22)
+        days = days[days.strftime('%Y-%m') == month]
+        return [f'{day:%Y-%m-%d} {hour:02d}:00' for day in days for hour in range(4, 20)]
+
+    def get_intraday_data(self, symbol, month):
+        return {bar: {'1. open': '100.0', '2. high': '101.0', '3. low': '99.0', '4. close': '100.5',
+                      '5. volume': '12345'} for bar in self.bars(month)}
+
+    def get_macd(self, symbol, month):
+        return {bar: {'MACD': '0.1234', 'MACD_Signal': '0.1111', 'MACD_Hist': '0.0123'} for bar in self.bars(month)}
+
+    def get_sma(self, symbol, month, period):
+        return {bar: {'SMA': '100.1234'} for bar in self.bars(month)}
+
+    def get_rsi(self, symbol, month, period):
+        return {bar: {'RSI': '55.1234'} for bar in self.bars(month)}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, symbols, years, workers, queue):
+    months = [f'{2020 + year}-{month:02d}' for year in range(years) for month in range(1, 13)]
+    tasks = build_fetch_tasks([f'SYM{index:02d}' for index in range(symbols)], months, PERIODS)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'memory':
+        dfs = load_tasks({key: pd.DataFrame() for key in ['ticker', 'macd', 'sma', 'rsi']}, SyntheticClient(), tasks,
+                         workers)
+        rows = sum(len(df) for df in dfs.values())
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            store = PartitionedStore(directory)
+            load_tasks({}, SyntheticClient(), tasks, workers, store=store)
+            rows = sum(len(pd.read_csv(path)) for key in PERIODS.keys() | {'ticker', 'macd'}
+                       for path in store.partitions(key))
+    elapsed = time.perf_counter() - start
+
+    queue.put((mode, len(tasks), rows, elapsed, baseline, peak_rss_mb()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    for mode in ['memory', 'streaming']:
+        queue = context.Queue()
+        process = context.Process(target=run_mode, args=(mode, args.symbols, args.years, args.workers, queue))
+        process.start()
+        mode, requests, rows, elapsed, baseline, peak = queue.get()
+        process.join()
+        print(f'{mode:>9}: {requests} responses, {rows} rows in {elapsed:.1f} s -> peak RSS {peak:.0f} MB '
+              f'({peak - baseline:+.0f} MB over the {baseline:.0f} MB baseline)')
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark of the transformations of the intraday and indicator payloads.
+
+Compares the rows per second of the vectorized `loader.data_transform` functions with the previous
+implementation, which built one dictionary per bar and parsed every timestamp with `pd.to_datetime` four
+times. Both implementations are checked to return the same frames first.
+
+Usage:
+    python -m benchmarks.bench_transforms [--bars 10000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader.data_transform as transformer
+
+
+def legacy_manage_dates(df):
+    df['datetime'] = pd.to_datetime(df['datetime'], format='%Y-%m-%d %H:%M')
+    df['date'] = pd.to_datetime(df['datetime']).dt.date
+    df['year_month'] = pd.to_datetime(df['datetime']).dt.to_period('M').astype(str)
+    return df
+
+
+def legacy_transform_intraday(symbol, data):
+    records = [
+        {
+            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
+            'ticker': symbol,
+            'open': float(ohlcv['1. open']),
+            'high': float(ohlcv['2. high']),
+            'low': float(ohlcv['3. low']),
+            'close': float(ohlcv['4. close']),
+            'volume': int(ohlcv['5. volume'])
+        }
+        for datetime_str, ohlcv in data.items()
+    ]
+    return legacy_manage_dates(pd.DataFrame(records))
+
+
+def legacy_transform_sma(symbol, data, period):
+    records = [
+        {
+            'ticker': symbol,
+            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
+            'sma': float(sma_data['SMA']),
+            'period': period
+        }
+        for datetime_str, sma_data in data.items()
+    ]
+    return legacy_manage_dates(pd.DataFrame(records))
+
+
+def legacy_transform_macd(symbol, data):
+    records = [
+        {
+            'ticker': symbol,
+            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
+            'MACD': macd['MACD'],
+            'MACD_Signal': macd['MACD_Signal'],
+            'MACD_Hist': macd['MACD_Hist']
+        }
+        for datetime_str, macd in data.items()
+    ]
+    return legacy_manage_dates(pd.DataFrame(records))
+
+
+def make_payloads(bars):
+    datetimes = pd.date_range('2024-01-02 04:00', periods=bars, freq='min')
+    intraday = {f'{dt:%Y-%m-%d %H:%M:%S}': {'1. open': '100.1200', '2. high': '101.5000', '3. low': '99.8700',
+                                           '4. close': '100.9900', '5. volume': '12345'} for dt in datetimes}
+    sma = {f'{dt:%Y-%m-%d %H:%M}': {'SMA': '100.4321'} for dt in datetimes}
+    macd = {f'{dt:%Y-%m-%d %H:%M}': {'MACD': '0.1234', 'MACD_Signal': '0.1111', 'MACD_Hist': '0.0123'}
+            for dt in datetimes}
+    return intraday, sma, macd
+
+
+def rows_per_second(function, repeat, bars):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return repeat * bars / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    intraday, sma, macd = make_payloads(args.bars)
+    cases = {
+        'intraday': (lambda: legacy_transform_intraday('NVDA', intraday),
+                     lambda: transformer.transform_intraday('NVDA', intraday)),
+        'sma': (lambda: legacy_transform_sma('NVDA', sma, 5), lambda: transformer.transform_sma('NVDA', sma, 5)),
+        'macd': (lambda: legacy_transform_macd('NVDA', macd), lambda: transformer.transform_macd('NVDA', macd))
+    }
+
+    for name, (legacy, vectorized) in cases.items():
+        # The previous implementation kept the MACD values as the strings of the response
+        expected = legacy().astype({column: 'float64' for column in ['MACD', 'MACD_Signal', 'MACD_Hist']
+                                    if name == 'macd'})
+        pd.testing.assert_frame_equal(vectorized(), expected)
+
+        legacy_rate = rows_per_second(legacy, args.repeat, args.bars)
+        vectorized_rate = rows_per_second(vectorized, args.repeat, args.bars)
+        print(f'{name:>8}: legacy {legacy_rate:>10,.0f} rows/s, vectorized {vectorized_rate:>12,.0f} rows/s '
+              f'({vectorized_rate / legacy_rate:.1f}x)')
@@ -2,43 +2,63 @@ import pandas as pd
 import utils.utils as ut
 
 class CheckNewsDataset:
-    def __init__(self, df, target_ticker):
+    def __init__(self, news_tables, target_ticker, ticker_titles=None):
         """
         This class is responsible for managing and processing a financial dataset. It provides
         functionality to filter the dataset based on a specific target stock ticker and store
         the filtered data along with other related configurations and properties.
 
+        The news are consumed in their normalized form: the articles, keyed by 'article_id', and
+        their ticker sentiments and topics, which are joined to the articles only where a metric
+        needs them. Only the articles with at least one ticker and one topic are kept, as the
+        ticker x topic rows of the former wide format had no row for the others.
+
         Attributes:
             config (dict): A dictionary containing configuration settings loaded at initialization.
             target_ticker (str): The stock ticker used to filter the dataset.
-            original_df (pandas.DataFrame): A copy of the original input dataframe before filtering.
-            df (pandas.DataFrame): The filtered dataframe containing only the rows related to the
-            target stock ticker.
+            articles (pandas.DataFrame): The articles, once each, whatever the number of topics
+            they were requested for.
+            article_tickers (pandas.DataFrame): The ticker sentiments of the articles.
+            article_topics (pandas.DataFrame): The topics of the articles.
+            filtered_df (pandas.DataFrame): The ticker sentiments of the target stock ticker,
+            joined to their articles.
+            df (pandas.DataFrame): The news features, by datetime.
+            ticker_titles (set): Titles of other articles of the target ticker, also excluded from
+            the topic metrics.
 
         Args:
-            df (pandas.DataFrame): The input dataframe containing financial data.
+            news_tables (dict): The 'news', 'news_tickers' and 'news_topics' tables.
             target_ticker (str): The stock ticker to filter the dataset by.
+            ticker_titles (set, optional): Titles of articles of the target ticker which are not in
+            the tables, e.g. the earlier ones when only the newest news are checked.
         """
         self.config = ut.load_config('gen_dataset_config')
         self.target_ticker = target_ticker
-        self.original_df = df.copy()
+        article_ids = news_tables['news_tickers']['article_id']
+        article_ids = article_ids[article_ids.isin(news_tables['news_topics']['article_id'])]
+        articles = news_tables['news'][news_tables['news']['article_id'].isin(article_ids)]
+        self.articles = articles.drop_duplicates(subset='article_id').drop(columns='topic', errors='ignore')
+        self.article_tickers = news_tables['news_tickers'][news_tables['news_tickers']['article_id'].isin(article_ids)]
+        self.article_topics = news_tables['news_topics'][news_tables['news_topics']['article_id'].isin(article_ids)]
+        self.ticker_titles = ticker_titles or set()
         self.filtered_df = self.filter_by_ticker()
         self.df = pd.DataFrame()
 
     def filter_by_ticker(self):
         """
-        Filters news data for a specific ticker and creates a copy of the filtered dataframe.
+        Filters news data for a specific ticker and joins it to the articles.
 
-        This method isolates rows in a dataframe where the 'ticker' column matches the
-        specified target ticker value. It then creates and returns a copy of the filtered
-        dataframe to prevent modifications to the original dataset.
+        This method isolates the ticker sentiments whose 'ticker' column matches the
+        specified target ticker value, and joins them to their articles on 'article_id',
+        so the result has one row per article of the target ticker.
 
         Returns:
-            DataFrame: A new dataframe containing only the rows where the 'ticker' column
-            matches the target ticker value.
+            DataFrame: A new dataframe containing only the ticker sentiments of the target
+            ticker, with the title, datetime and overall sentiment of their articles.
         """
-        # Filter news for the target ticker and create a copy
-        self.filtered_df = (self.original_df[self.original_df['ticker'] == self.target_ticker]).copy()
+        # Filter news for the target ticker and join their articles
+        df_ticker = self.article_tickers[self.article_tickers['ticker'] == self.target_ticker]
+        self.filtered_df = df_ticker.merge(self.articles, on='article_id')
 
         return self.filtered_df
 
@@ -59,6 +79,24 @@ class CheckNewsDataset:
         if self.config['generate_ticker_features'].get('average_ticker_value',False):
             self.df = self.average_ticker_value()
 
+    def ticker_topic_rows(self):
+        """
+        Joins the news of the target ticker to the topics of their articles, so every topic of an
+        article weights the ticker metrics, and converts the scores to numbers.
+
+        Returns:
+            pd.DataFrame: One row per article of the target ticker and topic of the article.
+        """
+        df = self.filtered_df.merge(self.article_topics, on='article_id')
+
+        # Ensure that the columns required for numerical calculations are of the appropriate type
+        numeric_columns = ['overall_sentiment_score', 'relevance_score', 'ticker_sentiment_score',
+                           'affected_topic_relevance_score']
+        for col in numeric_columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        return df
+
     def weight_ticker_metrics(self):
         """
         Calculates and aggregates weighted ticker metrics based on sentiment and relevance scores,
@@ -95,27 +133,16 @@ class CheckNewsDataset:
         - Weighted metrics are aggregated by finding the average per time interval, rounded to
           six decimal places.
         """
-        # Ensure that the columns required for numerical calculations are of the appropriate type
-        df = self.filtered_df.copy()
-        numeric_columns = ['overall_sentiment_score', 'relevance_score', 'ticker_sentiment_score',
-                           'affected_topic_relevance_score']
-        for col in numeric_columns:
-            if col in self.filtered_df.columns:
-                self.filtered_df[col] = pd.to_numeric(self.filtered_df[col], errors='coerce')
+        df = self.ticker_topic_rows()
 
         # Weight metrics by `relevance_score`
-        df['w_ticker_ossm'] = self.filtered_df['overall_sentiment_score'] * self.filtered_df['relevance_score']
-        df['w_ticker_ssm'] = self.filtered_df['ticker_sentiment_score'] * self.filtered_df['relevance_score']
-        df['w_ticker_atrsm'] = self.filtered_df['affected_topic_relevance_score'] * self.filtered_df[
-            'relevance_score']
-
-        df = df.groupby('datetime').agg({
-            'w_ticker_ossm': lambda x: round(x.sum() / max(x.count(), 1), 6),
-            'w_ticker_ssm': lambda x: round(x.sum() / max(x.count(), 1), 6),
-            'w_ticker_atrsm': lambda x: round(x.sum() / max(x.count(), 1), 6),
-            'title': 'nunique'  # Number of unique news articles per hour
-        }).reset_index()
-        df = df.rename(columns={'title': 'w_ticker_nc'})
+        df['w_ticker_ossm'] = df['overall_sentiment_score'] * df['relevance_score']
+        df['w_ticker_ssm'] = df['ticker_sentiment_score'] * df['relevance_score']
+        df['w_ticker_atrsm'] = df['affected_topic_relevance_score'] * df['relevance_score']
+
+        df = self.aggregate_by_datetime(df, weighted_means=['w_ticker_ossm', 'w_ticker_ssm', 'w_ticker_atrsm'],
+                                        nunique='article_id')  # Number of unique news articles per hour
+        df = df.rename(columns={'article_id': 'w_ticker_nc'})
         df = df.sort_values(by='datetime')
         self.df = self.intermediate_dataset(df)
 
@@ -123,28 +150,23 @@ class CheckNewsDataset:
 
     def average_ticker_value(self):
         """
-        """
-        df = self.filtered_df.copy()
-        numeric_columns = ['overall_sentiment_score', 'relevance_score', 'ticker_sentiment_score',
-                           'affected_topic_relevance_score']
-        for col in numeric_columns:
-            if col in self.filtered_df.columns:
-                self.filtered_df[col] = pd.to_numeric(self.filtered_df[col], errors='coerce')
+        Averages the sentiment and relevance scores of the news of the target ticker by datetime,
+        with every topic of the articles as a row, and counts the unique news articles.
 
-        df = df.groupby('datetime').agg({
-            'overall_sentiment_score': lambda x: round(x.mean(), 6),
-            'relevance_score': lambda x: round(x.mean(), 6),
-            'ticker_sentiment_score': lambda x: round(x.mean(), 6),
-            'affected_topic_relevance_score': lambda x: round(x.mean(), 6),
-            'title': 'nunique'
-        }).reset_index()
+        Returns:
+            pd.DataFrame: The averaged ticker metrics merged into the news features.
+        """
+        df = self.aggregate_by_datetime(self.ticker_topic_rows(),
+                                        means=['overall_sentiment_score', 'relevance_score',
+                                               'ticker_sentiment_score', 'affected_topic_relevance_score'],
+                                        nunique='article_id')
 
         # Rename the count column for better clarity.
         df = df.rename(columns={'overall_sentiment_score': 'avg_ticker_ossm'})
         df = df.rename(columns={'relevance_score': 'avg_ticker_rsm'})
         df = df.rename(columns={'ticker_sentiment_score': 'avg_ticker_ssm'})
         df = df.rename(columns={'affected_topic_relevance_score': 'avg_ticker_atrsm'})
-        df = df.rename(columns={'title': 'avg_ticker_nc'})
+        df = df.rename(columns={'article_id': 'avg_ticker_nc'})
         df = df.sort_values(by='datetime')
 
         self.df = self.intermediate_dataset(df)
@@ -158,10 +180,10 @@ class CheckNewsDataset:
         for consistent topic naming conventions across the DataFrame.
 
         Returns:
-            pandas.DataFrame: Modified DataFrame with normalized topic names in the
-            'affected_topic' column.
+            pandas.DataFrame: Modified topics of the articles with normalized topic names in
+            the 'affected_topic' column.
         """
-        self.original_df['affected_topic'] = self.original_df['affected_topic'].replace({
+        topic_names = {
             'Blockchain': 'blockchain',
             'Earnings': 'earnings',
             'IPO': 'ipo',
@@ -177,9 +199,12 @@ class CheckNewsDataset:
             'Real Estate & Construction': 'real_estate',
             'Retail & Wholesale': 'retail_wholesale',
             'Technology': 'technology'
-        })
+        }
+        # Mapped through a function, a categorical column only renames its categories
+        self.article_topics['affected_topic'] = self.article_topics['affected_topic'].map(
+            lambda name: topic_names.get(name, name))
 
-        return self.original_df
+        return self.article_topics
 
     def generate_topic_features(self):
         """
@@ -190,7 +215,7 @@ class CheckNewsDataset:
         Yields:
             No return is expected as the function modifies class instance attributes
         """
-        self.original_df = self.normalize_topic_names()
+        self.article_topics = self.normalize_topic_names()
 
         for topic, enabled in self.config.get('news_topic_features', {}).items():
             if enabled:
@@ -223,37 +248,32 @@ class CheckNewsDataset:
                 - '<topic>_nc': Average count of news articles per datetime.
         """
         # Identify titles associated with the target_ticker.
-        titles_with_target_ticker = self.original_df[self.original_df['ticker'] == self.target_ticker]['title'].unique()
+        titles_with_target_ticker = self.filtered_df['title'].unique()
+        if self.ticker_titles:
+            titles_with_target_ticker = self.ticker_titles.union(titles_with_target_ticker)
 
         # Exclude all news whose titles are related to the target_ticker.
-        non_related_news = self.original_df[~self.original_df['title'].isin(titles_with_target_ticker)].copy()
-
-        # Exclude rows that do not have a valid topic in the affected_topic field.
-        non_related_news = non_related_news[non_related_news['affected_topic'].notnull()]
+        non_related_news = self.articles[~self.articles['title'].isin(titles_with_target_ticker)]
 
-        # Filter by topic.
-        topic_data = non_related_news[non_related_news['affected_topic'] == topic]
+        # Filter by topic, which also excludes the articles without a valid topic, and join the articles.
+        topic_data = self.article_topics[self.article_topics['affected_topic'] == topic]
+        topic_data = topic_data.merge(non_related_news, on='article_id')
 
-        # Select relevant columns and remove duplicates by datetime.
-        topic_data = topic_data[
-            ['datetime', 'title', 'overall_sentiment_score', 'affected_topic_relevance_score']].drop_duplicates()
+        # Select relevant columns, one row per article.
+        topic_data = topic_data[['datetime', 'title', 'overall_sentiment_score', 'affected_topic_relevance_score']]
 
         numeric_columns = ['overall_sentiment_score', 'affected_topic_relevance_score']
         topic_data[numeric_columns] = topic_data[numeric_columns].apply(pd.to_numeric, errors='coerce')
 
-        # Count the number of news articles per datetime.
-        topic_data['news_count'] = topic_data.groupby('datetime')['datetime'].transform('count')
-
-        # Group by datetime and calculate metrics similar to those of the ticker.
-        topic_metrics = topic_data.groupby('datetime').agg({
-            'overall_sentiment_score': lambda x: round(x.mean(), 6),
-            'affected_topic_relevance_score': lambda x: round(x.mean(), 6),
-            'news_count': lambda x: x.mean()
-        }).rename(columns={
+        # Group by datetime and calculate metrics similar to those of the ticker, with the number of news
+        # articles per datetime.
+        topic_metrics = self.aggregate_by_datetime(
+            topic_data, means=['overall_sentiment_score', 'affected_topic_relevance_score'], size='news_count'
+        ).rename(columns={
             'overall_sentiment_score': f'{topic}_ossm',
             'affected_topic_relevance_score': f'{topic}_atrsm',
             'news_count': f'{topic}_nc'
-        }).reset_index()
+        })
 
         return topic_metrics
 
@@ -274,11 +294,8 @@ class CheckNewsDataset:
         Raises:
             None
         """
-        df_ticker = self.filter_by_ticker().copy()
-        df_ticker = \
-        df_ticker.drop_duplicates(subset=['title', 'datetime', 'relevance_score', 'ticker_sentiment_score'])[
-            ['title', 'datetime', 'relevance_score', 'ticker_sentiment_score']
-        ]
+        # One row per article of the target ticker
+        df_ticker = self.filter_by_ticker()[['title', 'datetime', 'relevance_score', 'ticker_sentiment_score']].copy()
 
         df_ticker['relevance_score'] = pd.to_numeric(df_ticker['relevance_score'], errors='coerce')
         df_ticker['ticker_sentiment_score'] = pd.to_numeric(df_ticker['ticker_sentiment_score'], errors='coerce')
@@ -287,16 +304,16 @@ class CheckNewsDataset:
         df_ticker = df_ticker.groupby('datetime', as_index=False).agg({'ticker_score': 'sum'})
         df_ticker = df_ticker.sort_values(by='datetime', ascending=True)
 
-        news_data = self.original_df[['datetime', 'title', 'overall_sentiment_score', 'relevance_score']].drop_duplicates()
+        news_data = self.article_tickers.merge(self.articles, on='article_id')
+        news_data = news_data[['datetime', 'title', 'overall_sentiment_score', 'relevance_score']].drop_duplicates()
         news_data[['overall_sentiment_score', 'relevance_score']] = news_data[
             ['overall_sentiment_score', 'relevance_score']].apply(pd.to_numeric, errors='coerce')
-        global_metrics = news_data.groupby('datetime').agg({
-            'overall_sentiment_score': lambda x: round(x.mean(), 6),
-            'relevance_score': lambda x: round(x.mean(), 6)
-        }).rename(columns={
+        global_metrics = self.aggregate_by_datetime(
+            news_data, means=['overall_sentiment_score', 'relevance_score']
+        ).rename(columns={
             'overall_sentiment_score': 'all_news_ossm',
             'relevance_score': 'all_news_rsm'
-        }).reset_index()
+        })
 
         global_metrics['global_score'] = global_metrics['all_news_ossm'] * global_metrics['all_news_rsm']
 
@@ -309,6 +326,49 @@ class CheckNewsDataset:
 
         return self.df
 
+    def aggregate_by_datetime(self, df, means=(), weighted_means=(), nunique=None, size=None):
+        """
+        Aggregates the news by datetime in a single grouped pass of built-in reductions, instead of calling a
+        Python function for every datetime and column.
+
+        The means are the sums of the columns divided by their counts of values, rounded to 6 decimals once at
+        the end. The sums are calculated in float64, so the ones of the float32 scores are exact, and every
+        mean keeps the float type of its column, as the aggregation of a float column does. The weighted means,
+        whose values are already weighted, are divided by at least one value, so a datetime without values has
+        a weighted mean of 0.
+
+        Parameters:
+            df (pd.DataFrame): The news, with a 'datetime' column.
+            means (list): The columns averaged by datetime.
+            weighted_means (list): The weighted columns averaged by datetime.
+            nunique (str, optional): A column whose unique values are counted by datetime.
+            size (str, optional): The name of a column with the number of rows of every datetime.
+
+        Returns:
+            pd.DataFrame: The aggregated columns, by datetime.
+        """
+        columns = list(means) + list(weighted_means)
+        values = df[columns].astype('float64')
+        aggregations = {column: ['sum', 'count'] for column in columns}
+        if nunique is not None:
+            values[nunique] = df[nunique]
+            aggregations[nunique] = ['nunique']
+        grouped = values.groupby(df['datetime'], observed=True)
+        totals = grouped.agg(aggregations)
+
+        counts = {column: totals[(column, 'count')] for column in columns}
+        counts.update({column: counts[column].clip(lower=1) for column in weighted_means})
+        df_means = pd.DataFrame({column: totals[(column, 'sum')] / counts[column] for column in columns},
+                                index=totals.index).round(6)
+        df_means = df_means.astype({column: df[column].dtype for column in columns
+                                    if pd.api.types.is_float_dtype(df[column])})
+        if nunique is not None:
+            df_means[nunique] = totals[(nunique, 'nunique')]
+        if size is not None:
+            df_means[size] = grouped.size().astype('float64')
+
+        return df_means.reset_index()
+
     def intermediate_dataset(self,df):
         """
         Merges two datasets based on the 'datetime' column.
@@ -1,7 +1,13 @@
+import numpy as np
 import pandas as pd
 import utils.utils as ut
+from utils.schema import apply_schema
 
 class CheckTecDataset:
+    # Periods of the indicators calculated where they are missing
+    SMA_PERIODS = [5, 10, 12]
+    RSI_PERIODS = [5, 7, 9]
+
     def __init__(self, df):
         """
         A class responsible for initializing and preparing a data frame for further processing.
@@ -88,16 +94,19 @@ class CheckTecDataset:
             appended or updated.
         """
         if self.config['tec_calculate_missing_indicators'].get('sma', False):
-            for period in [5, 10, 12]:
+            for period in self.SMA_PERIODS:
                 self.df = self.calculate_sma_partial(period)
 
         if self.config['tec_calculate_missing_indicators'].get('rsi', False):
-            for period in [5, 7, 9]:
+            for period in self.RSI_PERIODS:
                 self.df = self.calculate_rsi_partial(period)
 
         if self.config['tec_calculate_missing_indicators'].get('macd', False):
             self.df = self.calculate_macd_partial()
 
+        # The indicator columns created here are cast to the types of the schema
+        self.df = apply_schema(self.df, 'merged_tec_info')
+
         return self.df
 
     def apply_date_time_actions(self):
@@ -218,7 +227,7 @@ class CheckTecDataset:
             self.df[sma_column] = pd.NA
 
         sma_series = self.df[column].rolling(window=period, min_periods=1).mean()
-        self.df.loc[self.df[sma_column].isnull(), sma_column] = sma_series[self.df[sma_column].isnull()]
+        self.fill_missing(sma_column, sma_series)
         self.df[sma_column] = self.df[sma_column].round(4)
 
         return self.df
@@ -256,7 +265,7 @@ class CheckTecDataset:
 
         rs = avg_gain / avg_loss
         rsi_series = 100 - (100 / (1 + rs))
-        self.df.loc[self.df[rsi_column].isnull(), rsi_column] = rsi_series[self.df[rsi_column].isnull()]
+        self.fill_missing(rsi_column, rsi_series)
         self.df[rsi_column] = self.df[rsi_column].round(4)
 
         return self.df
@@ -292,12 +301,24 @@ class CheckTecDataset:
         macd_hist_series = macd_series - macd_signal_series
 
         # Fill only the null values
-        self.df.loc[self.df['MACD'].isnull(), 'MACD'] = macd_series[self.df['MACD'].isnull()].round(4)
-        self.df.loc[self.df['MACD_Signal'].isnull(), 'MACD_Signal'] = macd_signal_series[self.df['MACD_Signal'].isnull()].round(4)
-        self.df.loc[self.df['MACD_Hist'].isnull(), 'MACD_Hist'] = macd_hist_series[self.df['MACD_Hist'].isnull()].round(4)
+        self.fill_missing('MACD', macd_series.round(4))
+        self.fill_missing('MACD_Signal', macd_signal_series.round(4))
+        self.fill_missing('MACD_Hist', macd_hist_series.round(4))
 
         return self.df
 
+    def fill_missing(self, column, values):
+        """
+        Fills the missing values of a column with the calculated ones, cast to the type of the column, so a
+        float32 indicator of the schema keeps its type.
+
+        Args:
+            column (str): The name of the column.
+            values (pandas.Series): The calculated values, aligned with the dataframe.
+        """
+        missing = self.df[column].isnull()
+        self.df.loc[missing, column] = values[missing].astype(self.df[column].dtype)
+
     def remove_incomplete_records(self):
         """
         Removes incomplete records from the dataset.
@@ -370,12 +391,16 @@ class CheckTecDataset:
         Fills in missing hourly data for each day in the dataset, ensuring the time series is complete.
 
         Summary:
-        This method processes the given dataframe to identify missing hourly entries for each unique day in
-        the dataset, and fills the missing hours with data. When filling in missing hours, the values are
-        extrapolated either from the first hour of the day (for missing hours before the available data) or
-        from the last hour of the day (for missing hours after the available data). After filling in the gaps,
-        the dataset is updated, sorted by date and time, and auxiliary columns used during processing
-        are removed.
+        This method builds the complete hourly grid of the days in the dataset once and reindexes the bars of
+        every ticker on it. The missing hours before the first bar of a day are filled with that first bar, and
+        the ones after the last bar of the day with that last bar, by backward and forward filling the positions
+        of the bars within every day. The missing hours between two bars of a day, and the days without any bar,
+        are not filled. The filled rows are appended after the existing ones, and the 'datetime' field is rebuilt
+        from the date and the hour of every row.
+
+        The gaps are filled per ticker: every ticker gets the missing hours of its own days, filled with its own
+        bars. The former loop took the days of all the tickers at once, so with several tickers it only filled the
+        hours missing from every ticker, with the first or last bar of a single one of them.
 
         Parameters:
         None
@@ -385,59 +410,41 @@ class CheckTecDataset:
 
         Returns:
         pandas.DataFrame
-            Updated dataframe with missing hourly data filled in and sorted by date and time.
+            Updated dataframe with missing hourly data filled in.
         """
         # Verify that the necessary fields exist
         required_columns = {'year', 'month', 'day', 'time'}
         if not required_columns.issubset(self.df.columns):
             raise ValueError(f'The dataset must contain the columns: {required_columns}')
 
-        # Generate the 24 hours for each day
-        unique_days = self.df[['year', 'month', 'day']].drop_duplicates()
-
-        filled_rows = []
-        for year, month, day in unique_days.itertuples(index=False, name=None):
-            # Filter the data for the current day
-            day_data = self.df[(self.df['year'] == year) & (self.df['month'] == month) & (self.df['day'] == day)]
+        # The hour of every bar, and its position in the dataset. The first bar of a repeated hour is the one used
+        days = pd.to_datetime(self.df[['year', 'month', 'day']])
+        bars = pd.DataFrame({'ticker': self.df['ticker'] if 'ticker' in self.df.columns else '',
+                             'hour': days + pd.to_timedelta(self.df['time'], unit='h'),
+                             'position': np.arange(len(self.df))}).drop_duplicates(['ticker', 'hour'])
 
-            # Create a list of complete hours
-            all_hours = set(range(24))
-            existing_hours = set(day_data['time'].unique())
+        # Generate the 24 hours of every day, once for all the tickers
+        all_hours = pd.date_range(days.min(), days.max() + pd.Timedelta(hours=23), freq='h')
 
-            missing_hours = sorted(all_hours - existing_hours)
-
-            if not day_data.empty:
-                # First and last hour of the day
-                first_hour_data = day_data[day_data['time'] == day_data['time'].min()].iloc[0]
-                last_hour_data = day_data[day_data['time'] == day_data['time'].max()].iloc[0]
-
-                for hour in missing_hours:
-                    row = None
-                    if hour < day_data['time'].min():  # Before the first hour
-                        row = first_hour_data.copy()
-                    elif hour > day_data['time'].max():  # After the last hour
-                        row = last_hour_data.copy()
-
-                    if row is not None:
-                        row['time'] = hour
-                        filled_rows.append(row)
+        fill_positions = []
+        for _, ticker_bars in bars.groupby('ticker', observed=True, sort=False):
+            positions = ticker_bars.set_index('hour')['position'].reindex(all_hours)
+            day_positions = positions.groupby(all_hours.normalize())
+            first_hour_data = day_positions.bfill()  # Before the first hour, the next bar is the first one
+            last_hour_data = day_positions.ffill()  # After the last hour, the previous bar is the last one
+            fill = first_hour_data.where(last_hour_data.isnull(), last_hour_data.where(first_hour_data.isnull()))
+            fill_positions.append(fill[positions.isnull() & fill.notnull()])
 
         # Add the filled rows to the original dataset
-        if filled_rows:
-            self.df = pd.concat([self.df, pd.DataFrame(filled_rows)], ignore_index=True)
-
-        # Ensure that 'time' is interpreted as an hour
-        self.df['hour'] = self.df['time'].astype(int)
+        fill_positions = pd.concat(fill_positions) if fill_positions else pd.Series(dtype=float)
+        if not fill_positions.empty:
+            filled_rows = self.df.iloc[fill_positions.to_numpy().astype(int)].copy()
+            filled_rows['time'] = fill_positions.index.hour.to_numpy().astype(self.df['time'].dtype)
+            self.df = pd.concat([self.df, filled_rows], ignore_index=True)
 
         # Reconstruct the 'datetime' field
-        self.df['datetime'] = pd.to_datetime(self.df[['year', 'month', 'day', 'hour']])
-
-        # Sort by date and time
-        self.df.sort_values(by=['year', 'month', 'day', 'hour']).reset_index(drop=True)
-
-        # Remove the auxiliary column 'hour'
-        if 'hour' in self.df.columns:
-            self.df = self.df.drop(columns=['hour'])
+        self.df['datetime'] = pd.to_datetime(self.df[['year', 'month', 'day']]) + pd.to_timedelta(
+            self.df['time'].astype(int), unit='h')
 
         return self.df
 
@@ -447,6 +454,9 @@ class CheckTecDataset:
         on the last known data prior to the missing day. Preserves the structure of the dataset and
         ensures the date-time continuity by generating hour-wise data for the imputed days.
 
+        The last bar before every missing day is found with a single binary search over the sorted dates, and
+        the 24 hours of all the missing days are generated as one block of rows.
+
         Raises:
             ValueError: If the required columns 'year', 'month', 'day', or 'time' are missing in the dataset.
 
@@ -463,38 +473,35 @@ class CheckTecDataset:
                                                                                                   unit='h')
 
         # Generate a full date range excluding the last day
+        existing_dates = self.df['datetime'].dt.normalize()
         full_date_range = pd.date_range(
-            start=self.df['datetime'].min().normalize(),
-            end=self.df['datetime'].max().normalize() - pd.Timedelta(days=1),
-            freq='d'
+            start=existing_dates.min(),
+            end=existing_dates.max() - pd.Timedelta(days=1),
+            freq='D'
         )
 
-        # Identify existing days
-        existing_dates = self.df['datetime'].dt.date.unique()
-
         # Detect missing days
-        missing_dates = sorted(set(full_date_range.date) - set(existing_dates))
-
-        # Generate rows for missing days
-        filled_rows = []
-        for missing_date in missing_dates:
-            # Last available day before the missing date
-            previous_day_data = self.df[self.df['datetime'].dt.date < missing_date]
-            if previous_day_data.empty:
-                continue
-
-            last_day_data = previous_day_data[previous_day_data['datetime'] == previous_day_data['datetime'].max()]
-            for hour in range(24):  # Generate all 24 hours for the missing day
-                row = last_day_data.iloc[0].copy()
-                row['year'], row['month'], row['day'], row[
-                    'time'] = missing_date.year, missing_date.month, missing_date.day, hour
-                row['datetime'] = pd.Timestamp(year=row['year'], month=row['month'], day=row['day'],
-                                               hour=row['time'])  # Fix datetime column
-                filled_rows.append(row)
-
-        # Add generated rows to the original dataset
-        if filled_rows:
-            self.df = pd.concat([self.df, pd.DataFrame(filled_rows)], ignore_index=True)
+        missing_dates = full_date_range.difference(existing_dates.unique())
+
+        if not missing_dates.empty:
+            # Last available bar before every missing date: the bars before midnight of the missing date are the
+            # ones before its insertion point in the sorted dates. The first row of a repeated last bar is used
+            order = np.argsort(self.df['datetime'].to_numpy(), kind='stable')
+            sorted_datetimes = self.df['datetime'].to_numpy()[order]
+            last_bars = np.searchsorted(sorted_datetimes, missing_dates.to_numpy(), side='left') - 1
+            last_bars = np.searchsorted(sorted_datetimes, sorted_datetimes[last_bars], side='left')
+
+            # Generate all 24 hours for every missing day
+            hours = np.tile(np.arange(24), len(missing_dates))
+            filled_dates = missing_dates.repeat(24)
+            filled_rows = self.df.iloc[np.repeat(order[last_bars], 24)].copy()
+            for column, values in [('year', filled_dates.year), ('month', filled_dates.month),
+                                   ('day', filled_dates.day), ('time', hours)]:
+                filled_rows[column] = np.asarray(values).astype(self.df[column].dtype)
+            filled_rows['datetime'] = filled_dates + pd.to_timedelta(hours, unit='h')
+
+            # Add generated rows to the original dataset
+            self.df = pd.concat([self.df, filled_rows], ignore_index=True)
 
         # Sort and finalize datetime column
         self.df = self.df.sort_values(by=['datetime']).reset_index(drop=True)
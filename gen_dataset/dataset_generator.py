@@ -3,7 +3,7 @@ import utils.utils as ut
 
 
 class DatasetGenerator:
-    def __init__(self, df_news, df_tec):
+    def __init__(self, df_news, df_tec, writer=None):
         """
         Class to manage and process datasets for news and technology-related data.
 
@@ -13,15 +13,19 @@ class DatasetGenerator:
         df (pd.DataFrame): An empty DataFrame initialized for subsequent operations.
         config (dict): Configuration settings loaded from the 'gen_dataset_config'
         file using the utility function.
+        writer (BackgroundWriter): Writer saving the generated dataset in the background, or None
+        to save it before returning.
 
         Parameters:
         df_news (pd.DataFrame): The input DataFrame containing news data.
         df_tec (pd.DataFrame): The input DataFrame containing technology data.
+        writer (BackgroundWriter, optional): Writer saving the generated dataset in the background.
         """
         self.df_news = df_news.copy()
         self.df_tec = df_tec.copy()
         self.df = pd.DataFrame()
         self.config = ut.load_config('gen_dataset_config')
+        self.writer = writer
 
     def complete_missing_times(self):
         """
@@ -75,13 +79,16 @@ class DatasetGenerator:
 
             return self.df
 
-    def merge_datasets(self):
+    def merge_datasets(self, save=True):
         """
         Merges the technical and news datasets, and calculates target labels.
 
         This method merges the processed news dataset (`self.df`) with the technical dataset (`df_tec`)
         based on timestamps. It also calculates the target variable for predicting future price changes.
 
+        Parameters:
+        save (bool): Whether the merged dataset is saved as 'data/gen_data.csv'. Defaults to True.
+
         Returns:
             DataFrame: The final merged dataset with calculated target values.
         """
@@ -96,6 +103,12 @@ class DatasetGenerator:
 
         self.df = self.df.sort_values(by='datetime').drop_duplicates(subset=['datetime'], keep='last')
 
-        self.df.to_csv('data/gen_data.csv',encoding='utf-8',index=False)
+        if not save:
+            return self.df
+        if self.writer is not None:
+            # The feature engineering starts while the file is written
+            self.writer.write_csv(self.df, 'data/gen_data.csv')
+        else:
+            self.df.to_csv('data/gen_data.csv',encoding='utf-8',index=False)
 
         return self.df
@@ -2,6 +2,7 @@ import os
 import sys
 import utils.utils as ut
 from utils.utils import get_time_now
+from utils.background_writer import background_writer
 from gen_dataset.check_news_dataset import CheckNewsDataset
 from gen_dataset.check_tec_dataset import CheckTecDataset
 from gen_dataset.dataset_generator import DatasetGenerator
@@ -122,7 +123,7 @@ def run_gen_dataset(dfs):
         dfs (Dict[str, DataFrame]): A dictionary holding the input dataframes.
             Keys:
             - 'tec_info': DataFrame containing technical data information.
-            - 'news': DataFrame containing news-related data.
+            - 'news', 'news_tickers' and 'news_topics': The normalized news tables.
 
     Returns:
         DataFrame: The final processed dataset after merging, validation, and
@@ -131,15 +132,15 @@ def run_gen_dataset(dfs):
     print(f'{get_time_now()} :: Dataset Generation: Starting dataset generation')
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     df_tec = ut.ensure_correct_dtypes(dfs['tec_info'],'tec')
-    df_news = ut.ensure_correct_dtypes(dfs['news'],'news')
+    news_tables = {key: ut.ensure_correct_dtypes(dfs[key],'news') for key in ['news', 'news_tickers', 'news_topics']}
 
     tec_checker = CheckTecDataset(df_tec)
-    news_checker = CheckNewsDataset(df_news,tec_checker.target_ticker)
+    news_checker = CheckNewsDataset(news_tables,tec_checker.target_ticker)
 
     tec = check_tec_dataset(tec_checker)
     news = check_news_dataset(news_checker)
 
-    ds_generator = DatasetGenerator(news.df, tec.df)
+    ds_generator = DatasetGenerator(news.df, tec.df, background_writer())
     ds = generate_dataset(ds_generator)
 
     feature = FeatureEngineering(ds.df)
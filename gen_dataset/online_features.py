@@ -0,0 +1,661 @@
+import copy
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+import utils.utils as ut
+from utils.utils import get_time_now
+from loader.indicator_state import EmaState
+from gen_dataset.check_news_dataset import CheckNewsDataset
+from gen_dataset.check_tec_dataset import CheckTecDataset
+from gen_dataset.dataset_generator import DatasetGenerator
+from gen_dataset.feature_engineering import FeatureEngineering
+from gen_dataset.gen_dataset import check_news_dataset, check_tec_dataset, feature_engineering
+
+NEWS_TABLES = ['news', 'news_tickers', 'news_topics']
+
+
+class RollingMean:
+    __slots__ = ('window', 'offset', 'min_periods', 'entries', 'total', 'add_compensation', 'remove_compensation',
+                 'count', 'negatives', 'same_count', 'previous')
+
+    def __init__(self, window=None, offset=None, min_periods=None):
+        """
+        Rolling mean updated one value at a time with the arithmetic of `pandas.Series.rolling().mean()`, so the
+        values are exactly the batch ones: the compensated (Kahan) sums of the added and removed values, the mean
+        of a window of equal values returned as that value, and the sign of the mean kept when all the values
+        have the same sign.
+
+        Attributes:
+            window (int): The number of values of the window, None for a time window.
+            offset (int): The length of a time window in nanoseconds, None for a window of values.
+            min_periods (int): The minimum number of values to return a mean, otherwise NaN.
+            entries (collections.deque): The keys and values in the window.
+            total (float): The compensated sum of the values in the window.
+            add_compensation (float): The compensation of the added values.
+            remove_compensation (float): The compensation of the removed values.
+            count (int): The number of non-null values in the window.
+            negatives (int): The number of values in the window with the negative sign.
+            same_count (int): The number of consecutive equal values ending in the last one.
+            previous (float): The last non-null value.
+
+        Parameters:
+            window (int, optional): The number of values of the window, as `rolling(window)`.
+            offset (pandas.Timedelta, optional): The length of a time window, as `rolling('3h')`.
+            min_periods (int, optional): Defaults to the window, or to 1 for a time window, as pandas does.
+        """
+        self.window = window
+        self.offset = None if offset is None else pd.Timedelta(offset).value
+        if min_periods is None:
+            min_periods = 1 if window is None else window
+        self.min_periods = min_periods
+        self.entries = deque()
+        self._reset(math.nan)
+
+    def _reset(self, value):
+        self.total = 0.
+        self.add_compensation = 0.
+        self.remove_compensation = 0.
+        self.count = 0
+        self.negatives = 0
+        self.same_count = 0
+        self.previous = value
+
+    def update(self, value, key=None):
+        """
+        Adds a value to the window and returns the mean of the window.
+
+        Parameters:
+            value (float): The value, NaN for a missing one.
+            key (int, optional): The time of the value in nanoseconds, required by a time window.
+
+        Returns:
+            float: The rolling mean at the value.
+        """
+        value = float(value)
+        if self.window is not None:
+            leaving = len(self.entries) - self.window + 1
+        else:
+            leaving = 0
+            for entry_key, _ in self.entries:
+                if entry_key > key - self.offset:
+                    break
+                leaving += 1
+
+        # pandas starts the sums again when the window does not overlap the previous one
+        if not self.entries or leaving >= len(self.entries):
+            self.entries.clear()
+            self._reset(value)
+        else:
+            for _ in range(max(leaving, 0)):
+                _, old = self.entries.popleft()
+                if old == old:
+                    self.count -= 1
+                    y = -old - self.remove_compensation
+                    t = self.total + y
+                    self.remove_compensation = t - self.total - y
+                    self.total = t
+                    if math.copysign(1., old) < 0:
+                        self.negatives -= 1
+
+        self.entries.append((key, value))
+        if value == value:
+            self.count += 1
+            y = value - self.add_compensation
+            t = self.total + y
+            self.add_compensation = t - self.total - y
+            self.total = t
+            if math.copysign(1., value) < 0:
+                self.negatives += 1
+            self.same_count = self.same_count + 1 if value == self.previous else 1
+            self.previous = value
+
+        if self.count < self.min_periods or self.count == 0:
+            return math.nan
+        if self.same_count >= self.count:
+            return self.previous
+        mean = self.total / self.count
+        if (self.negatives == 0 and mean < 0) or (self.negatives == self.count and mean > 0):
+            return 0.
+
+        return mean
+
+    def copy(self):
+        state = copy.copy(self)
+        state.entries = deque(self.entries)
+        return state
+
+
+class Lag:
+    __slots__ = ('lag', 'values')
+
+    def __init__(self, lag):
+        """
+        The values of the last `lag` rows, which give `pandas.Series.shift(lag)` one row at a time.
+        """
+        self.lag = lag
+        self.values = deque(maxlen=lag)
+
+    def update(self, value):
+        """
+        Adds a value and returns the one `lag` rows before, NaN for the first rows.
+        """
+        previous = self.values[0] if len(self.values) == self.lag else math.nan
+        self.values.append(value)
+        return previous
+
+    def copy(self):
+        state = Lag(self.lag)
+        state.values.extend(self.values)
+        return state
+
+
+class FeatureState:
+    __slots__ = ('indicators', 'news_means', 'lags', 'moving_avgs', 'volume_mean', 'close_mean', 'closes',
+                 'cumulative_volume')
+
+    def __init__(self, lag_features, lags, ma_features, windows, news_columns, hours):
+        """
+        The trailing state of the rows of the dataset that the next rows depend on.
+
+        Attributes:
+            indicators (dict): The rolling means and exponential averages of the closes of the bars, which fill
+            the missing SMA, RSI and MACD of a bar as `CheckTecDataset.calculate_missing_indicators`.
+            news_means (dict): The rolling mean of the last `hours` hours of every news feature.
+            lags (dict): The Lag of every lagged feature and lag.
+            moving_avgs (dict): The RollingMean of every averaged feature and window.
+            volume_mean (RollingMean): The mean of the last 5 volumes, of the 'volume_ratio'.
+            close_mean (RollingMean): The mean of the last 5 closes, of the 'closing_moving_avg'.
+            closes (collections.deque): The last 5 closes, of the changes of the close and the previous targets.
+            cumulative_volume (float): The running sum of the volumes.
+
+        Parameters:
+            lag_features (list): The features with lags.
+            lags (list): The lags of `FeatureEngineering.add_lags`.
+            ma_features (list): The features with moving averages.
+            windows (list): The windows of `FeatureEngineering.add_moving_avg`.
+            news_columns (list): The news features aggregated over the previous hours.
+            hours (int): The hours of the news aggregation.
+        """
+        self.indicators = {('sma', period): RollingMean(period, min_periods=1)
+                           for period in CheckTecDataset.SMA_PERIODS}
+        for period in CheckTecDataset.RSI_PERIODS:
+            self.indicators[('gain', period)] = RollingMean(period, min_periods=1)
+            self.indicators[('loss', period)] = RollingMean(period, min_periods=1)
+        self.indicators['previous_close'] = math.nan
+        self.indicators['macd'] = (EmaState.from_span(12), EmaState.from_span(26), EmaState.from_span(9))
+        self.news_means = {column: RollingMean(offset=pd.Timedelta(hours=hours)) for column in news_columns}
+        self.lags = {(feature, lag): Lag(lag) for feature in lag_features for lag in lags}
+        self.moving_avgs = {(feature, window): RollingMean(window) for feature in ma_features for window in windows}
+        self.volume_mean = RollingMean(5, min_periods=1)
+        self.close_mean = RollingMean(5, min_periods=1)
+        self.closes = deque(maxlen=5)
+        self.cumulative_volume = 0.
+
+    def copy(self):
+        """
+        Copies the state, so the rows added to the copy do not change it.
+        """
+        state = copy.copy(self)
+        state.indicators = {key: value.copy() if isinstance(value, RollingMean) else value
+                            for key, value in self.indicators.items()}
+        state.indicators['macd'] = tuple(copy.copy(ema) for ema in self.indicators['macd'])
+        for name in ['news_means', 'lags', 'moving_avgs']:
+            setattr(state, name, {key: value.copy() for key, value in getattr(self, name).items()})
+        state.volume_mean = self.volume_mean.copy()
+        state.close_mean = self.close_mean.copy()
+        state.closes = deque(self.closes, maxlen=5)
+        return state
+
+
+def run_batch_stages(dfs):
+    """
+    Runs the stages of `run_gen_dataset` without saving 'data/gen_data.csv', and keeps the intermediate datasets.
+
+    Args:
+        dfs (Dict[str, DataFrame]): The 'tec_info', 'news', 'news_tickers' and 'news_topics' dataframes.
+
+    Returns:
+        dict: The checked technical and news datasets ('tec' and 'news', the CheckTecDataset and
+        CheckNewsDataset), the news features at every datetime of the technical dataset before their
+        aggregation ('news_features'), the merged dataset ('merged') and the generated dataset ('features').
+    """
+    df_tec = ut.ensure_correct_dtypes(dfs['tec_info'].copy(), 'tec')
+    news_tables = {key: ut.ensure_correct_dtypes(dfs[key].copy(), 'news') for key in NEWS_TABLES}
+
+    tec_checker = CheckTecDataset(df_tec)
+    news_checker = CheckNewsDataset(news_tables, tec_checker.target_ticker)
+    tec = check_tec_dataset(tec_checker)
+    news = check_news_dataset(news_checker)
+
+    ds_generator = DatasetGenerator(news.df, tec.df)
+    ds_generator.complete_missing_times()
+    news_features = ds_generator.df.copy()
+    ds_generator.aggregate_previous_hours()
+    merged = ds_generator.merge_datasets(save=False)
+
+    feature = feature_engineering(FeatureEngineering(merged))
+
+    return {'tec': tec, 'news': news, 'news_features': news_features, 'merged': merged, 'features': feature.df}
+
+
+class OnlineFeatureEngine:
+    def __init__(self, dfs):
+        """
+        Generates the newest row of the dataset of `run_gen_dataset`, the one `get_df_prediction` uses, from the
+        newest hourly bar and news instead of the whole history.
+
+        The engine runs the batch stages once on the history and then keeps only the trailing state the next
+        rows depend on: the rolling means and averages filling the missing indicators of the bars, the last bar,
+        the rolling window of the news aggregation, the lag buffers, the moving average windows, the rolling mean
+        of the volume ratio, the last closes and the cumulative volume. Every new bar adds the rows the batch
+        path generates before it (the last hours of the previous day, the missing days and the first hours of
+        the day), and the returned row is the last one of the batch dataset: the last bar repeated up to 23
+        hours, bit for bit equal to `run_gen_dataset(dfs).iloc[[-1]]` on the same data.
+
+        The news features of a row are the ones of the news at its exact datetime, as `complete_missing_times`
+        merges them, so the news must be given before the bar which completes their hour. The titles of the
+        articles of the target ticker received so far are excluded from the topic metrics, as the batch path
+        excludes the ones of the whole history.
+
+        Attributes:
+            config (dict): The 'gen_dataset_config' configuration.
+            fe_config (dict): The 'feature_eng_config' configuration.
+            target_ticker (str): The ticker of the technical dataset.
+            ticker_titles (set): The titles of the articles of the target ticker.
+            tec_dtypes (pandas.Series): The types of the bars, after `ensure_correct_dtypes`.
+            tec_columns (list): The columns of the checked technical dataset.
+            news_columns (list): The news features of the merged dataset.
+            merged_columns (list): The columns of the merged dataset.
+            merged_dtypes (pandas.Series): The types of the columns of the merged dataset.
+            features (pandas.DataFrame): The empty generated dataset, with its columns and types.
+            lag_features (list): The features with lags.
+            ma_features (list): The features with moving averages.
+            hour_encoding (list): The sine and cosine of every hour of `encode_temporal_features`.
+            state (FeatureState): The trailing state of the committed rows.
+            last_bar (dict): The last bar received, with its missing indicators filled.
+            last_row (dict): The last committed row of the dataset, None before the first complete one.
+            pending_news (dict): The news tables after the last committed row, with their types checked when
+            their features are calculated.
+            pending_datetimes (set): The datetimes of the pending news.
+
+        Parameters:
+            dfs (Dict[str, DataFrame]): The history: the 'tec_info', 'news', 'news_tickers' and 'news_topics'
+            dataframes of `run_gen_dataset`.
+
+        Raises:
+            ValueError: If the history has no bars, or if a correction which depends on the next bars is enabled.
+        """
+        self.config = ut.load_config('gen_dataset_config')
+        self.fe_config = ut.load_config('feature_eng_config')
+        corrections = self.config['tec_correction_methods']
+        if any(corrections.get(method, False) for method in ['forward_fill', 'backward_fill', 'moving_average']):
+            raise ValueError('The online features do not support the forward fill, backward fill and moving average '
+                             'corrections')
+        if dfs['tec_info'].empty:
+            raise ValueError('The online features need the history of the technical dataset')
+
+        print(f'{get_time_now()} :: Online Features: Building the state from the history')
+        stages = run_batch_stages(dfs)
+        self.target_ticker = stages['tec'].target_ticker
+        self.ticker_titles = set(stages['news'].filtered_df['title'])
+        self.tec_dtypes = stages['tec'].original_df.dtypes
+        self.tec_columns = stages['tec'].df.columns.tolist()
+        self.news_columns = [column for column in stages['news_features'].columns if column != 'datetime']
+        self.merged_columns = stages['merged'].columns.tolist()
+        self.merged_dtypes = stages['merged'].dtypes
+        self.features = stages['features'].iloc[:0]
+
+        numeric_columns = stages['merged'].select_dtypes(include=['float']).columns.tolist()
+        self.lag_features = [feature for feature in numeric_columns if self.fe_config['apply_lag'].get(feature, False)]
+        self.ma_features = [feature for feature in numeric_columns
+                            if self.fe_config['apply_moving_avg'].get(feature, False)]
+        self.hour_encoding = []
+        if 'time' in self.merged_dtypes:
+            # The expressions of `encode_temporal_features`, calculated once for the 24 hours
+            hours = pd.Series(range(24), dtype=self.merged_dtypes['time'])
+            self.hour_encoding = list(zip(np.sin(2 * np.pi * hours / 24), np.cos(2 * np.pi * hours / 24)))
+
+        aggregate = self.config['news_aggregate_hours']
+        news_means = []
+        if aggregate.get('aggregate_news_execute', False):
+            news_means = stages['news_features'].select_dtypes(include=['number']).columns.tolist()
+        self.state = FeatureState(self.lag_features, self.fe_config['lags'], self.ma_features,
+                                  self.fe_config['windows'], news_means, aggregate.get('aggregate_news_horus', 0))
+
+        # The indicators of the bars, up to the last one, which is kept to repeat it in the next rows
+        df_tec = stages['tec'].original_df
+        for close in df_tec['close'].iloc[:-1]:
+            self._update_indicators(close)
+        self.last_bar = self._prepare_bar(df_tec.iloc[[-1]])
+
+        # The rows up to the last bar are committed, the ones after it repeat the last bar until the next one
+        merged = stages['merged']
+        committed = merged[merged['datetime'] <= self.last_bar['datetime']]
+        news_features = stages['news_features'].set_index('datetime').reindex(committed['datetime'])
+        self.last_row = self._add_rows(committed[self.tec_columns].to_dict('records'),
+                                       news_features[self.news_columns].to_dict('records'))
+
+        self.pending_news = {key: dfs[key].iloc[:0] for key in NEWS_TABLES}
+        self.pending_datetimes = set()
+        self._add_news(dfs, self.last_bar['datetime'])
+
+    def _add_news(self, news_tables, committed_datetime):
+        """
+        Adds the news after the last committed row to the pending news, and the titles of the articles of the
+        target ticker to the excluded titles.
+        """
+        articles = news_tables['news']
+        ticker_articles = news_tables['news_tickers']
+        # As in `CheckNewsDataset`, an article without topics is not an article of the target ticker
+        with_topics = ticker_articles['article_id'].isin(news_tables['news_topics']['article_id'])
+        ticker_articles = ticker_articles.loc[(ticker_articles['ticker'] == self.target_ticker) & with_topics,
+                                              'article_id']
+        self.ticker_titles.update(articles.loc[articles['article_id'].isin(ticker_articles), 'title'])
+
+        articles = articles[pd.to_datetime(articles['datetime']) > committed_datetime]
+        if articles.empty:
+            return
+        self.pending_datetimes.update(pd.to_datetime(articles['datetime']))
+        for key in NEWS_TABLES:
+            new = articles if key == 'news' else news_tables[key][news_tables[key]['article_id'].isin(
+                articles['article_id'])]
+            self.pending_news[key] = pd.concat([self.pending_news[key], new], ignore_index=True) \
+                if not self.pending_news[key].empty else new.reset_index(drop=True)
+
+    def _drop_news(self, committed_datetime):
+        """
+        Drops the pending news up to the last committed row.
+        """
+        if all(datetime > committed_datetime for datetime in self.pending_datetimes):
+            return
+        articles = self.pending_news['news']
+        articles = articles[pd.to_datetime(articles['datetime']) > committed_datetime]
+        self.pending_datetimes = set(pd.to_datetime(articles['datetime']))
+        self.pending_news = {key: articles if key == 'news' else
+                             self.pending_news[key][self.pending_news[key]['article_id'].isin(articles['article_id'])]
+                             for key in NEWS_TABLES}
+
+    def _news_features(self, datetimes):
+        """
+        Calculates the news features at every datetime, as `complete_missing_times` leaves them.
+
+        Parameters:
+            datetimes (list): The datetimes of the rows.
+
+        Returns:
+            list: The news features of every datetime, 0 where there are no news.
+        """
+        no_news = dict.fromkeys(self.news_columns, 0.)
+        if self.pending_datetimes.isdisjoint(datetimes):
+            return [no_news] * len(datetimes)
+        articles = self.pending_news['news']
+        articles = articles[pd.to_datetime(articles['datetime']).isin(datetimes)]
+
+        news_tables = {key: articles if key == 'news' else
+                       self.pending_news[key][self.pending_news[key]['article_id'].isin(articles['article_id'])]
+                       for key in NEWS_TABLES}
+        news_tables = {key: ut.ensure_correct_dtypes(df.copy(), 'news') for key, df in news_tables.items()}
+        # Only the titles of these articles can be excluded
+        ticker_titles = self.ticker_titles.intersection(articles['title'])
+        news = check_news_dataset(CheckNewsDataset(news_tables, self.target_ticker, ticker_titles))
+        df = news.df.set_index(pd.to_datetime(news.df['datetime'])).reindex(columns=self.news_columns).fillna(0)
+        rows = df.to_dict('index')
+
+        return [rows.get(datetime, no_news) for datetime in datetimes]
+
+    def _update_indicators(self, close):
+        """
+        Adds the close of a bar to the indicators which fill the missing ones, and returns their values at the
+        bar as `calculate_missing_indicators` calculates them.
+        """
+        indicators = self.state.indicators
+        close = float(close)
+        values = {f'sma_{period}': indicators[('sma', period)].update(close)
+                  for period in CheckTecDataset.SMA_PERIODS}
+
+        # The first change is NaN, with no gain and a -0.0 loss
+        delta = np.float64(close) - np.float64(indicators['previous_close'])
+        indicators['previous_close'] = close
+        gain = delta if delta > 0 else 0.
+        loss = -(delta if delta < 0 else 0.)
+        for period in CheckTecDataset.RSI_PERIODS:
+            avg_gain = np.float64(indicators[('gain', period)].update(gain))
+            avg_loss = np.float64(indicators[('loss', period)].update(loss))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values[f'rsi_{period}'] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        short_ema, long_ema, signal_ema = indicators['macd']
+        macd = short_ema.update(close) - long_ema.update(close)
+        signal = signal_ema.update(macd)
+        values.update({'MACD': np.round(np.float64(macd), 4), 'MACD_Signal': np.round(np.float64(signal), 4),
+                       'MACD_Hist': np.round(np.float64(macd - signal), 4)})
+
+        return values
+
+    def _prepare_bar(self, df_bar):
+        """
+        Prepares a bar as `CheckTecDataset` prepares the bars before filling the missing dates: the types of the
+        history, the economic indicators dropped and the missing indicators filled with the type of their column
+        and rounded.
+
+        Returns:
+            dict: The values of the bar.
+        """
+        df_bar = ut.ensure_correct_dtypes(df_bar.reset_index(drop=True), 'tec')
+        dtypes = df_bar.dtypes
+        casts = {column: dtype for column, dtype in self.tec_dtypes.items() if column in dtypes and
+                 dtypes[column] != dtype and not isinstance(dtype, pd.CategoricalDtype)}
+        if casts:
+            df_bar = df_bar.astype(casts)
+            dtypes = df_bar.dtypes
+        bar = {column: df_bar[column].iloc[0] for column in df_bar.columns}
+        bar['datetime'] = pd.Timestamp(bar['datetime'])
+        for indicator, enabled in self.config['drop_economic_indicators'].items():
+            if not enabled:
+                bar.pop(indicator, None)
+
+        values = self._update_indicators(bar['close'])
+        missing = self.config['tec_calculate_missing_indicators']
+        for column, value in values.items():
+            if not missing.get(column.split('_')[0].lower(), False):
+                continue
+            dtype = dtypes[column] if column in dtypes else np.dtype('float64')
+            if pd.isna(bar.get(column, math.nan)):
+                bar[column] = dtype.type(value)
+            if not column.startswith('MACD'):
+                bar[column] = np.round(dtype.type(bar[column]), 4)
+
+        return bar
+
+    def _block(self, bar, datetimes):
+        """
+        Builds the rows of the checked technical dataset of a bar repeated at the datetimes, as
+        `apply_date_time_actions` and `apply_corrections` build them.
+
+        Returns:
+            list: The rows, empty if the bar is incomplete and the incomplete rows are removed.
+        """
+        if self.config['tec_correction_methods'].get('mark_incomplete_days', False) and \
+                any(pd.isna(bar[column]) for column in self.tec_columns if column in bar):
+            return []
+
+        actions = self.config['global_date_time_actions']
+        rows = []
+        for datetime in datetimes:
+            row = dict(bar)
+            row['datetime'] = datetime
+            if actions.get('date_split', False):
+                row.pop('date', None)
+                row.pop('year_month', None)
+                row['day'], row['month'], row['year'], row['time'] = (datetime.day, datetime.month, datetime.year,
+                                                                      datetime.hour)
+            if actions.get('fill_missing_days', False) or actions.get('fill_missing_hours', False):
+                row['datetime'] = datetime.normalize() + pd.Timedelta(hours=row['time'])
+            if actions.get('add_temporal_features', False):
+                time = row['time']
+                row['day_of_week'] = datetime.dayofweek
+                row['is_weekend'] = int(datetime.dayofweek in [5, 6])
+                is_open = row['is_weekend'] == 0 and 4 <= time <= 20
+                row['is_premarket'] = int(is_open and 4 <= time <= 9)
+                row['is_market'] = int(is_open and 10 <= time <= 16)
+                row['is_post_market'] = int(is_open and 17 <= time <= 20)
+            rows.append(row)
+
+        return rows
+
+    def _add_rows(self, rows, news_rows=None):
+        """
+        Adds rows of the checked technical dataset to the state, and returns the last one of the generated dataset.
+        """
+        if news_rows is None:
+            news_rows = self._news_features([row['datetime'] for row in rows])
+        last_row = None
+        for row, news_row in zip(rows, news_rows):
+            last_row = self._add_row(row, news_row)
+
+        return last_row
+
+    def _add_row(self, tec_row, news_row):
+        """
+        Adds a row of the merged dataset to the state and returns the row of the generated dataset, computed
+        with the formulas of `merge_datasets` and `FeatureEngineering`.
+
+        Parameters:
+            tec_row (dict): The row of the checked technical dataset.
+            news_row (dict): The news features at its datetime, before their aggregation.
+
+        Returns:
+            dict: The columns of the generated dataset.
+        """
+        state = self.state
+        row = dict(tec_row)
+        key = row['datetime'].value
+        for column in self.news_columns:
+            value = news_row[column]
+            row[column] = state.news_means[column].update(value, key) if column in state.news_means else value
+
+        closes = state.closes
+        close = np.float64(row['close'])
+        previous_close = np.float64(closes[-1] if closes else math.nan)
+        previous_targets = [closes[-i] if i <= len(closes) else math.nan for i in range(1, 6)]
+        closes.append(row['close'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            close_change = (close - previous_close) / previous_close
+            price_trend = close / previous_close - 1
+        row['target'] = 0
+        row['close_pct_change'] = np.round(close_change, 6)
+        row = {column: row[column] for column in self.merged_columns}
+
+        for feature in self.lag_features:
+            for lag in self.fe_config['lags']:
+                row[f'{feature}_lag{lag}'] = state.lags[(feature, lag)].update(row[feature])
+
+        advanced = self.fe_config['advanced_indicators']
+        cycles = self.fe_config['cycle_analysis']
+        aggregated = self.fe_config['aggregated_perspective']
+        volume = row['volume']
+        volume_mean = state.volume_mean.update(volume)
+        close_mean = state.close_mean.update(row['close'])
+        state.cumulative_volume += volume if volume == volume else 0.
+        if advanced.get('intraday_volatility', False):
+            high = self.merged_dtypes['high'].type(row['high'])
+            low = self.merged_dtypes['low'].type(row['low'])
+            row['intraday_volatility'] = np.round(high - low, 4)
+        if advanced.get('volume_ratio', False):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                row['volume_ratio'] = np.round(np.float64(volume) / np.float64(volume_mean), 4)
+        if advanced.get('price_trend', False):
+            row['price_trend'] = np.round(price_trend, 4)
+        if advanced.get('previous_hours_target', False):
+            for i in range(1, 6):
+                row[f'target-{i}'] = previous_targets[i - 1]
+        if cycles.get('monthly_cycle', False):
+            row['month_cycle'] = row['day']
+        if cycles.get('yearly_cycle', False):
+            row['yearly_cycle'] = row['datetime'].quarter
+        if aggregated.get('closing_moving_avg', False):
+            row['closing_moving_avg'] = np.round(np.float64(close_mean), 4)
+        if aggregated.get('cumulative_change_in_volume', False):
+            cumulative_volume = state.cumulative_volume if volume == volume else math.nan
+            row['cumulative_change_in_volume'] = np.round(np.float64(cumulative_volume), 4)
+
+        for feature in self.ma_features:
+            for window in self.fe_config['windows']:
+                row[f'{feature}_ma{window}'] = state.moving_avgs[(feature, window)].update(row[feature])
+
+        if 'time' in row:
+            row['hour_sin'], row['hour_cos'] = self.hour_encoding[int(row['time'])]
+
+        return row
+
+    def update(self, df_bar, news_tables=None):
+        """
+        Adds the newest hourly bar and news, and generates the newest row of the dataset.
+
+        Parameters:
+            df_bar (pandas.DataFrame): The new bar, a row of the 'tec_info' dataframe after the last bar.
+            news_tables (dict, optional): The new 'news', 'news_tickers' and 'news_topics' rows.
+
+        Returns:
+            pandas.DataFrame: The newest row of the dataset, as `run_gen_dataset(dfs).iloc[[-1]]`.
+
+        Raises:
+            ValueError: If the bar is not a single bar after the last one.
+        """
+        last_datetime = self.last_bar['datetime']
+        if len(df_bar) != 1 or pd.Timestamp(df_bar['datetime'].iloc[0]) <= last_datetime:
+            raise ValueError(f'A single bar after {last_datetime} was expected')
+        if news_tables is not None:
+            self._add_news(news_tables, last_datetime)
+        bar = self._prepare_bar(df_bar)
+        bar_datetime = bar['datetime']
+
+        # The rows of the batch path from the last bar to the new one
+        actions = self.config['global_date_time_actions']
+        last_day, bar_day = last_datetime.normalize(), bar_datetime.normalize()
+        rows = []
+        if bar_day > last_day:
+            if actions.get('fill_missing_hours', False):
+                rows += self._block(self.last_bar, pd.date_range(last_datetime + pd.Timedelta(hours=1),
+                                                                 last_day + pd.Timedelta(hours=23), freq='h'))
+            if actions.get('fill_missing_days', False):
+                rows += self._block(self.last_bar, pd.date_range(last_day + pd.Timedelta(days=1),
+                                                                 bar_day - pd.Timedelta(hours=1), freq='h'))
+            if actions.get('fill_missing_hours', False):
+                rows += self._block(bar, pd.date_range(bar_day, bar_datetime - pd.Timedelta(hours=1), freq='h'))
+        rows += self._block(bar, [bar_datetime])
+        if rows:
+            self.last_row = self._add_rows(rows)
+
+        self.last_bar = bar
+        self._drop_news(bar_datetime)
+
+        return self.latest_row()
+
+    def latest_row(self):
+        """
+        Generates the last row of the dataset: the last bar repeated up to 23 hours, computed on a copy of the
+        state, since the next bar replaces these rows.
+
+        Returns:
+            pandas.DataFrame: The newest row of the dataset, empty if there are no complete rows.
+        """
+        row = self.last_row
+        last_datetime = self.last_bar['datetime']
+        if self.config['global_date_time_actions'].get('fill_missing_hours', False) and last_datetime.hour < 23:
+            rows = self._block(self.last_bar, pd.date_range(last_datetime + pd.Timedelta(hours=1),
+                                                            last_datetime.normalize() + pd.Timedelta(hours=23),
+                                                            freq='h'))
+            if rows:
+                state = self.state
+                self.state = state.copy()
+                try:
+                    row = self._add_rows(rows)
+                finally:
+                    self.state = state
+
+        if row is None:
+            return self.features.copy()
+        return pd.DataFrame({column: pd.array([row[column]], dtype=dtype)
+                             for column, dtype in self.features.dtypes.items()})
@@ -1,33 +1,80 @@
 import requests
 import os
 import time
+import random
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from loader.rate_limiter import TokenBucket
+from loader.key_pool import KeyPool
+
+# HTTP status codes which are worth retrying: throttling and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Keys used by Alpha Vantage to report that the request was throttled instead of answered
+THROTTLE_KEYS = ('Note', 'Information')
 
 class ApiClient:
 
-    def __init__(self):
+    def __init__(self, cache=None, rate_limiter=None, max_retries=3, backoff_base=2.0, backoff_max=60.0, pool_size=10, timeout=30,
+                 key_pool=None):
         """
         Class representing a client to interact with the Alpha Vantage API. This class initializes
         with an API key fetched from environment variables and sets up the base URL for API requests.
         It also keeps track of the requests made during the session.
 
+        Requests are sent through a pooled `requests.Session`, so the TCP/TLS connections are kept alive
+        and reused between requests (and between the threads of the concurrent fetch mode).
+
+        Several API keys can be used through a `KeyPool`: every request is sent with the key with the most
+        remaining budget, and a key which reports throttling is taken out of the rotation for a while.
+
+        Parameters:
+            cache (ResponseCache, optional): On-disk cache of API responses. When provided, requests
+                found in the cache are served without using the network or the rate limit budget.
+            rate_limiter (TokenBucket | SqliteTokenBucket, optional): Rate limiter applied to every request.
+                Defaults to an in-process token bucket of 75 requests per minute.
+            max_retries (int): Number of times a failed or throttled request is retried. Defaults to 3.
+            backoff_base (float): Base delay in seconds of the exponential backoff. Defaults to 2.0.
+            backoff_max (float): Maximum delay in seconds between two attempts. Defaults to 60.0.
+            pool_size (int): Maximum number of connections kept alive in the pool. Defaults to 10.
+            timeout (float): Timeout in seconds of every request. Defaults to 30.
+            key_pool (KeyPool, optional): Pool of API keys, each with its own rate limiter. Defaults to a pool
+                with the 'ALPHAVKEY' key and the given rate limiter.
+
         Attributes:
             apiKey (str): The API key for authenticating requests, fetched from the environment.
             baseUrl (str): The base URL used for API queries.
-            requests_made (list): A list to track the requests made to the API.
+            rate_limiter (TokenBucket | SqliteTokenBucket): The rate limiter shared by every thread (and, with
+                the SQLite backend, every process) using the same API key.
+            cache (ResponseCache | None): The response cache used by `_get`, if any.
+            key_pool (KeyPool): The pool of API keys used to send the requests.
+            session (requests.Session): The pooled HTTP session used to send the requests.
         """
         self.apiKey = os.getenv('ALPHAVKEY')
         self.baseUrl = 'https://www.alphavantage.co/query'
-        self.requests_made = []
+        self.rate_limiter = rate_limiter or TokenBucket(75, 5)
+        self.key_pool = key_pool or KeyPool([self.apiKey], [self.rate_limiter])
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def _control_rate_limit(self):
         """
         Controls the rate limit for making requests in a system that limits to 75 requests per minute.
 
-        The method ensures that no more than 75 requests can be made in any given minute by monitoring
-        time data for past requests. If the limit is reached, it calculates the remaining wait time to
-        complete a minute since the earliest recorded request and pauses the process before allowing
-        further action.
+        Every request takes a token from the token bucket of the key chosen by the key pool, waiting until
+        one is available. The cost of the check is constant, and the bucket can be shared by several threads
+        or, with the SQLite backend, by several loader processes using the same API key.
+
+        Returns:
+            str | None: The API key to be used for the request, or None if the daily quota of every key of
+            the pool is spent.
 
         Raises
         ------
@@ -35,18 +82,39 @@ class ApiClient:
         to sleep due to threading or OS-level interruptions may lead to unintended behaviors.
 
         """
-        current_time = time.time()
-        # Keeps only requests from the last minute
-        self.requests_made = [t for t in self.requests_made if current_time - t < 60]
-
-        if len(self.requests_made) >= 75:  #If we have made 75 requests in the last minute
+        api_key, wait_time = self.key_pool.acquire()
+        if wait_time >= 5:
             time_stamp = datetime.now()
-            sleep_time = 60 - (current_time - self.requests_made[0])  #Calculate the remaining time to complete the minute
-            print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Limit of 75 requests per minute reached. Waiting time"
-                  f" {sleep_time:.2f} seconds.")
-            time.sleep(sleep_time)  # Pause until we can make more requests
+            print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Limit of {self.key_pool.requests_per_minute} "
+                  f"requests per minute reached. Waited {wait_time:.2f} seconds.")
+
+        return api_key
 
-        self.requests_made.append(current_time)  # Adding timestamp to the new request
+    def _backoff(self, attempt):
+        """
+        Waits before retrying a request. The delay grows exponentially with the number of attempts, up to
+        `backoff_max`, and a random jitter is applied so concurrent workers do not retry at the same time.
+
+        Parameters:
+            attempt (int): Number of the attempt which has just failed, starting at 0.
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        time.sleep(random.uniform(delay / 2, delay))
+
+    @staticmethod
+    def _is_throttled(data):
+        """
+        Checks whether an API response is a throttle message instead of data. Alpha Vantage answers with
+        HTTP 200 and a payload containing only a "Note" or "Information" key when the call frequency or
+        the daily quota is exceeded.
+
+        Parameters:
+            data (dict): The JSON-parsed response.
+
+        Returns:
+            bool: True if the response reports throttling.
+        """
+        return isinstance(data, dict) and any(key in data for key in THROTTLE_KEYS)
 
     def _get(self, params):
         """
@@ -59,6 +127,13 @@ class ApiClient:
         data. If an error is detected in the API response, or the response lacks
         data, the method logs the issue and returns a None value.
 
+        Network failures, retryable HTTP status codes and throttle payloads ("Note" or "Information")
+        are retried up to `max_retries` times with exponential backoff and jitter. Every attempt goes
+        through the rate control, so the retries never exceed the rate budget.
+
+        When a response cache is configured, the request is looked up in it first and valid responses
+        are stored in it, so cached requests neither reach the network nor consume rate limit budget.
+
         Parameters:
             params (dict): A dictionary of query parameters to be sent with the API
             request.
@@ -67,21 +142,52 @@ class ApiClient:
             dict | None: A dictionary containing the JSON-parsed data of the response
             if successful, or None in case of an error or invalid response.
         """
-        self._control_rate_limit()  # Check the rate limit before making the request
-        params['apikey'] = self.apiKey
-        try:
-            response = requests.get(self.baseUrl, params=params)
-            response.raise_for_status()
-            data = response.json()
-            if not data or "Error" in data:
+        if self.cache is not None:
+            data = self.cache.get(params)
+            if data is not None:
+                return data
+
+        for attempt in range(self.max_retries + 1):
+            api_key = self._control_rate_limit()  # Check the rate limit before making the request
+            if api_key is None and self.key_pool.exhausted():
                 time_stamp = datetime.now()
-                print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Error in API response: {data}")
+                print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Daily quota of every API key spent: {params}")
                 return None
-            return data
-        except requests.exceptions.RequestException as e:
-            time_stamp = datetime.now()
-            print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Request failed: {e}")
-            return None
+            request_params = dict(params, apikey=api_key)
+            try:
+                response = self.session.get(self.baseUrl, params=request_params, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                time_stamp = datetime.now()
+                status_code = e.response.status_code if e.response is not None else None
+                if status_code is not None and status_code not in RETRY_STATUS_CODES:
+                    print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Request failed: {e}")
+                    return None
+                print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Request failed (attempt {attempt + 1}/"
+                      f"{self.max_retries + 1}): {e}")
+            else:
+                if self._is_throttled(data):
+                    self.key_pool.report_throttled(api_key)
+                    time_stamp = datetime.now()
+                    print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: API throttled the request (attempt "
+                          f"{attempt + 1}/{self.max_retries + 1}): {data}")
+                elif not data or any(key.startswith('Error') for key in data):
+                    time_stamp = datetime.now()
+                    print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Error in API response: {data}")
+                    return None
+                else:
+                    if self.cache is not None:
+                        self.cache.put(params, data)
+                    return data
+
+            if attempt < self.max_retries:
+                self._backoff(attempt)
+
+        time_stamp = datetime.now()
+        print(f"{time_stamp.strftime('%Y-%m-%d %H:%M:%S')} :: Request abandoned after {self.max_retries + 1} attempts: "
+              f"{params}")
+        return None
 
     def get_data(self, function, symbol, **kwargs):
         """
@@ -0,0 +1,132 @@
+import pandas as pd
+from collections import Counter
+from datetime import datetime
+from loader.data_loader import FetchTask
+from utils.utils import get_time_now
+
+# Columns identifying the series of every dataset in the stored history. A slice of a series is one month of it,
+# which is exactly what a single API request returns.
+SERIES_COLUMNS = {
+    'ticker': ['ticker'],
+    'macd': ['ticker'],
+    'sma': ['ticker', 'period'],
+    'rsi': ['ticker', 'period'],
+    'news': ['topic']
+}
+
+def normalize_month(month):
+    """
+    Normalizes a month identifier to the 'YYYY-MM' format, as `generate_current_month` does not zero-pad it.
+
+    Parameters:
+        month (str): The month in 'YYYY-MM' or 'YYYY-M' format.
+
+    Returns:
+        str: The month in 'YYYY-MM' format.
+    """
+    year, month_number = str(month).split('-')[:2]
+    return f'{int(year)}-{int(month_number):02d}'
+
+def series_key(dataset, values):
+    """
+    Builds the key of a series from the values of its `SERIES_COLUMNS`, casting the periods to int so the keys
+    read from the CSV history match the ones of the configuration.
+    """
+    if dataset in ('sma', 'rsi'):
+        return values[0], int(values[1])
+    return values[0],
+
+def closed_slices(df, dataset):
+    """
+    Finds the months of every series of a dataset which are already complete in the stored history.
+
+    A month with data is complete when the series also has data for a later month: the loader always requests
+    the current month, so a month which was fetched while it was still open is requested again until a run
+    happens after it closes. The last month of every series is therefore never considered complete.
+
+    Parameters:
+        df (pandas.DataFrame): The stored history of the dataset.
+        dataset (str): The name of the dataset, one of the keys of `SERIES_COLUMNS`.
+
+    Returns:
+        dict: A dictionary mapping the key of every series to the set of its complete months ('YYYY-MM').
+    """
+    columns = SERIES_COLUMNS[dataset]
+    if df.empty or not set(columns + ['datetime']).issubset(df.columns):
+        return {}
+
+    df_months = df[columns].copy()
+    df_months['month'] = pd.to_datetime(df['datetime'], errors='coerce').dt.strftime('%Y-%m')
+    df_months = df_months.dropna().drop_duplicates()
+
+    slices = {}
+    for values, months in df_months.groupby(columns, sort=False, observed=True)['month']:
+        values = values if isinstance(values, tuple) else (values,)
+        last_month = months.max()
+        slices[series_key(dataset, values)] = {month for month in months if month < last_month}
+
+    return slices
+
+def plan_backfill(h_dfs, symbols, months, periods, topics, indicator_source='api', current_month=None):
+    """
+    Works out the minimal list of requests needed to complete the stored history for the given configuration.
+
+    Every (dataset, symbol, period, month) slice and every (topic, month) news slice of the configuration is
+    requested only if it is missing from the history, or if it is still open: the current month, or a month
+    which was stored before it closed. Adding a new symbol or a new period therefore only requests the slices
+    of that symbol or period.
+
+    Parameters:
+        h_dfs (dict): The stored history, with the 'ticker', 'macd', 'sma', 'rsi' and 'news' datasets. Missing
+            or empty datasets are planned from scratch.
+        symbols (list[str]): The symbols of the configuration.
+        months (list[str]): The months to be covered, e.g. `generate_month_list(historical_year)`.
+        periods (dict): A dictionary with the 'sma' and 'rsi' keys, each pointing to its list of periods.
+        topics (list[str]): The news topics of the configuration.
+        indicator_source (str): 'api' to plan the technical indicators, or 'local' to plan only the intraday
+            series, as the indicators are computed from it. Defaults to 'api'.
+        current_month (str, optional): The month considered open. Defaults to the current month.
+
+    Returns:
+        list[FetchTask]: The planned requests, in the same order as `build_fetch_tasks` followed by the news.
+    """
+    current_month = current_month or datetime.now().strftime('%Y-%m')
+    months = [normalize_month(month) for month in months]
+    closed = {dataset: closed_slices(h_dfs.get(dataset, pd.DataFrame()), dataset) for dataset in SERIES_COLUMNS}
+
+    def is_missing(dataset, key, month):
+        return month >= current_month or month not in closed[dataset].get(key, ())
+
+    tasks = []
+    for symbol in symbols:
+        for month in months:
+            if is_missing('ticker', (symbol,), month):
+                tasks.append(FetchTask('ticker', symbol, month, None))
+            if indicator_source == 'local':
+                continue
+            if is_missing('macd', (symbol,), month):
+                tasks.append(FetchTask('macd', symbol, month, None))
+            for dataset in ['sma', 'rsi']:
+                for period in periods[dataset]:
+                    if is_missing(dataset, (symbol, int(period)), month):
+                        tasks.append(FetchTask(dataset, symbol, month, period))
+
+    for month in months:
+        for topic in topics:
+            if is_missing('news', (topic,), month):
+                tasks.append(FetchTask('news', None, month, None, topic))
+
+    return tasks
+
+def report_plan(tasks, total_slices):
+    """
+    Prints the size of a backfill plan, with the number of requests of every dataset.
+
+    Parameters:
+        tasks (list[FetchTask]): The planned requests.
+        total_slices (int): The number of slices of the configuration, i.e. the size of a full download.
+    """
+    counts = Counter(task.dataset for task in tasks)
+    detail = ', '.join(f'{dataset}: {count}' for dataset, count in counts.items())
+    print(f'{get_time_now()} :: Backfill planner: {len(tasks)} of {total_slices} requests needed'
+          f'{f" ({detail})" if detail else ""}')
@@ -1,7 +1,39 @@
 import pandas as pd
 import utils.utils as ut
+import utils.storage as storage
 import loader.data_transform as transformer
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.utils import get_time_now
+from loader.frame_accumulator import FrameAccumulator
+from loader.dataset_registry import DatasetRegistry
+from utils.schema import apply_schema
+
+# A single API request of the loader: one dataset ('ticker', 'macd', 'sma', 'rsi' or 'news') for one symbol
+# and month. `period` is only used by the 'sma' and 'rsi' datasets, and `topic` by the 'news' dataset, which
+# has no symbol.
+FetchTask = namedtuple('FetchTask', ['dataset', 'symbol', 'month', 'period', 'topic'], defaults=(None,))
+
+# Columns used to drop duplicated records for every dataset fetched through a FetchTask
+TASK_SUBSET_COLUMNS = {
+    'ticker': ['ticker', 'datetime'],
+    'macd': ['ticker', 'datetime'],
+    'sma': ['ticker', 'datetime', 'period'],
+    'rsi': ['ticker', 'datetime', 'period'],
+    'news': ['article_id', 'topic'],
+    'news_tickers': ['article_id', 'ticker'],
+    'news_topics': ['article_id', 'affected_topic']
+}
+
+# Tables produced by the datasets which are not stored in a single table named after them
+TASK_TABLES = {
+    'news': list(transformer.NEWS_TABLE_COLUMNS)
+}
+
+# Format of the 'time_from' and 'time_to' parameters of the NEWS_SENTIMENT endpoint
+NEWS_TIME_FORMAT = '%Y%m%dT%H%M'
 
 def combine_dataframes(df_historical, df_current, f_dataframes, combine_configuration):
     """
@@ -28,12 +60,39 @@ def combine_dataframes(df_historical, df_current, f_dataframes, combine_configur
 
     # Merge remaining datasets
     for key in all_keys:
-        df_combined = pd.concat([df_historical[key], df_current[key]]).drop_duplicates(subset=combine_configuration[key],
-                                                                                       keep='last')
-        f_dataframes[key] = df_combined.sort_values(by='datetime', ascending=True)
+        df_combined = pd.concat([df_historical[key], df_current[key]])
+        if df_combined.empty:
+            f_dataframes[key] = df_combined
+            continue
+        df_combined = df_combined.drop_duplicates(subset=combine_configuration[key], keep='last')
+        # The ticker and topic tables of the news have no time, their articles are sorted in 'news'
+        if 'datetime' in df_combined.columns:
+            df_combined = df_combined.sort_values(by='datetime', ascending=True)
+        # The categories of the history and of the new rows differ, so the concatenation is cast back
+        f_dataframes[key] = apply_schema(df_combined, key)
 
     return f_dataframes
 
+def upsert_dataframes(df_current, f_dataframes, backend):
+    """
+    Counterpart of `combine_dataframes` for the SQLite storage: only the new rows are written, upserted on the
+    'combine_configuration' keys of every table, and the combined datasets are read back from the database,
+    sorted by datetime, instead of concatenating, de-duplicating and sorting the whole history in memory.
+
+    Parameters:
+        df_current (dict): Dictionary containing current dataframes for different datasets.
+        f_dataframes (dict): Dictionary where the combined dataframes will be stored.
+        backend (SqliteBackend): The storage backend.
+
+    Returns:
+        dict: The updated f_dataframes dictionary with the combined datasets.
+    """
+    for key, df in df_current.items():
+        if not df.empty:
+            storage.write_dataset(df, key, backend)
+
+    return retrieve_data(f_dataframes, backend)
+
 def combine_data(df_historical, df_current, subset_columns):
     """
     Combine historical and current data, ensuring no duplicate records based on specified columns.
@@ -70,7 +129,171 @@ def combine_data(df_historical, df_current, subset_columns):
 
     return df_combined
 
-def load_data(dfs, client, symbols, months, periods):
+def build_fetch_tasks(symbols, months, periods, indicator_source='api'):
+    """
+    Builds the list of API requests needed to load the technical datasets for the given symbols and months.
+
+    The tasks are returned in the same order in which `load_data` has always issued its requests: for every
+    symbol and month, the intraday series first, then MACD, then every SMA period and finally every RSI period.
+
+    Args:
+        symbols (list[str]): A list of stock or asset symbols for which data will be fetched.
+        months (list[str]): A list of month identifiers (e.g., '2023-01') defining the timeframes of required data.
+        periods (dict): A dictionary with the 'sma' and 'rsi' keys, each pointing to its list of periods.
+        indicator_source (str): 'api' to request the technical indicators, or 'local' to request only the
+            intraday series, as the indicators are computed from it. Defaults to 'api'.
+
+    Returns:
+        list[FetchTask]: The ordered list of tasks to be fetched.
+    """
+    tasks = []
+    for symbol in symbols:
+        for month in months:
+            tasks.append(FetchTask('ticker', symbol, month, None))
+            if indicator_source == 'local':
+                continue
+            tasks.append(FetchTask('macd', symbol, month, None))
+            for period in periods['sma']:
+                tasks.append(FetchTask('sma', symbol, month, period))
+            for period in periods['rsi']:
+                tasks.append(FetchTask('rsi', symbol, month, period))
+
+    return tasks
+
+def fetch_task(client, task, news_limit=1000, news_bisect=True):
+    """
+    Executes the API request described by a FetchTask using the corresponding client method. News tasks are
+    fetched with `fetch_news`, so the saturated months are split in smaller windows.
+
+    Args:
+        client: An object responsible for fetching raw JSON data for financial symbols from an external source.
+        task (FetchTask): The request to be executed.
+        news_limit (int): The maximum number of items per news response. Defaults to 1000, the API maximum.
+        news_bisect (bool): Whether the saturated news windows are split. Defaults to True.
+
+    Returns:
+        dict | None: The JSON data returned by the client, or None if the request failed.
+
+    Raises:
+        ValueError: If the dataset of the task is not supported.
+    """
+    if task.dataset == 'ticker':
+        return client.get_intraday_data(task.symbol, task.month)
+    if task.dataset == 'macd':
+        return client.get_macd(task.symbol, task.month)
+    if task.dataset == 'sma':
+        return client.get_sma(task.symbol, task.month, task.period)
+    if task.dataset == 'rsi':
+        return client.get_rsi(task.symbol, task.month, task.period)
+    if task.dataset == 'news':
+        time_from, time_to = ut.get_time_range(task.month)
+        return fetch_news(client, task.topic, time_from, time_to, news_limit, news_bisect)
+
+    raise ValueError(f'Unsupported fetch task dataset: {task.dataset}')
+
+def fetch_news(client, topic, time_from, time_to, limit=1000, bisect=True):
+    """
+    Fetches the news feed of a topic for a time window, splitting the window when the response is saturated.
+
+    The NEWS_SENTIMENT endpoint returns at most `limit` items, so a response with `limit` items may be
+    truncated. In that case the window is split into two halves, which are fetched recursively until every
+    sub-window is under the limit (or is one minute long). Windows under the limit cost a single request, so
+    quiet months are not over-fetched. The items of all the responses are merged and de-duplicated.
+
+    Args:
+        client: An instance of a client class with a `get_news_sentiment` method.
+        topic (str): The news topic.
+        time_from (str): The start of the window, in 'YYYYMMDDTHHMM' format.
+        time_to (str): The end of the window (inclusive), in 'YYYYMMDDTHHMM' format.
+        limit (int): The maximum number of items per response. Defaults to 1000, the API maximum.
+        bisect (bool): Whether saturated windows are split. Defaults to True.
+
+    Returns:
+        list | None: The feed items of the window, or None if the request failed.
+    """
+    feed = client.get_news_sentiment(topic, time_from, time_to, limit=limit)
+    if not bisect or feed is None or len(feed) < limit:
+        return feed
+
+    start = datetime.strptime(time_from, NEWS_TIME_FORMAT)
+    end = datetime.strptime(time_to, NEWS_TIME_FORMAT)
+    if end - start < timedelta(minutes=1):
+        print(f'{get_time_now()} :: Getting news: {topic} is still saturated between {time_from} and {time_to}')
+        return feed
+
+    middle = (start + (end - start) / 2).replace(second=0, microsecond=0)
+    first_half = fetch_news(client, topic, time_from, middle.strftime(NEWS_TIME_FORMAT), limit)
+    second_half = fetch_news(client, topic, (middle + timedelta(minutes=1)).strftime(NEWS_TIME_FORMAT), time_to,
+                             limit)
+
+    # The saturated response is kept too, in case any of the halves failed
+    return deduplicate_feed((first_half or []) + (second_half or []) + feed)
+
+def deduplicate_feed(feed):
+    """
+    Removes the repeated items of a news feed, identified by their URL (or their title and publication time
+    when the URL is missing), keeping the first occurrence.
+
+    Args:
+        feed (list[dict]): The feed items.
+
+    Returns:
+        list[dict]: The feed items without duplicates.
+    """
+    seen = set()
+    unique = []
+    for item in feed:
+        key = item.get('url') or (item.get('title'), item.get('time_published'))
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+
+    return unique
+
+def transform_task_result(task, json_data):
+    """
+    Transforms the JSON response of a FetchTask with the transformer of its dataset.
+
+    Args:
+        task (FetchTask): The request which produced the response.
+        json_data (dict | list): The response returned by the client.
+
+    Returns:
+        dict[str, pandas.DataFrame]: The transformed response by table: a single table named after the dataset,
+        or the normalized 'news', 'news_tickers' and 'news_topics' tables of a news response.
+    """
+    if task.dataset == 'ticker':
+        return {'ticker': transformer.transform_intraday(task.symbol, json_data)}
+    if task.dataset == 'macd':
+        return {'macd': transformer.transform_macd(task.symbol, json_data)}
+    if task.dataset == 'sma':
+        return {'sma': transformer.transform_sma(task.symbol, json_data, task.period)}
+    if task.dataset == 'news':
+        return transformer.transform_news_data(json_data, task.topic)
+
+    return {'rsi': transformer.transform_rsi(task.symbol, json_data, task.period)}
+
+def store_task_result(store, task, json_data):
+    """
+    Transforms the JSON response of a FetchTask and appends it straight to the partitioned store, instead of
+    combining it into an in-memory dataframe. The ticker and topic tables of the news have no time, so they are
+    stored in the partition of the topic and month of the request.
+
+    Args:
+        store (PartitionedStore): The on-disk store of the datasets.
+        task (FetchTask): The request which produced the response.
+        json_data (dict | None): The response returned by the client. Empty responses are ignored.
+    """
+    if not json_data:
+        return
+
+    for table, df_task in transform_task_result(task, json_data).items():
+        partition = None
+        if 'datetime' not in df_task.columns:
+            partition = (task.topic, datetime.strptime(task.month, '%Y-%m').strftime('%Y-%m'))
+        store.append(table, df_task, TASK_SUBSET_COLUMNS[table], partition)
+
+def load_data(dfs, client, symbols, months, periods, indicator_source='api'):
     """
     Fetches and processes financial data for specified symbols and timeframes. The function retrieves
     ticker, MACD, SMA, and RSI indicators for the provided symbols and for multiple specified periods
@@ -86,6 +309,8 @@ def load_data(dfs, client, symbols, months, periods):
         timeframes of required data.
         periods (dict): A dictionary specifying multiple periods for which SMA and RSI need to be calculated.
         Keys include 'sma' and 'rsi', each pointing to their respective lists of periods.
+        indicator_source (str): 'api' to fetch the indicators, or 'local' to fetch only the intraday series
+        and compute the indicators afterward with `loader.indicators`. Defaults to 'api'.
 
     Returns:
         dict: A dictionary containing updated DataFrames for each calculated indicator.
@@ -93,36 +318,139 @@ def load_data(dfs, client, symbols, months, periods):
     Raises:
         None
     """
-    for symbol in symbols:
-        for month in months:
-            # Fetch and transform ticker data
-            json_data_ticker = client.get_intraday_data(symbol, month)
-            if json_data_ticker:
-                h_ticker = transformer.transform_intraday(symbol, json_data_ticker)
-                dfs['ticker'] = combine_data(dfs['ticker'], h_ticker, subset_columns=['ticker', 'datetime'])
+    return load_tasks(dfs, client, build_fetch_tasks(symbols, months, periods, indicator_source))
 
-            json_data_macd = client.get_macd(symbol, month)
-            if json_data_macd:
-                h_macd = transformer.transform_macd(symbol, json_data_macd)
-                dfs['macd'] = combine_data(dfs['macd'], h_macd, subset_columns=['ticker', 'datetime'])
+def load_data_concurrent(dfs, client, symbols, months, periods, max_workers=8, indicator_source='api'):
+    """
+    Concurrent version of `load_data`. The requests are executed by a bounded pool of threads, so several
+    of them are in flight at the same time and the total time is bounded by the client rate limit instead
+    of by the sum of the round-trip latencies.
 
-            for period in periods['sma']:
-                json_data_sma = client.get_sma(symbol, month, period)
-                if json_data_sma:
-                    h_sma = transformer.transform_sma(symbol, json_data_sma, period)
-                    dfs['sma'] = combine_data(dfs['sma'], h_sma, subset_columns=['ticker', 'datetime', 'period'])
+    The client is shared by every worker, and its rate control is applied to all of them. The responses are
+    transformed and combined in the main thread and in the same order as `load_data`, so both functions
+    return the same DataFrames.
 
-            for period in periods['rsi']:
-                json_data_rsi = client.get_rsi(symbol, month, period)
-                if json_data_rsi:
-                    h_rsi = transformer.transform_rsi(symbol, json_data_rsi, period)
-                    dfs['rsi'] = combine_data(dfs['rsi'], h_rsi, subset_columns=['ticker', 'datetime', 'period'])
+    Arguments:
+        dfs (dict): A dictionary where the processed DataFrames (e.g., 'ticker', 'macd', 'sma', 'rsi')
+        are stored and updated.
+        client: An object responsible for fetching raw JSON data for financial symbols from an external
+        source. It must be safe to use from several threads.
+        symbols (list[str]): A list of stock or asset symbols for which data will be fetched and processed.
+        months (list[str]): A list of month identifiers defining the timeframes of required data.
+        periods (dict): A dictionary specifying the 'sma' and 'rsi' periods to be fetched.
+        max_workers (int): Maximum number of requests in flight. Defaults to 8.
+        indicator_source (str): 'api' to fetch the indicators, or 'local' to fetch only the intraday series.
+        Defaults to 'api'.
 
-    return dfs
+    Returns:
+        dict: A dictionary containing updated DataFrames for each calculated indicator.
+    """
+    tasks = build_fetch_tasks(symbols, months, periods, indicator_source)
 
-def load_economics(dfs, client, indicators):
+    return load_tasks(dfs, client, tasks, max_workers)
+
+def fetch_and_record(client, task, queue, fetch=fetch_task):
     """
-    Load economic data for specified indicators, transform it, and store it as CSV files.
+    Executes a FetchTask and commits its response to the work queue as soon as it arrives, or marks the task
+    as failed when the client returns no data.
+
+    Args:
+        client: An object responsible for fetching raw JSON data from an external source.
+        task (FetchTask): The request to be executed.
+        queue (WorkQueue): The persistent queue of the run.
+        fetch (callable): The function executing the task. Defaults to `fetch_task`.
+
+    Returns:
+        dict | list | None: The JSON data returned by the client.
+    """
+    json_data = fetch(client, task)
+    if json_data:
+        queue.mark_done(task, json_data)
+    else:
+        queue.mark_failed(task)
+
+    return json_data
+
+def load_tasks(dfs, client, tasks, max_workers=1, queue=None, store=None, fetch=fetch_task):
+    """
+    Executes a list of FetchTasks, such as a backfill plan, and combines their responses into the dataframes.
+    With more than one worker the requests are executed by a bounded pool of threads; the responses are always
+    transformed in the main thread, and combined in the order of the list with a single concatenation and
+    de-duplication per dataset at the end.
+
+    When a work queue is given, the tasks are enqueued first and every response is committed to it as it
+    arrives. The tasks already done by an interrupted run are not requested again: their stored responses
+    are combined instead.
+
+    When a partitioned store is given, the responses are streamed to it instead: every transformed slice is
+    appended to its partitions as soon as it arrives and then released, so the memory used does not grow with
+    the number of symbols and months, and `dfs` is returned unchanged.
+
+    Arguments:
+        dfs (dict): A dictionary where the processed DataFrames of every dataset in the tasks are stored.
+        client: An object responsible for fetching raw JSON data from an external source. It must be safe to
+        use from several threads when `max_workers` is greater than one.
+        tasks (list[FetchTask]): The requests to be executed.
+        max_workers (int): Maximum number of requests in flight. Defaults to 1 (sequential).
+        queue (WorkQueue, optional): Persistent queue used to resume an interrupted run.
+        store (PartitionedStore, optional): On-disk store where the responses are streamed.
+        fetch (callable): The function executing every task, called with the client and the task. Defaults to
+        `fetch_task`, whose news settings can be bound with `functools.partial`.
+
+    Returns:
+        dict: A dictionary containing updated DataFrames for each dataset of the tasks.
+    """
+    pending = set(tasks)
+    if queue is not None:
+        queue.enqueue(tasks)
+        pending = set(queue.pending(tasks))
+        fetch = partial(fetch_and_record, queue=queue, fetch=fetch)
+        if len(pending) < len(set(tasks)):
+            print(f'{get_time_now()} :: Loader: Resuming, {len(set(tasks)) - len(pending)} of {len(set(tasks))} '
+                  f'requests already done')
+
+    accumulator = FrameAccumulator(dfs, TASK_SUBSET_COLUMNS)
+
+    def apply(task, json_data):
+        if store is not None:
+            store_task_result(store, task, json_data)
+        elif json_data:
+            accumulator.add_tables(transform_task_result(task, json_data))
+
+    if max_workers <= 1:
+        for task in tasks:
+            json_data = fetch(client, task) if task in pending else queue.response(task)
+            apply(task, json_data)
+        return accumulator.combine()
+
+    print(f'{get_time_now()} :: Loader: Fetching {len(pending)} requests with {max_workers} workers')
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {task: executor.submit(fetch, client, task) for task in tasks if task in pending}
+        try:
+            if store is None:
+                for task in tasks:
+                    json_data = futures[task].result() if task in futures else queue.response(task)
+                    apply(task, json_data)
+            else:
+                # The order does not matter for the store, so every slice is written and released as it arrives
+                for task in tasks:
+                    if task not in futures:
+                        apply(task, queue.response(task))
+                tasks_by_future = {future: task for task, future in futures.items()}
+                futures.clear()
+                for future in as_completed(list(tasks_by_future)):
+                    apply(tasks_by_future.pop(future), future.result())
+        except BaseException:
+            # Do not keep fetching the queued requests after an interruption
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    return accumulator.combine()
+
+def load_economics(dfs, client, indicators, backend=None):
+    """
+    Load economic data for specified indicators, transform it, and store it as CSV (or columnar) files.
 
     This function retrieves economic data for the provided list of indicators from a given
     client. It processes the data by transforming it into a structured format, saves the
@@ -133,6 +461,7 @@ def load_economics(dfs, client, indicators):
         dfs (dict): A dictionary to store DataFrame objects corresponding to each indicator.
         client: The data source client used to fetch economic indicator data.
         indicators (list): A list of economic indicators to retrieve.
+        backend (optional): The storage backend of the saved files. Defaults to CSV.
 
     Returns:
         dict: An updated dictionary containing transformed DataFrame objects for each
@@ -143,86 +472,85 @@ def load_economics(dfs, client, indicators):
         json_data = client.get_economic_indicator(indicator)
         if json_data:
             df_economic = transformer.transform_economic_data(json_data)
-            ut.write_csv(df_economic, f'data/df_{indicator}.csv')
+            storage.write_dataset(df_economic, indicator, backend)
             dfs[indicator] = df_economic
             print(f'{get_time_now()} :: Getting data: {{\'function\': {indicator}}} saved successfully!')
         else:
             print(f'{get_time_now()} :: Getting data: Error fetching data for {indicator}')
     return dfs
 
-def load_news(dfs, client, months, topics):
+def load_news(dfs, client, months, topics, limit=1000, bisect=True):
     """
     Loads and processes news sentiment data for specified topics and time ranges, updating the provided dataframe. This
     function iterates over months and topics, retrieves news sentiment data using the provided client, and processes it
     using a transformer. It then combines the processed data with existing news data in the dataframe.
 
     Args:
-        dfs (dict of pandas.DataFrame): A dictionary containing dataframes to be updated. The key 'news' within
-                                      the dictionary is used to store combined news data after retrieval and processing.
+        dfs (dict of pandas.DataFrame): A dictionary containing dataframes to be updated. The keys 'news',
+                                      'news_tickers' and 'news_topics' within the dictionary are used to store the
+                                      normalized news tables after retrieval and processing.
         client: An instance of a client class capable of retrieving news sentiment data. Must have a method
                 `get_news_sentiment` that accepts arguments for topic, start time, and end time.
         months (list of str): A list containing month identifiers for which news data should be retrieved. Each
                               month represents a range of time.
         topics (list of str): A list of topics for which news sentiment data is required.
+        limit (int): The maximum number of items per response. Defaults to 1000.
+        bisect (bool): Whether the saturated months are split in smaller windows with `fetch_news`, instead of
+                       keeping the truncated response. Defaults to True.
 
     Returns:
         dict of pandas.DataFrame: The modified dictionary containing dataframes with updated news data, including
-                                  combined and processed news information under the 'news' key.
+                                  combined and processed news tables.
 
     Raises:
         This function does not explicitly raise exceptions but relies on the behavior of the client and data transformation
         functions it calls within.
     """
+    accumulator = FrameAccumulator(dfs, TASK_SUBSET_COLUMNS)
     for month in months:
         for topic in topics:
             time_from, time_to = ut.get_time_range(month)
-            json_data = client.get_news_sentiment(topic, time_from, time_to)
+            json_data = fetch_news(client, topic, time_from, time_to, limit, bisect)
             if json_data is not None:
-                h_news = transformer.transform_news_data(json_data, topic)
-                dfs['news'] = combine_data(dfs['news'], h_news, subset_columns=['title', 'datetime', 'ticker',
-                                                                                'affected_topic'])
+                accumulator.add_tables(transformer.transform_news_data(json_data, topic))
 
-    return dfs
+    return accumulator.combine()
 
-def transform_indicators(dfs, period, tech_indicator):
+def pivot_indicator(df, tech_indicator, periods):
     """
-    Transforms technical indicators for a specified period.
-
-    This function isolates and renames the specified technical indicator for
-    a given period from the input data, creating a transformed DataFrame
-    that includes only the ticker, datetime, and renamed indicator column.
+    Pivots a long indicator dataset, with one row per ticker, datetime and period, to a wide one, with one
+    column per period, in a single operation instead of one filter and copy per period.
 
     Args:
-        dfs: DataFrame
-            The input DataFrame containing technical indicator data. It must
-            include the specified technical indicator, period column, ticker,
-            and datetime columns.
-        period: int
-            The period to filter the technical indicator on. Rows matching this
-            period in the DataFrame will be extracted.
-        tech_indicator: str
-            The name of the technical indicator to transform. This column's
-            values will be renamed based on the period.
+        df (pandas.DataFrame): The 'sma' or 'rsi' dataset, with 'ticker', 'datetime', 'period' and indicator
+            columns.
+        tech_indicator (str): The name of the indicator column.
+        periods (list[int]): The periods to be kept.
 
     Returns:
-        DataFrame
-            A transformed DataFrame with the following columns:
-            - ticker
-            - datetime
-            - technical indicator renamed to reflect the specified period
-
+        pandas.DataFrame: The indicator values indexed by (ticker, datetime), with a '<indicator>_<period>'
+        column for every period.
     """
-    df_transformed = dfs[tech_indicator][dfs[tech_indicator]['period'] == period][['ticker', 'datetime', tech_indicator]].copy()
-    df_transformed.rename(columns={tech_indicator: f'{tech_indicator}_{period}'}, inplace=True)
-    return df_transformed
+    columns = [f'{tech_indicator}_{period}' for period in periods]
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_arrays([[], []], names=['ticker', 'datetime']))
+
+    df = df[df['period'].isin(periods)].drop_duplicates(subset=['ticker', 'datetime', 'period'], keep='last')
+    df_wide = df.pivot(index=['ticker', 'datetime'], columns='period', values=tech_indicator)
+    df_wide = df_wide.reindex(columns=periods)
+    df_wide.columns = columns
+
+    return df_wide
 
 def merge_datasets(dfs, periods, tec_columns, economic_columns):
     """
     Merges multiple datasets into a single dataset by combining various technical and economic indicator data.
 
-    This function transforms selected indicators for different periods, merges datasets based on technical indicators
-    and their columns, and integrates economic indicators into a comprehensive dataset for analysis. The final dataset
-    is prepared for further processing or analysis.
+    The long 'sma' and 'rsi' datasets are pivoted to one column per period, every technical dataset is aligned
+    on a shared sorted (ticker, datetime) index and joined to the ticker dataset at once, and the economic
+    series are mapped through a small 'year_month' lookup table. The time and memory therefore grow with the
+    size of the merged dataset instead of with the number of merges. The per-period datasets (e.g. 'sma_5')
+    are still stored in the dictionary.
 
     Parameters:
         dfs (dict): A dictionary containing datasets with keys representing dataset names and values as DataFrames.
@@ -235,72 +563,98 @@ def merge_datasets(dfs, periods, tec_columns, economic_columns):
     Returns:
         dict: The modified dictionary of DataFrames containing the merged dataset under the key `'merged_tec_info'`.
     """
-    # Step 1: Transform RSI and SMA
-    for key in periods.keys():
-        for period in periods[key]:
-            dfs[f'{key}_{period}'] = transform_indicators(dfs, period, key)
-
-    # Step 2: Merge technical indicator datasets with the ticker dataset
-    dfs['merged_tec_info'] = dfs['ticker']
+    # Step 1: Pivot RSI and SMA, one column per period
+    wide = {}
+    for key, key_periods in periods.items():
+        df_wide = pivot_indicator(dfs[key], key, key_periods)
+        for column in df_wide.columns:
+            wide[column] = df_wide[column]
+            dfs[column] = df_wide[column].dropna().reset_index()
+
+    # Step 2: Align the technical indicator datasets on (ticker, datetime) and join them to the ticker dataset
+    aligned = []
     for key, cols in tec_columns.items():
-        dfs['merged_tec_info'] = pd.merge(dfs['merged_tec_info'], dfs[key][cols], on=['ticker', 'datetime'], how='left')
+        value_columns = [column for column in cols if column not in ('ticker', 'datetime')]
+        if all(column in wide for column in value_columns):
+            aligned.extend(wide[column] for column in value_columns)
+        else:
+            df_key = dfs[key].drop_duplicates(subset=['ticker', 'datetime'], keep='last')
+            aligned.append(df_key.set_index(['ticker', 'datetime'])[value_columns])
+    df_tec = pd.concat(aligned, axis=1).sort_index()
+    df_merged = dfs['ticker'].join(df_tec, on=['ticker', 'datetime'])
+
+    # Step 3: Map the economic indicators through a 'year_month' lookup table
+    lookup = [dfs[key].drop_duplicates(subset='year_month', keep='last').set_index('year_month')['value'].rename(
+        col_name) for key, col_name in economic_columns.items()]
+    if lookup:
+        df_merged = df_merged.join(pd.concat(lookup, axis=1), on='year_month')
 
-    # Merge economic indicators
-    for key, col_name in economic_columns.items():
-        dfs['merged_tec_info'] = pd.merge(
-            dfs['merged_tec_info'],
-            dfs[key][['year_month', 'value']].rename(columns={'value': col_name}),
-            on='year_month',
-            how='left'
-        )
+    dfs['merged_tec_info'] = apply_schema(df_merged.reset_index(drop=True), 'merged_tec_info')
 
     return dfs
 
-def retrieve_data(dfs):
+def retrieve_data(dfs, backend=None, start=None, end=None, tickers=None, lazy=False):
     """
     Retrieve and preprocess data for a given dictionary of dataframes.
 
-    This function reads CSV files for each key in the input dictionary,
-    assigns the CSV data to the respective key, and converts specific
-    date-related columns to datetime format.
+    This function reads the saved file for each key in the input dictionary,
+    assigns its data to the respective key, and converts specific
+    date-related columns to datetime format. The columnar formats keep the
+    types of the columns, so their dates are already parsed. The columns
+    are cast to the compact types of the schema of every dataset.
 
     Arguments:
         dfs (dict): A dictionary where keys are strings that represent
         identifiers and values are placeholder dataframes that serve as
         references for preprocessing steps.
+        backend (optional): The storage backend of the saved files. Defaults to CSV.
+        start (str | datetime, optional): The first time to be read, inclusive.
+        end (str | datetime, optional): The last time to be read, exclusive.
+        tickers (list[str], optional): The tickers to be read. With the SQLite
+        storage, these predicates are run by the query.
+        lazy (bool): Whether to return a `DatasetRegistry` which reads every
+        dataset only when it is first accessed, instead of reading them all.
 
     Returns:
         dict: A dictionary with updated dataframes containing preprocessed
         data, where date-related columns are cast to datetime and non-date
-        values are coerced to NaT.
+        values are coerced to NaT, and 'year_month' is kept as 'YYYY-MM'.
     """
-    for key in dfs.keys():
-        dfs[key] = ut.read_csv(f'data/df_{key}.csv')
+    registry = DatasetRegistry(dfs.keys(), backend, start=start, end=end, tickers=tickers)
+    if lazy:
+        return registry
 
-        # Identify date-related columns and convert them to datetime
-        for col in ['datetime', 'date', 'year_month']:
-            if col in dfs[key].columns:
-                dfs[key][col] = pd.to_datetime(dfs[key][col], errors='coerce')
+    for key in dfs.keys():
+        dfs[key] = registry[key]
+    # A news history saved in the previous wide format is split by the registry in the normalized tables
+    dfs.update(registry.loaded)
 
     return dfs
 
-def save_dataframes(dfs):
+def save_dataframes(dfs, backend=None, writer=None):
     """
-    Saves multiple dataframes as CSV files.
+    Saves multiple dataframes as CSV (or columnar) files.
 
     This function iterates over a dictionary where keys represent names or identifiers
     for dataframes and values are the actual dataframes. Each dataframe is exported
-    and saved to a CSV file in the 'data/' directory with a filename that includes
+    and saved to a file in the 'data/' directory with a filename that includes
     its corresponding dictionary key.
 
     Args:
         dfs (Dict[str, DataFrame]): A dictionary where keys are strings representing
                                     dataframe names or identifiers, and values are
                                     the dataframes to be saved.
+        backend (optional): The storage backend of the saved files. Defaults to CSV.
+        writer (BackgroundWriter, optional): Writer saving the files in the background,
+                                             while the pipeline goes on. Defaults to
+                                             saving them before returning.
 
     Returns:
         None
     """
     all_keys = dfs.keys()
     for df in all_keys:
-        ut.write_csv(dfs[df], f'data/df_{df}.csv')
+        if writer is not None:
+            writer.write_dataset(dfs[df], df, backend)
+        else:
+            storage.write_dataset(dfs[df], df, backend)
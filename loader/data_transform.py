@@ -1,5 +1,45 @@
+import hashlib
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from utils.schema import apply_schema
+
+# Columns of the normalized news tables. The articles are stored once in 'news', keyed by `article_id`, and
+# their ticker sentiments and topics in 'news_tickers' and 'news_topics'.
+NEWS_TABLE_COLUMNS = {
+    'news': ['article_id', 'title', 'datetime', 'overall_sentiment_score', 'overall_sentiment_label', 'topic'],
+    'news_tickers': ['article_id', 'ticker', 'relevance_score', 'ticker_sentiment_score', 'ticker_sentiment_label'],
+    'news_topics': ['article_id', 'affected_topic', 'affected_topic_relevance_score']
+}
+
+def parse_datetimes(datetime_strs):
+    """
+    Parses the timestamps of an API time series in a single vectorized call. The keys of the Alpha Vantage
+    series are ISO 8601 strings ('YYYY-MM-DD HH:MM' or 'YYYY-MM-DD HH:MM:SS'), and the seconds are dropped,
+    as the previous 'YYYY-MM-DD HH:MM' formatting did.
+
+    Parameters:
+        datetime_strs (iterable[str]): The timestamps of the series.
+
+    Returns:
+        pandas.DatetimeIndex: The parsed timestamps, floored to the minute.
+    """
+    return pd.to_datetime(np.array(list(datetime_strs), dtype=object), format='ISO8601').floor('min')
+
+def series_column(values, key, dtype='float64'):
+    """
+    Extracts one field of the values of an API time series into a NumPy array, converting the strings of
+    the response in a single call.
+
+    Parameters:
+        values (list[dict]): The values of the series, one dictionary per bar.
+        key (str): The field to be extracted.
+        dtype (str): The type of the array. Defaults to 'float64'.
+
+    Returns:
+        numpy.ndarray: The values of the field.
+    """
+    return np.array([value[key] for value in values], dtype=dtype)
 
 def manage_dates(df, date_type):
     """
@@ -21,9 +61,10 @@ def manage_dates(df, date_type):
         The modified DataFrame with the adjusted and formatted date-related columns.
     """
     if date_type is None:
-        df['datetime'] = pd.to_datetime(df['datetime'], format='%Y-%m-%d %H:%M')
-        df['date'] = pd.to_datetime(df['datetime']).dt.date
-        df['year_month'] = pd.to_datetime(df['datetime']).dt.to_period('M').astype(str)
+        if not pd.api.types.is_datetime64_any_dtype(df['datetime']):
+            df['datetime'] = pd.to_datetime(df['datetime'], format='%Y-%m-%d %H:%M')
+        df['date'] = df['datetime'].dt.date
+        df['year_month'] = df['datetime'].dt.strftime('%Y-%m')
     else:
         df['date'] = pd.to_datetime(df['datetime']).dt.date
         df['year_month'] = pd.to_datetime(df['date']).dt.to_period('M')
@@ -53,33 +94,31 @@ def transform_intraday(symbol, data):
                    a dictionary.
 
     Notes:
-        The datetime values are converted and formatted into a consistent string format 'YYYY-MM-DD HH:MM'
-        for ease of processing.
+        The columns are built directly as NumPy arrays, and the timestamps are parsed once with
+        `parse_datetimes` and kept as datetime64 values truncated to the minute.
     """
-    records = [
-        {
-            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
-            'ticker': symbol,
-            'open': float(ohlcv['1. open']),
-            'high': float(ohlcv['2. high']),
-            'low': float(ohlcv['3. low']),
-            'close': float(ohlcv['4. close']),
-            'volume': int(ohlcv['5. volume'])
-        }
-        for datetime_str, ohlcv in data.items()
-    ]
+    values = list(data.values())
+    df = pd.DataFrame({
+        'datetime': parse_datetimes(data.keys()),
+        'ticker': symbol,
+        'open': series_column(values, '1. open'),
+        'high': series_column(values, '2. high'),
+        'low': series_column(values, '3. low'),
+        'close': series_column(values, '4. close'),
+        'volume': series_column(values, '5. volume', 'int64')
+    })
 
-    df = manage_dates(pd.DataFrame(records), None)
+    df = manage_dates(df, None)
 
-    return df
+    return apply_schema(df, 'ticker')
 
 def transform_sma(symbol, data, period):
     """
     Transforms price data into a DataFrame containing Simple Moving Averages (SMA) for a specific period.
 
-    This function iterates through the given dictionary, calculating SMAs for
+    This function turns the given dictionary into column arrays of SMA values for
     a specified financial symbol and organizes the results into a pandas DataFrame.
-    It reformats the date-time and merges data as part of the transformation.
+    The timestamps are parsed once with `parse_datetimes`.
 
     Args:
         symbol (str): The ticker symbol representing the financial instrument.
@@ -91,28 +130,24 @@ def transform_sma(symbol, data, period):
         pandas.DataFrame: A DataFrame containing records with columns such as
         'ticker', 'datetime', 'sma', and 'period'.
     """
-    records = [
-        {
-            'ticker': symbol,
-            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
-            'sma': float(sma_data['SMA']),
-            'period': period
-        }
-        for datetime_str, sma_data in data.items()
-    ]
+    df = pd.DataFrame({
+        'ticker': symbol,
+        'datetime': parse_datetimes(data.keys()),
+        'sma': series_column(list(data.values()), 'SMA'),
+        'period': period
+    })
 
-    df = manage_dates(pd.DataFrame(records), None)
+    df = manage_dates(df, None)
 
-    return df
+    return apply_schema(df, 'sma')
 
 def transform_macd(symbol, data):
     """
     Transforms MACD (Moving Average Convergence Divergence) data for a given symbol into a DataFrame.
 
-    This function iterates over the provided MACD data, processes each entry to create a dictionary
-    containing the ticker symbol, datetime (formatted as a string), and MACD data (MACD, MACD_Signal,
-    MACD_Hist). The list of dictionaries is then converted into a DataFrame, and dates are managed using
-    the manage_dates function.
+    This function turns the provided MACD data into column arrays containing the ticker symbol, datetime
+    (parsed once with `parse_datetimes`), and MACD data (MACD, MACD_Signal, MACD_Hist) as float values.
+    The columns are then converted into a DataFrame, and dates are managed using the manage_dates function.
 
     Parameters:
         symbol (str): The ticker symbol associated with the MACD data.
@@ -122,22 +157,20 @@ def transform_macd(symbol, data):
 
     Returns:
         pandas.DataFrame: A DataFrame containing the transformed MACD data with the provided symbol
-                          and datetime formatted as 'YYYY-MM-DD HH:MM'.
+                          and datetime truncated to the minute.
     """
-    records = [
-        {
-            'ticker': symbol,
-            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
-            'MACD': macd['MACD'],
-            'MACD_Signal': macd['MACD_Signal'],
-            'MACD_Hist': macd['MACD_Hist']
-        }
-        for datetime_str, macd in data.items()
-    ]
+    values = list(data.values())
+    df = pd.DataFrame({
+        'ticker': symbol,
+        'datetime': parse_datetimes(data.keys()),
+        'MACD': series_column(values, 'MACD'),
+        'MACD_Signal': series_column(values, 'MACD_Signal'),
+        'MACD_Hist': series_column(values, 'MACD_Hist')
+    })
 
-    df = manage_dates(pd.DataFrame(records), None)
+    df = manage_dates(df, None)
 
-    return df
+    return apply_schema(df, 'macd')
 
 def transform_rsi(symbol, data, period):
     """
@@ -146,7 +179,7 @@ def transform_rsi(symbol, data, period):
     This function takes RSI-related data, along with a symbol and period,
     and constructs a structured DataFrame. The input data consists of a symbol,
     a dictionary mapping datetime strings to RSI data, and a period. The function
-    processes the input, formats the datetime strings, and computes a DataFrame
+    extracts the RSI values as column arrays, parses the datetime strings once, and builds a DataFrame
     with enhanced structure and date management.
 
     Args:
@@ -159,19 +192,16 @@ def transform_rsi(symbol, data, period):
         pd.DataFrame: A DataFrame containing the transformed RSI information,
         including ticker, formatted datetime, RSI values, and the specified period.
     """
-    records = [
-        {
-            'ticker': symbol,
-            'datetime': pd.to_datetime(datetime_str).strftime('%Y-%m-%d %H:%M'),
-            'rsi': float(rsi_data['RSI']),
-            'period': period
-        }
-        for datetime_str, rsi_data in data.items()
-    ]
+    df = pd.DataFrame({
+        'ticker': symbol,
+        'datetime': parse_datetimes(data.keys()),
+        'rsi': series_column(list(data.values()), 'RSI'),
+        'period': period
+    })
 
-    df = manage_dates(pd.DataFrame(records), None)
+    df = manage_dates(df, None)
 
-    return df
+    return apply_schema(df, 'rsi')
 
 def transform_economic_data(data):
     """
@@ -206,75 +236,106 @@ def transform_economic_data(data):
 
     df = manage_dates(pd.DataFrame(records), 'economics')
 
-    return df
+    return apply_schema(df, 'economic')
+
+def article_id(title, datetime_str):
+    """
+    Computes the key of a news article: a signed 64-bit hash of its title and its publication time, so the
+    articles are identified and de-duplicated by an integer instead of by the title string. The hash does not
+    depend on the process, so the keys of the stored history match the ones of the new responses.
+
+    Parameters:
+        title (str): The title of the article, without commas.
+        datetime_str (str): The publication time, in 'YYYY-MM-DD HH:MM:SS' format.
+
+    Returns:
+        int: The key of the article.
+    """
+    digest = hashlib.blake2b(f'{title}\x1f{datetime_str}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
 
 def transform_news_data(data, topic):
     """
-    Transforms news data into a structured and consistent format for analysis.
+    Transforms news data into the normalized news tables.
 
-    This function processes raw news data, extracting and transforming relevant
-    information into a Pandas DataFrame. The input data is expected to contain
-    various elements, including titles, publication times, sentiment scores,
-    tickers, and topics. The function performs tasks such as datetime conversion,
-    data aggregation, and score mapping to construct a comprehensive dataset.
+    Every article of the feed is stored once in the 'news' table, keyed by `article_id`, and its ticker
+    sentiments and topics are stored in the 'news_tickers' and 'news_topics' tables, with one row per ticker
+    and per topic of the article. An article with 10 tickers and 8 topics is therefore stored in 1 + 10 + 8
+    rows instead of in the 80 rows of the ticker x topic cross-product, and its title is stored only once.
 
     Args:
         data (list): A list of dictionaries representing news entries. Each entry
             should contain fields including 'title', 'time_published',
             'overall_sentiment_score', 'overall_sentiment_label',
             'ticker_sentiment', and 'topics'.
-        topic (str): The topic to associate with each transformed record for
-            additional grouping or classification.
+        topic (str): The topic of the request, stored with every article, as the
+            history of every topic is planned from it.
 
     Returns:
-        pandas.DataFrame: A DataFrame containing the transformed news data,
-            structured with columns such as 'title', 'datetime',
-            'overall_sentiment_score', 'overall_sentiment_label', 'ticker',
-            'relevance_score', 'ticker_sentiment_score', 'ticker_sentiment_label',
-            'affected_topic', 'affected_topic_relevance_score', and 'topic'.
+        dict[str, pandas.DataFrame]: The tables of the feed:
+            - 'news': 'article_id', 'title', 'datetime', 'overall_sentiment_score',
+              'overall_sentiment_label' and 'topic'.
+            - 'news_tickers': 'article_id', 'ticker', 'relevance_score',
+              'ticker_sentiment_score' and 'ticker_sentiment_label'.
+            - 'news_topics': 'article_id', 'affected_topic' and
+              'affected_topic_relevance_score'.
     """
-    records = []
-    feed_items = data
+    articles = []
+    tickers = []
+    topics = []
 
-    for item in feed_items:
+    for item in data:
         title = item['title'].replace(',', '')
 
         # Convert time_published to the desired format
-        timepublished = pd.to_datetime(
-            datetime.strptime(item['time_published'][:8] + ' ' + item['time_published'][9:11], '%Y%m%d %H')
-            .strftime('%Y-%m-%d %H:00:00')
-        )
+        timepublished = datetime.strptime(item['time_published'][:8] + ' ' + item['time_published'][9:11],
+                                          '%Y%m%d %H').strftime('%Y-%m-%d %H:00:00')
+        key = article_id(title, timepublished)
 
-        overall_sentiment_score = item['overall_sentiment_score']
-        overall_sentiment_label = item['overall_sentiment_label']
-
-        # Iterate through each ticker sentiment and each topic
+        articles.append([key, title, timepublished, item['overall_sentiment_score'],
+                         item['overall_sentiment_label'], topic])
         for ticker_data in item['ticker_sentiment']:
-            ticker = ticker_data['ticker']
-            relevance_score = ticker_data['relevance_score']
-            ticker_sentiment_score = ticker_data['ticker_sentiment_score']
-            ticker_sentiment_label = ticker_data['ticker_sentiment_label']
-
-            for topic_data in item['topics']:
-                affected_topic = topic_data['topic']
-                affected_topic_relevance_score = topic_data['relevance_score']
-
-                # Add the row with all information, including the new topic columns
-                records.append([
-                    title, timepublished, overall_sentiment_score,
-                    overall_sentiment_label, ticker, relevance_score,
-                    ticker_sentiment_score, ticker_sentiment_label,
-                    affected_topic, affected_topic_relevance_score, topic
-                ])
-
-    # Create the final DataFrame with specified columns
-    df_transformed = pd.DataFrame(records, columns=[
-        'title', 'timepublished', 'overall_sentiment_score',
-        'overall_sentiment_label', 'ticker', 'relevance_score',
-        'ticker_sentiment_score', 'ticker_sentiment_label',
-        'affected_topic', 'affected_topic_relevance_score', 'topic'
-    ])
-
-    df_transformed.rename(columns={'timepublished': 'datetime'}, inplace=True)
-
-    return df_transformed
+            tickers.append([key, ticker_data['ticker'], ticker_data['relevance_score'],
+                            ticker_data['ticker_sentiment_score'], ticker_data['ticker_sentiment_label']])
+        for topic_data in item['topics']:
+            topics.append([key, topic_data['topic'], topic_data['relevance_score']])
+
+    df_articles = pd.DataFrame(articles, columns=NEWS_TABLE_COLUMNS['news'])
+    df_articles['datetime'] = pd.to_datetime(df_articles['datetime'], format='%Y-%m-%d %H:%M:%S')
+
+    tables = {
+        'news': df_articles.astype({'article_id': 'int64'}),
+        'news_tickers': pd.DataFrame(tickers, columns=NEWS_TABLE_COLUMNS['news_tickers']).astype(
+            {'article_id': 'int64'}),
+        'news_topics': pd.DataFrame(topics, columns=NEWS_TABLE_COLUMNS['news_topics']).astype(
+            {'article_id': 'int64'})
+    }
+
+    return {table: apply_schema(df, table) for table, df in tables.items()}
+
+def normalize_news_frame(df):
+    """
+    Splits a news dataset in the previous wide format, with one row per ticker and topic of every article, into
+    the normalized news tables of `transform_news_data`. Used to migrate the stored history.
+
+    Parameters:
+        df (pandas.DataFrame): The wide news dataset.
+
+    Returns:
+        dict[str, pandas.DataFrame]: The 'news', 'news_tickers' and 'news_topics' tables.
+    """
+    df = df.copy()
+    datetime_strs = pd.to_datetime(df['datetime']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    df['article_id'] = [article_id(title, datetime_str) for title, datetime_str in
+                        zip(df['title'].astype(str), datetime_strs)]
+    df['article_id'] = df['article_id'].astype('int64')
+    df['datetime'] = pd.to_datetime(df['datetime'])
+
+    tables = {
+        'news': df[NEWS_TABLE_COLUMNS['news']].drop_duplicates(subset=['article_id', 'topic']),
+        'news_tickers': df[NEWS_TABLE_COLUMNS['news_tickers']].drop_duplicates(subset=['article_id', 'ticker']),
+        'news_topics': df[NEWS_TABLE_COLUMNS['news_topics']].dropna(subset=['affected_topic']).drop_duplicates(
+            subset=['article_id', 'affected_topic'])
+    }
+
+    return {table: apply_schema(df, table) for table, df in tables.items()}
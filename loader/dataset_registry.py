@@ -0,0 +1,133 @@
+import pandas as pd
+import utils.storage as storage
+import loader.data_transform as transformer
+from utils.schema import apply_schema
+from collections.abc import MutableMapping
+
+# Date-related columns of the saved datasets, parsed on read when the storage format does not keep their type.
+# The 'year_month' months are kept as 'YYYY-MM' categoricals by the schema of the datasets.
+DATE_COLUMNS = ['datetime', 'date']
+
+def parse_dates(df):
+    """
+    Converts the date-related columns of a dataset read from a file to datetime, coercing the non-date values to
+    NaT. The columns already typed by a columnar format are left as they are.
+
+    Parameters:
+        df (pandas.DataFrame): The dataset.
+
+    Returns:
+        pandas.DataFrame: The dataset with its date-related columns parsed.
+    """
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    return df
+
+class DatasetRegistry(MutableMapping):
+
+    def __init__(self, names, backend=None, directory='data', start=None, end=None, tickers=None):
+        """
+        Dictionary of the saved datasets where every dataset is read, its dates parsed and its columns cast to the
+        compact types of `utils.schema`, only when it is first accessed, so a run which only uses a few datasets
+        does not read every file.
+
+        The rows of every dataset can be restricted to a datetime range and some tickers, and `read` reads a
+        projection of a dataset without caching it. A news history saved in the previous wide format is split in
+        the normalized news tables when any of them is accessed.
+
+        Attributes:
+            names (list[str]): The names of the datasets, in order.
+            backend (optional): The storage backend of the saved files. Defaults to CSV.
+            directory (str): The folder of the saved files.
+            start (str | datetime, optional): The first time to be read, inclusive.
+            end (str | datetime, optional): The last time to be read, exclusive.
+            tickers (list[str], optional): The tickers to be read.
+            loaded (dict): The datasets already read or assigned.
+        """
+        self.names = list(names)
+        self.backend = backend
+        self.directory = directory
+        self.start = start
+        self.end = end
+        self.tickers = tickers
+        self.loaded = {}
+
+    def read(self, name, columns=None, start=None, end=None, tickers=None):
+        """
+        Reads a dataset from its saved file, optionally only some columns, without caching it. The predicates
+        not given default to the ones of the registry.
+
+        Parameters:
+            name (str): The name of the dataset.
+            columns (list[str], optional): The columns to be read. Defaults to every column.
+            start (str | datetime, optional): The first time to be read, inclusive.
+            end (str | datetime, optional): The last time to be read, exclusive.
+            tickers (list[str], optional): The tickers to be read.
+
+        Returns:
+            pandas.DataFrame: The dataset, with its date-related columns parsed and the types of its schema.
+        """
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        tickers = self.tickers if tickers is None else tickers
+        read_columns = columns
+        if columns is not None:
+            # The filtered columns are read too, and dropped after filtering the rows of the files
+            read_columns = list(columns) + [column for column in ['datetime', 'ticker'] if column not in columns]
+
+        df = storage.read_dataset(name, self.backend, read_columns, self.directory, start, end, tickers)
+        if columns is not None:
+            df = df[[column for column in columns if column in df.columns]]
+
+        return apply_schema(parse_dates(df), name)
+
+    def load_news(self):
+        """
+        Reads the 'news' table and, if it is saved in the previous wide format, splits it in the normalized news
+        tables.
+        """
+        df_news = self.read('news')
+        if 'ticker' in df_news.columns:
+            self.loaded.update(transformer.normalize_news_frame(df_news))
+        else:
+            self.loaded['news'] = df_news
+
+    def __getitem__(self, name):
+        if name not in self.loaded:
+            if name not in self.names:
+                raise KeyError(name)
+            if name in transformer.NEWS_TABLE_COLUMNS and 'news' in self.names and 'news' not in self.loaded:
+                self.load_news()
+            if name not in self.loaded:
+                self.loaded[name] = self.read(name)
+
+        return self.loaded[name]
+
+    def __setitem__(self, name, df):
+        if name not in self.names:
+            self.names.append(name)
+        self.loaded[name] = df
+
+    def __delitem__(self, name):
+        self.names.remove(name)
+        self.loaded.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def copy(self):
+        """
+        Returns a shallow copy of the registry, sharing the datasets already read.
+        """
+        registry = DatasetRegistry(self.names, self.backend, self.directory, self.start, self.end, self.tickers)
+        registry.loaded = dict(self.loaded)
+
+        return registry
@@ -0,0 +1,69 @@
+import pandas as pd
+from utils.schema import apply_schema
+
+class FrameAccumulator:
+
+    def __init__(self, dfs, subset_columns):
+        """
+        Accumulates the transformed responses of every dataset and combines them once, at the end of the load.
+
+        Combining every response into the accumulated dataframe with `combine_data` concatenates and
+        de-duplicates the whole dataframe again for each response, so the total work grows with the square of the
+        number of responses. The accumulator keeps the responses in a list per dataset instead, and `combine`
+        makes a single concatenation and de-duplication per dataset, with the same result: the last record of
+        every key is kept, in the position of its last occurrence.
+
+        Attributes:
+            dfs (dict): The initial dataframes, returned unchanged for the datasets without responses.
+            subset_columns (dict): The columns identifying a record of every dataset.
+            chunks (dict): The responses of every dataset, in order.
+        """
+        self.dfs = dfs
+        self.subset_columns = subset_columns
+        self.chunks = {}
+
+    def add(self, dataset, df):
+        """
+        Adds a transformed response of a dataset.
+
+        Parameters:
+            dataset (str): The name of the dataset.
+            df (pandas.DataFrame): The transformed response.
+        """
+        if dataset not in self.chunks:
+            self.chunks[dataset] = [self.dfs.get(dataset, pd.DataFrame())]
+        self.chunks[dataset].append(df)
+
+    def add_tables(self, tables):
+        """
+        Adds the tables of a transformed response, as returned by `transform_task_result`.
+
+        Parameters:
+            tables (dict[str, pandas.DataFrame]): The transformed response by dataset.
+        """
+        for dataset, df in tables.items():
+            self.add(dataset, df)
+
+    def combine(self):
+        """
+        Combines the accumulated responses of every dataset with its initial dataframe, as successive calls to
+        `combine_data` would: the rows with no values are dropped, and the duplicates on the subset columns of
+        the dataset are dropped keeping the last one, unless there is a single non-empty frame.
+
+        Returns:
+            dict: The initial dataframes updated with the accumulated responses.
+        """
+        for dataset, chunks in self.chunks.items():
+            chunks = [df.dropna(how='all') for df in chunks if not df.empty]
+            chunks = [df for df in chunks if not df.empty]
+            if not chunks:
+                self.dfs[dataset] = pd.DataFrame()
+            elif len(chunks) == 1:
+                self.dfs[dataset] = chunks[0]
+            else:
+                # The categories of the chunks differ, so the concatenation is cast back to the schema
+                df = pd.concat(chunks).drop_duplicates(subset=self.subset_columns[dataset], keep='last')
+                self.dfs[dataset] = apply_schema(df, dataset)
+        self.chunks = {}
+
+        return self.dfs
@@ -0,0 +1,312 @@
+import os
+import json
+import math
+import numpy as np
+import pandas as pd
+import utils.storage as storage
+
+class EmaState:
+    __slots__ = ('alpha', 'decay', 'weight', 'value')
+
+    def __init__(self, com, weight=1.0, value=math.nan):
+        """
+        State of an exponential moving average without adjustment, updated one value at a time with the same
+        arithmetic as `pandas.Series.ewm(adjust=False).mean()`, so a replay gives exactly the batch values.
+
+        Attributes:
+            alpha (float): The smoothing factor, derived from the center of mass as pandas does.
+            decay (float): The weight factor of the previous average, `1 - alpha`.
+            weight (float): The weight of the previous average.
+            value (float): The current average, NaN before the first value.
+
+        Parameters:
+            com (float): The center of mass of the average: `(span - 1) / 2`, or `(1 - alpha) / alpha`.
+            weight (float): The weight of the previous average, when the state is restored.
+            value (float): The current average, when the state is restored.
+        """
+        self.alpha = 1. / (1. + com)
+        self.decay = 1. - self.alpha
+        self.weight = weight
+        self.value = value
+
+    @classmethod
+    def from_span(cls, span):
+        return cls((span - 1) / 2)
+
+    @classmethod
+    def from_alpha(cls, alpha):
+        return cls((1 - alpha) / alpha)
+
+    def update(self, value):
+        """
+        Adds a value to the average and returns the updated average.
+        """
+        if self.value == self.value:
+            self.weight *= self.decay
+            if value == value:
+                if self.value != value:
+                    self.value = (self.weight * self.value + self.alpha * value) / (self.weight + self.alpha)
+                self.weight = 1.
+        elif value == value:
+            self.value = value
+
+        return self.value
+
+    def to_dict(self):
+        return {'alpha': self.alpha, 'decay': self.decay, 'weight': self.weight, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(state, name, data[name])
+        return state
+
+class SmaState:
+    __slots__ = ('period', 'count', 'cumulative', 'buffer')
+
+    def __init__(self, period):
+        """
+        State of a Simple Moving Average, updated one bar at a time in constant time.
+
+        The ring buffer keeps the running sums of the last `period` bars, and every window sum is the difference
+        between the current running sum and the one `period` bars before, which is the arithmetic of
+        `indicators.sma`.
+
+        Attributes:
+            period (int): The number of bars of the moving window.
+            count (int): The number of bars added.
+            cumulative (float): The running sum of the bars.
+            buffer (list): The running sums of the last `period` bars, indexed by the bar number modulo `period`.
+        """
+        self.period = period
+        self.count = 0
+        self.cumulative = 0.
+        self.buffer = [0.] * period
+
+    def update(self, close):
+        """
+        Adds a bar and returns the SMA at that bar, NaN while the window is not complete.
+        """
+        self.cumulative += close
+        position = self.count % self.period
+        window_start = self.buffer[position]
+        self.buffer[position] = self.cumulative
+        self.count += 1
+        if self.count < self.period:
+            return math.nan
+
+        return (self.cumulative - window_start) / self.period
+
+    def to_dict(self):
+        return {'period': self.period, 'count': self.count, 'cumulative': self.cumulative, 'buffer': list(self.buffer)}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.count, state.cumulative, state.buffer = data['count'], data['cumulative'], list(data['buffer'])
+        return state
+
+class RsiState:
+    __slots__ = ('period', 'count', 'previous_close', 'gain_sum', 'loss_sum', 'avg_gain', 'avg_loss')
+
+    def __init__(self, period):
+        """
+        State of a Relative Strength Index with Wilder's smoothing, updated one bar at a time in constant time.
+
+        The average gain and loss are seeded with the simple mean of the first `period` price changes, and
+        then smoothed with `alpha = 1 / period`, which is the arithmetic of `indicators.rsi`.
+
+        Attributes:
+            period (int): The lookback period of the RSI.
+            count (int): The number of bars added.
+            previous_close (float): The close of the previous bar.
+            gain_sum (float): The sum of the gains of the seed window.
+            loss_sum (float): The sum of the losses of the seed window.
+            avg_gain (EmaState): Wilder's average of the gains.
+            avg_loss (EmaState): Wilder's average of the losses.
+        """
+        self.period = period
+        self.count = 0
+        self.previous_close = math.nan
+        self.gain_sum = 0.
+        self.loss_sum = 0.
+        self.avg_gain = EmaState.from_alpha(1 / period)
+        self.avg_loss = EmaState.from_alpha(1 / period)
+
+    def update(self, close):
+        """
+        Adds a bar and returns the RSI at that bar, NaN for the first `period` bars.
+        """
+        delta = close - self.previous_close
+        self.previous_close = close
+        self.count += 1
+        if self.count == 1:
+            return math.nan
+
+        gain = delta if delta > 0 else 0.
+        loss = -delta if delta < 0 else 0.
+        changes = self.count - 1
+        if changes <= self.period:
+            self.gain_sum += gain
+            self.loss_sum += loss
+            if changes < self.period:
+                return math.nan
+            gain, loss = self.gain_sum / self.period, self.loss_sum / self.period
+
+        avg_gain = np.float64(self.avg_gain.update(gain))
+        avg_loss = np.float64(self.avg_loss.update(loss))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(100 - 100 / (1 + avg_gain / avg_loss))
+
+    def to_dict(self):
+        return {'period': self.period, 'count': self.count, 'previous_close': self.previous_close,
+                'gain_sum': self.gain_sum, 'loss_sum': self.loss_sum, 'avg_gain': self.avg_gain.to_dict(),
+                'avg_loss': self.avg_loss.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['period'])
+        state.count, state.previous_close = data['count'], data['previous_close']
+        state.gain_sum, state.loss_sum = data['gain_sum'], data['loss_sum']
+        state.avg_gain, state.avg_loss = EmaState.from_dict(data['avg_gain']), EmaState.from_dict(data['avg_loss'])
+        return state
+
+class MacdState:
+    __slots__ = ('long_window', 'count', 'short_ema', 'long_ema', 'signal_ema')
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        """
+        State of the MACD line, signal line and histogram, updated one bar at a time in constant time with the
+        three exponential moving averages of `indicators.macd`.
+
+        Attributes:
+            long_window (int): The period of the long-term average, whose first bars have no MACD.
+            count (int): The number of bars added.
+            short_ema (EmaState): The short-term average of the closes.
+            long_ema (EmaState): The long-term average of the closes.
+            signal_ema (EmaState): The average of the MACD line.
+        """
+        self.long_window = long_window
+        self.count = 0
+        self.short_ema = EmaState.from_span(short_window)
+        self.long_ema = EmaState.from_span(long_window)
+        self.signal_ema = EmaState.from_span(signal_window)
+
+    def update(self, close):
+        """
+        Adds a bar and returns the MACD, signal and histogram at that bar, NaN for the first `long_window - 1`
+        bars.
+        """
+        macd_line = self.short_ema.update(close) - self.long_ema.update(close)
+        signal_line = self.signal_ema.update(macd_line)
+        self.count += 1
+        if self.count < self.long_window:
+            return math.nan, math.nan, math.nan
+
+        return macd_line, signal_line, macd_line - signal_line
+
+    def to_dict(self):
+        return {'long_window': self.long_window, 'count': self.count, 'short_ema': self.short_ema.to_dict(),
+                'long_ema': self.long_ema.to_dict(), 'signal_ema': self.signal_ema.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(long_window=data['long_window'])
+        state.count = data['count']
+        for name in ['short_ema', 'long_ema', 'signal_ema']:
+            setattr(state, name, EmaState.from_dict(data[name]))
+        return state
+
+class TickerState:
+    __slots__ = ('last_datetime', 'sma', 'rsi', 'macd')
+
+    def __init__(self, periods):
+        """
+        State of the SMA, RSI and MACD indicators of a ticker, up to its last added bar.
+
+        Attributes:
+            last_datetime (pandas.Timestamp): The datetime of the last added bar, None before the first one.
+            sma (dict): The SMA state of every period.
+            rsi (dict): The RSI state of every period.
+            macd (MacdState): The MACD state.
+
+        Parameters:
+            periods (dict): A dictionary with the 'sma' and 'rsi' keys, each pointing to its list of periods.
+        """
+        self.last_datetime = None
+        self.sma = {period: SmaState(period) for period in periods['sma']}
+        self.rsi = {period: RsiState(period) for period in periods['rsi']}
+        self.macd = MacdState()
+
+    def matches(self, periods):
+        """
+        Checks whether the state has the configured periods.
+        """
+        return sorted(self.sma) == sorted(periods['sma']) and sorted(self.rsi) == sorted(periods['rsi'])
+
+    def update(self, datetime, close):
+        """
+        Adds a bar to every indicator.
+
+        Parameters:
+            datetime (pandas.Timestamp): The datetime of the bar.
+            close (float): The close of the bar.
+
+        Returns:
+            dict: The values at the bar: the SMA and RSI of every period, keyed by indicator and period, and
+            the 'macd' tuple of MACD, signal and histogram.
+        """
+        self.last_datetime = datetime
+        values = {('sma', period): state.update(close) for period, state in self.sma.items()}
+        values.update({('rsi', period): state.update(close) for period, state in self.rsi.items()})
+        values['macd'] = self.macd.update(close)
+
+        return values
+
+    def to_dict(self):
+        return {'last_datetime': None if self.last_datetime is None else str(self.last_datetime),
+                'sma': [state.to_dict() for state in self.sma.values()],
+                'rsi': [state.to_dict() for state in self.rsi.values()],
+                'macd': self.macd.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls.__new__(cls)
+        state.last_datetime = None if data['last_datetime'] is None else pd.Timestamp(data['last_datetime'])
+        state.sma = {item['period']: SmaState.from_dict(item) for item in data['sma']}
+        state.rsi = {item['period']: RsiState.from_dict(item) for item in data['rsi']}
+        state.macd = MacdState.from_dict(data['macd'])
+        return state
+
+def load_states(path):
+    """
+    Loads the persisted indicator states of every ticker.
+
+    Parameters:
+        path (str): The path of the JSON file of the states.
+
+    Returns:
+        dict: The TickerState of every ticker, empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return {symbol: TickerState.from_dict(data) for symbol, data in json.load(file).items()}
+
+def save_states(states, path):
+    """
+    Persists the indicator states of every ticker, through a temporary file so an interrupted run keeps the
+    previous states.
+
+    Parameters:
+        states (dict): The TickerState of every ticker.
+        path (str): The path of the JSON file of the states.
+    """
+    content = json.dumps({symbol: state.to_dict() for symbol, state in states.items()})
+
+    def write(temp_path):
+        with open(temp_path, 'w') as file:
+            file.write(content)
+
+    storage.atomic_write(path, write)
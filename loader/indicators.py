@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+import loader.data_transform as transformer
+from utils.schema import apply_schema
+from loader.indicator_state import TickerState
+
+def sma(close, period):
+    """
+    Calculates the Simple Moving Average of a price series.
+
+    The rolling sums are obtained from the cumulative sum of the series, so the whole series is computed
+    with a few vectorized operations. The first `period - 1` values, which do not have a complete window,
+    are NaN, as the API does not return them either.
+
+    Parameters:
+        close (array-like): The price series, ordered by ascending datetime.
+        period (int): The number of bars of the moving window.
+
+    Returns:
+        numpy.ndarray: The SMA values, aligned with the input series.
+    """
+    close = np.asarray(close, dtype='float64')
+    result = np.full(close.shape, np.nan)
+    if len(close) < period:
+        return result
+
+    cumulative = np.cumsum(close)
+    window_sums = cumulative[period - 1:].copy()
+    window_sums[1:] -= cumulative[:-period]
+    result[period - 1:] = window_sums / period
+
+    return result
+
+def wilder_average(values, period):
+    """
+    Calculates Wilder's smoothed average of a series, as used by the RSI. The first average is the simple
+    mean of the first `period` values, and every following one is `(previous * (period - 1) + value) / period`,
+    which is an exponential moving average with `alpha = 1 / period`.
+
+    Parameters:
+        values (numpy.ndarray): The series to be smoothed.
+        period (int): The smoothing period.
+
+    Returns:
+        numpy.ndarray: The smoothed values, starting at the position `period - 1` of the input series.
+    """
+    seed = np.cumsum(values[:period])[-1] / period
+    seeded = np.concatenate(([seed], values[period:]))
+
+    return pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+
+def rsi(close, period):
+    """
+    Calculates the Relative Strength Index of a price series with Wilder's smoothing, which is the method
+    used by the Alpha Vantage RSI endpoint.
+
+    Parameters:
+        close (array-like): The price series, ordered by ascending datetime.
+        period (int): The lookback period of the RSI.
+
+    Returns:
+        numpy.ndarray: The RSI values, aligned with the input series. The first `period` values are NaN.
+    """
+    close = np.asarray(close, dtype='float64')
+    result = np.full(close.shape, np.nan)
+    if len(close) <= period:
+        return result
+
+    delta = np.diff(close)
+    avg_gain = wilder_average(np.where(delta > 0, delta, 0.0), period)
+    avg_loss = wilder_average(np.where(delta < 0, -delta, 0.0), period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[period:] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    return result
+
+def macd(close, short_window=12, long_window=26, signal_window=9):
+    """
+    Calculates the MACD line, signal line and histogram of a price series, with the same exponential
+    moving averages used by `CheckTecDataset.calculate_macd_partial`.
+
+    Parameters:
+        close (array-like): The price series, ordered by ascending datetime.
+        short_window (int): The period of the short-term exponential moving average. Defaults to 12.
+        long_window (int): The period of the long-term exponential moving average. Defaults to 26.
+        signal_window (int): The period of the signal line. Defaults to 9.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The MACD, signal and histogram values, aligned
+        with the input series. The first `long_window - 1` values are NaN.
+    """
+    close = pd.Series(np.asarray(close, dtype='float64'))
+    macd_line = close.ewm(span=short_window, adjust=False).mean() - close.ewm(span=long_window, adjust=False).mean()
+    signal_line = macd_line.ewm(span=signal_window, adjust=False).mean()
+
+    macd_line = macd_line.to_numpy(copy=True)
+    signal_line = signal_line.to_numpy(copy=True)
+    hist = macd_line - signal_line
+    for values in (macd_line, signal_line, hist):
+        values[:long_window - 1] = np.nan
+
+    return macd_line, signal_line, hist
+
+def indicator_frame(symbol, datetimes, columns, period=None):
+    """
+    Builds an indicator DataFrame with the same schema as the `transform_*` functions of the loader, keeping
+    only the rows where the indicator is defined.
+
+    Parameters:
+        symbol (str): The ticker symbol of the series.
+        datetimes (numpy.ndarray): The datetimes of the bars.
+        columns (dict): The indicator columns, mapping the column name to its values.
+        period (int, optional): The period of the indicator, stored in the 'period' column for SMA and RSI.
+
+    Returns:
+        pandas.DataFrame: The indicator frame with the 'date' and 'year_month' columns.
+    """
+    df = pd.DataFrame({'ticker': symbol, 'datetime': datetimes})
+    for name, values in columns.items():
+        df[name] = np.round(values, 4)
+    if period is not None:
+        df['period'] = period
+
+    df = df.dropna(subset=list(columns.keys())).reset_index(drop=True)
+
+    return transformer.manage_dates(df, None)
+
+def compute_local_indicators(dfs, periods, df_history=None):
+    """
+    Computes the SMA, RSI and MACD indicators from the intraday bars of the 'ticker' dataset, instead of
+    requesting them from the API. The output has the same schema as the API responses transformed by the
+    loader (`sma`/`rsi` long frames with a 'period' column, and a `macd` frame), rounded to four decimals.
+
+    When the historical ticker data is provided, it is prepended to the new bars so the moving windows and
+    the exponential averages start from the whole history, but only the rows of the new bars are returned.
+
+    Parameters:
+        dfs (dict): A dictionary of DataFrames containing the 'ticker' dataset. The 'sma', 'rsi' and 'macd'
+            datasets are replaced with the computed indicators.
+        periods (dict): A dictionary with the 'sma' and 'rsi' keys, each pointing to its list of periods.
+        df_history (pandas.DataFrame, optional): Previously stored ticker data used to warm up the indicators.
+
+    Returns:
+        dict: The dictionary of DataFrames with the computed indicators.
+    """
+    df_ticker = dfs['ticker']
+    if df_ticker.empty:
+        return dfs
+
+    df_source = df_ticker
+    if df_history is not None and not df_history.empty:
+        df_source = pd.concat([df_history[df_ticker.columns.intersection(df_history.columns)], df_ticker])
+        df_source = df_source.drop_duplicates(subset=['ticker', 'datetime'], keep='last')
+
+    frames = {'sma': [], 'rsi': [], 'macd': []}
+    for symbol, df_symbol in df_source.groupby('ticker', sort=False, observed=True):
+        df_symbol = df_symbol.sort_values(by='datetime')
+        close = df_symbol['close'].to_numpy(dtype='float64')
+        datetimes = df_symbol['datetime'].to_numpy()
+        new_rows = df_symbol['datetime'].isin(df_ticker.loc[df_ticker['ticker'] == symbol, 'datetime']).to_numpy()
+
+        for period in periods['sma']:
+            df_sma = indicator_frame(symbol, datetimes[new_rows], {'sma': sma(close, period)[new_rows]}, period)
+            frames['sma'].append(df_sma)
+
+        for period in periods['rsi']:
+            df_rsi = indicator_frame(symbol, datetimes[new_rows], {'rsi': rsi(close, period)[new_rows]}, period)
+            frames['rsi'].append(df_rsi)
+
+        macd_line, signal_line, hist = macd(close)
+        frames['macd'].append(indicator_frame(symbol, datetimes[new_rows], {
+            'MACD': macd_line[new_rows],
+            'MACD_Signal': signal_line[new_rows],
+            'MACD_Hist': hist[new_rows]
+        }))
+
+    for key, key_frames in frames.items():
+        dfs[key] = apply_schema(pd.concat(key_frames, ignore_index=True), key) if key_frames else pd.DataFrame()
+
+    return dfs
+
+def update_local_indicators(dfs, periods, states, df_history=None):
+    """
+    Computes the SMA, RSI and MACD indicators of the intraday bars of the 'ticker' dataset by updating the
+    persisted indicator states one bar at a time, instead of recomputing the whole history as
+    `compute_local_indicators` does. The output has the same schema and, on a replay of the same bars, the same
+    values.
+
+    The loader loads the last month again on every run, so the state of every ticker is kept at the bar before
+    the first bar of its last loaded month. The stored bars between the state and the new bars are added first,
+    then the new bars, whose indicators are returned. A ticker without a state, or whose state has other periods
+    or is past its first new bar, starts from a new state warmed up with the stored bars.
+
+    Parameters:
+        dfs (dict): A dictionary of DataFrames containing the 'ticker' dataset. The 'sma', 'rsi' and 'macd'
+            datasets are replaced with the computed indicators.
+        periods (dict): A dictionary with the 'sma' and 'rsi' keys, each pointing to its list of periods.
+        states (dict): The TickerState of every ticker, updated in place with the new states.
+        df_history (pandas.DataFrame, optional): Previously stored ticker data, added to the states before the
+            new bars.
+
+    Returns:
+        dict: The dictionary of DataFrames with the computed indicators.
+    """
+    df_ticker = dfs['ticker']
+    if df_ticker.empty:
+        return dfs
+
+    frames = {'sma': [], 'rsi': [], 'macd': []}
+    for symbol, df_symbol in df_ticker.groupby('ticker', sort=False, observed=True):
+        df_symbol = df_symbol.drop_duplicates(subset=['datetime'], keep='last').sort_values(by='datetime')
+        first_datetime = df_symbol['datetime'].iloc[0]
+        state = states.get(symbol)
+        if state is None or not state.matches(periods) or (state.last_datetime is not None and
+                                                           state.last_datetime >= first_datetime):
+            state = TickerState(periods)
+
+        if df_history is not None and not df_history.empty:
+            df_bridge = df_history[(df_history['ticker'] == symbol) & (df_history['datetime'] < first_datetime)]
+            if state.last_datetime is not None:
+                df_bridge = df_bridge[df_bridge['datetime'] > state.last_datetime]
+            df_bridge = df_bridge.drop_duplicates(subset=['datetime'], keep='last').sort_values(by='datetime')
+            for bar_datetime, close in zip(df_bridge['datetime'], df_bridge['close'].to_numpy(dtype='float64')):
+                state.update(bar_datetime, close)
+
+        # The state is kept before the first bar of the last month, which the next run loads again
+        last_month = df_symbol['datetime'].iloc[-1].to_period('M').start_time
+        checkpoint = None
+        values = []
+        for bar_datetime, close in zip(df_symbol['datetime'], df_symbol['close'].to_numpy(dtype='float64')):
+            if checkpoint is None and bar_datetime >= last_month:
+                checkpoint = state.to_dict()
+            values.append(state.update(bar_datetime, close))
+        states[symbol] = TickerState.from_dict(checkpoint)
+
+        datetimes = df_symbol['datetime'].to_numpy()
+        for key in ['sma', 'rsi']:
+            for period in periods[key]:
+                frames[key].append(indicator_frame(symbol, datetimes, {
+                    key: np.array([bar_values[(key, period)] for bar_values in values])}, period))
+        macd_values = np.array([bar_values['macd'] for bar_values in values])
+        frames['macd'].append(indicator_frame(symbol, datetimes, {
+            'MACD': macd_values[:, 0],
+            'MACD_Signal': macd_values[:, 1],
+            'MACD_Hist': macd_values[:, 2]
+        }))
+
+    for key, key_frames in frames.items():
+        dfs[key] = apply_schema(pd.concat(key_frames, ignore_index=True), key) if key_frames else pd.DataFrame()
+
+    return dfs
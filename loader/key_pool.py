@@ -0,0 +1,171 @@
+import os
+import time
+import hashlib
+import threading
+from datetime import date
+from loader.rate_limiter import create_rate_limiter
+
+class KeyPool:
+
+    def __init__(self, keys, rate_limiters, daily_quota=None, cooldown_seconds=60):
+        """
+        Pool of Alpha Vantage API keys, each with its own rate limiter and daily quota counter. Every request
+        is scheduled on the key with the most remaining budget, so the aggregate throughput grows linearly
+        with the number of keys.
+
+        A key which reports throttling is taken out of the rotation for `cooldown_seconds`. When every key is
+        cooling down, the request waits until the first cooldown ends, so a throttled key is not sent back to
+        the API while it is still throttled. Keys whose daily quota is spent are not used again until the next
+        day.
+
+        Attributes:
+            keys (list[str]): The API keys.
+            rate_limiters (list): The rate limiter of every key (TokenBucket or SqliteTokenBucket).
+            daily_quota (int | None): Maximum number of requests per key and day, or None for no limit.
+            cooldown_seconds (float): Time a throttled key is kept out of the rotation.
+            used_today (list[int]): Requests made today with every key.
+            cooldown_until (list[float]): Monotonic time until which every key is out of the rotation.
+            day (datetime.date): Day of the `used_today` counters.
+            lock (threading.Lock): Lock protecting the counters, as the pool is shared by the fetch workers. The
+                rate limiters are not called while holding it, as a SQLite bucket may wait for its database.
+        """
+        if not keys or len(keys) != len(rate_limiters):
+            raise ValueError('The key pool needs at least one key, and one rate limiter per key')
+
+        self.keys = list(keys)
+        self.rate_limiters = list(rate_limiters)
+        self.daily_quota = daily_quota
+        self.cooldown_seconds = cooldown_seconds
+        self.used_today = [0] * len(self.keys)
+        self.cooldown_until = [0.0] * len(self.keys)
+        self.day = date.today()
+        self.lock = threading.Lock()
+
+    @property
+    def requests_per_minute(self):
+        """
+        Aggregate number of requests per minute admitted by the rate limiters of the pool.
+        """
+        return sum(limiter.requests_per_minute for limiter in self.rate_limiters)
+
+    def _remaining_quota(self, index):
+        if self.daily_quota is None:
+            return float('inf')
+        return self.daily_quota - self.used_today[index]
+
+    def _select(self, tokens):
+        """
+        Chooses the key for the next request. Must be called while holding `lock`.
+
+        Parameters:
+            tokens (list[float]): The tokens available in the rate limiter of every key, read before taking the
+                lock.
+
+        Returns:
+            tuple[int | None, float]: The index of the chosen key, or None if every key has spent its daily
+            quota, and the time in seconds until its cooldown ends, 0 when it is available.
+        """
+        if date.today() != self.day:
+            self.day = date.today()
+            self.used_today = [0] * len(self.keys)
+
+        candidates = [index for index in range(len(self.keys)) if self._remaining_quota(index) > 0]
+        if not candidates:
+            return None, 0.0
+
+        now = time.monotonic()
+        available = [index for index in candidates if self.cooldown_until[index] <= now]
+        if not available:
+            index = min(candidates, key=lambda index: self.cooldown_until[index])
+            return index, self.cooldown_until[index] - now
+        if len(available) == 1:
+            return available[0], 0.0
+
+        # The most remaining budget: the most tokens in the bucket, then the most daily quota left
+        return max(available, key=lambda index: (tokens[index], self._remaining_quota(index))), 0.0
+
+    def acquire(self):
+        """
+        Chooses a key and takes one token from its rate limiter, waiting until it is available. When every key
+        is cooling down, it waits until the first cooldown ends and chooses again.
+
+        Returns:
+            tuple[str | None, float]: The API key to be used, or None if the daily quota of every key is spent,
+            and the time in seconds the caller had to wait.
+        """
+        cooldown_time = 0.0
+        while True:
+            tokens = [limiter.available() for limiter in self.rate_limiters] if len(self.keys) > 1 else [0.0]
+            with self.lock:
+                index, cooldown = self._select(tokens)
+                if index is None:
+                    return None, cooldown_time
+                if cooldown <= 0:
+                    self.used_today[index] += 1
+                    break
+            time.sleep(cooldown)
+            cooldown_time += cooldown
+
+        # The token is reserved after releasing the lock, so the other workers do not wait for the bucket
+        wait_time = self.rate_limiters[index].reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return self.keys[index], cooldown_time + wait_time
+
+    def exhausted(self):
+        """
+        Checks whether every key of the pool has spent its daily quota.
+        """
+        with self.lock:
+            return date.today() == self.day and all(self._remaining_quota(index) <= 0 for index in range(len(self.keys)))
+
+    def report_throttled(self, key):
+        """
+        Takes a key out of the rotation for `cooldown_seconds`, after the API reported throttling.
+
+        Parameters:
+            key (str): The throttled API key.
+        """
+        with self.lock:
+            self.cooldown_until[self.keys.index(key)] = time.monotonic() + self.cooldown_seconds
+
+    def stats(self):
+        """
+        Returns the number of requests made today with every key, identified by its last four characters.
+        """
+        with self.lock:
+            return {f'...{str(key)[-4:]}': used for key, used in zip(self.keys, self.used_today)}
+
+def read_api_keys():
+    """
+    Reads the API keys from the environment: the comma separated 'ALPHAVKEYS' variable or, if it is not set,
+    the single 'ALPHAVKEY' variable.
+
+    Returns:
+        list[str]: The API keys. A list with a single None value when no key is configured.
+    """
+    keys = [key.strip() for key in os.getenv('ALPHAVKEYS', '').split(',') if key.strip()]
+
+    return keys or [os.getenv('ALPHAVKEY')]
+
+def create_key_pool(keys, rate_limit_config, daily_quota=None, cooldown_seconds=60):
+    """
+    Creates a key pool with one rate limiter per key, as described by the 'rate_limit' section of the loader
+    configuration. With the SQLite backend, every key has its own bucket, named after a hash of the key.
+
+    Parameters:
+        keys (list[str]): The API keys.
+        rate_limit_config (dict): Rate limit configuration applied to every key.
+        daily_quota (int, optional): Maximum number of requests per key and day.
+        cooldown_seconds (float): Time a throttled key is kept out of the rotation. Defaults to 60.
+
+    Returns:
+        KeyPool: The key pool.
+    """
+    rate_limiters = []
+    for key in keys:
+        key_hash = hashlib.sha256(str(key).encode('utf-8')).hexdigest()[:8]
+        rate_limiters.append(create_rate_limiter(rate_limit_config, f'alphavantage-{key_hash}'))
+
+    return KeyPool(keys, rate_limiters, daily_quota, cooldown_seconds)
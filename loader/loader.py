@@ -1,9 +1,25 @@
 import os
 import sys
 import pandas as pd
+from datetime import datetime
+from functools import partial
 import utils.utils as ut
 import loader.data_loader as data_loader
+import loader.indicators as indicators
+import loader.indicator_state as indicator_state
+import loader.backfill_planner as backfill_planner
+import loader.data_transform as transformer
 from loader.api_client import ApiClient
+from loader.response_cache import ResponseCache
+from loader.rate_limiter import create_rate_limiter
+from loader.key_pool import read_api_keys, create_key_pool
+from loader.work_queue import WorkQueue
+from utils.storage import PartitionedStore, SqliteBackend, CsvBackend, create_backend, dataset_path
+from utils.stage_manifest import file_checksum
+from utils.background_writer import background_writer
+
+# Months of stored bars read before the loaded months to warm up the locally computed indicators
+WARMUP_MONTHS = 3
 
 def run_loader():
     """
@@ -24,11 +40,25 @@ def run_loader():
     dict
         A dictionary containing results of the data loading or processing operation:
         - 'tec_info': Aggregated or merged technical information dataframe.
-        - 'news': Aggregated news-related dataframe.
+        - 'news', 'news_tickers' and 'news_topics': The normalized news tables.
     """
     # Objects
-    client = ApiClient()
     config = ut.load_config('loader_config')
+    cache_config = config.get('response_cache', {})
+    cache = None
+    if cache_config.get('enabled', False):
+        cache = ResponseCache(cache_config.get('directory', 'data/cache'), cache_config.get('ttl_seconds', 3600),
+                              cache_config.get('max_size_mb', 1024))
+    rate_limiter = create_rate_limiter(config.get('rate_limit', {}))
+    api_keys = read_api_keys()
+    key_pool = None
+    if len(api_keys) > 1:
+        key_pool_config = config.get('key_pool', {})
+        key_pool = create_key_pool(api_keys, config.get('rate_limit', {}), key_pool_config.get('daily_quota'),
+                                   key_pool_config.get('cooldown_seconds', 60))
+    client = ApiClient(cache, rate_limiter, key_pool=key_pool, **config.get('api_client', {}))
+    backend = create_backend(config.get('storage'), config['combine_configuration'])
+    writer = background_writer(config.get('background_writer'))
 
     # Create empty dataframes
     dataframes = {key: pd.DataFrame() for key in config['dataframes']}
@@ -37,21 +67,257 @@ def run_loader():
 
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+    if config['charge_new_values'] and config.get('backfill_planner', False):
+        queue_config = config.get('work_queue', {})
+        queue = None
+        if queue_config.get('enabled', False):
+            queue = WorkQueue(queue_config.get('path', 'data/work_queue.sqlite'))
+        f_dataframes = run_backfill(config, client, backend, dataframes, h_dataframes, f_dataframes, queue)
+        if cache is not None:
+            cache.report()
+        if isinstance(backend, SqliteBackend):
+            # The loaded datasets are already upserted, only the rebuilt merged dataset is left
+            data_loader.save_dataframes({'merged_tec_info': f_dataframes['merged_tec_info']}, backend, writer)
+        else:
+            data_loader.save_dataframes(f_dataframes, backend, writer)
+        if queue is not None:
+            queue.report()
+            queue.clear()
+        return loader_results(f_dataframes)
+
     if config['charge_new_values']:
         months = ut.get_months(config['historical_year'], config['historical_needed'])
-        dataframes = data_loader.load_data(dataframes, client, config['symbols'], months, config['periods'])
-        dataframes = data_loader.load_economics(dataframes, client, config['economic_indicators'])
-        dataframes = data_loader.load_news(dataframes, client, months, config['topics'])
+        indicator_source = config.get('indicator_source', 'api')
+        if config.get('fetch_mode', 'sequential') == 'concurrent':
+            dataframes = data_loader.load_data_concurrent(dataframes, client, config['symbols'], months,
+                                                          config['periods'], config.get('max_workers', 8),
+                                                          indicator_source)
+        else:
+            dataframes = data_loader.load_data(dataframes, client, config['symbols'], months, config['periods'],
+                                               indicator_source)
+        if indicator_source == 'local':
+            dataframes = compute_indicators(config, backend, months, dataframes)
+        dataframes = data_loader.load_economics(dataframes, client, config['economic_indicators'], backend)
+        dataframes = data_loader.load_news(dataframes, client, months, config['topics'], config.get('news_limit', 1000),
+                                           config.get('news_fetch_mode', 'bisect') == 'bisect')
         dataframes = data_loader.merge_datasets(dataframes, config['periods'], config['tec_columns'], config['economic_columns'])
+        if cache is not None:
+            cache.report()
 
         if config['historical_needed']:
-            data_loader.save_dataframes(dataframes)
-            return {'tec_info': dataframes['merged_tec_info'], 'news': dataframes['news']}
+            data_loader.save_dataframes(dataframes, backend, writer)
+            return loader_results(dataframes)
+
+        if isinstance(backend, SqliteBackend):
+            f_dataframes = data_loader.upsert_dataframes(dataframes, f_dataframes, backend)
+            return loader_results(f_dataframes)
 
-        h_dataframes = data_loader.retrieve_data(h_dataframes)
+        h_dataframes = data_loader.retrieve_data(h_dataframes, backend)
         f_dataframes = data_loader.combine_dataframes(h_dataframes, dataframes, f_dataframes, config['combine_configuration'])
-        data_loader.save_dataframes(f_dataframes)
-        return {'tec_info': f_dataframes['merged_tec_info'], 'news': f_dataframes['news']}
+        data_loader.save_dataframes(f_dataframes, backend, writer)
+        return loader_results(f_dataframes)
+
+    # Only the returned datasets are read
+    h_dataframes = data_loader.retrieve_data(h_dataframes, backend, lazy=True)
+    return loader_results(h_dataframes)
+
+def compute_indicators(config, backend, months, dfs, df_history=None):
+    """
+    Computes the technical indicators of the loaded intraday bars locally.
+
+    With the 'indicator_state' setting enabled, the persisted indicator state of every ticker is updated with
+    the stored bars after it and the new bars, and saved again, so only the bars since the state are read and
+    processed. Otherwise the indicators are recomputed from the stored bars of the previous `WARMUP_MONTHS`
+    months. A historical load starts every indicator from the first loaded bar.
+
+    The backfill gives the stored bars it has already retrieved instead, which are used whatever
+    'historical_needed' is, as its loaded slices may fall between stored months. The stored bars after the
+    first loaded bar of every ticker are then added to the states too, so they go through every bar in order.
+
+    Parameters:
+        config (dict): The loader configuration.
+        backend: The storage backend of the saved datasets.
+        months (list): The loaded months, as 'YYYY-MM' strings.
+        dfs (dict): The loaded dataframes, with the 'ticker' dataset.
+        df_history (pandas.DataFrame, optional): The stored bars, when they are already retrieved.
+
+    Returns:
+        dict: The dataframes with the 'sma', 'rsi' and 'macd' datasets computed.
+    """
+    state_config = config.get('indicator_state', {})
+    state_path = state_config.get('path', 'data/indicator_state.json')
+    states = {}
+    if state_config.get('enabled', False) and (df_history is not None or not config['historical_needed']):
+        states = indicator_state.load_states(state_path)
+
+    # The stored bars warm up the moving windows when only the current month is loaded
+    if df_history is None and not config['historical_needed']:
+        start = pd.Timestamp(datetime.strptime(min(months), '%Y-%m')) - pd.DateOffset(months=WARMUP_MONTHS)
+        resumed = [states[symbol].last_datetime for symbol in config['symbols'] if symbol in states and
+                   states[symbol].last_datetime is not None and states[symbol].matches(config['periods'])]
+        if resumed and len(resumed) == len(config['symbols']):
+            # Every ticker resumes from its state, only the bars after it are needed
+            start = min(resumed)
+        df_history = data_loader.retrieve_data({'ticker': pd.DataFrame()}, backend, start=start,
+                                               tickers=config['symbols'])['ticker']
+
+    if not state_config.get('enabled', False):
+        return indicators.compute_local_indicators(dfs, config['periods'], df_history)
+
+    df_bars = dfs['ticker']
+    if df_history is not None and not df_history.empty and not df_bars.empty:
+        first_datetimes = df_bars.groupby(df_bars['ticker'].astype(str), observed=True)['datetime'].min()
+        df_after = df_history[df_history['datetime'] > df_history['ticker'].astype(str).map(first_datetimes)]
+        if not df_after.empty:
+            columns = ['ticker', 'datetime', 'close']
+            df_bars = pd.concat([df_after[columns], df_bars[columns]]).astype({'ticker': str})
+            df_bars = df_bars.drop_duplicates(subset=['ticker', 'datetime'], keep='last').sort_values(by='datetime')
+
+    computed = indicators.update_local_indicators({'ticker': df_bars}, config['periods'], states, df_history)
+    indicator_state.save_states(states, state_path)
+    for key in ['sma', 'rsi', 'macd']:
+        dfs[key] = computed.get(key, pd.DataFrame())
+
+    return dfs
+
+def loader_results(dfs):
+    """
+    Selects the dataframes returned by the loader: the merged technical dataset and the normalized news tables.
+
+    Parameters:
+        dfs (dict): The loaded dataframes.
+
+    Returns:
+        dict: The 'tec_info' dataframe and the 'news', 'news_tickers' and 'news_topics' tables.
+    """
+    results = {'tec_info': dfs['merged_tec_info']}
+    for table in transformer.NEWS_TABLE_COLUMNS:
+        results[table] = dfs.get(table, pd.DataFrame())
+
+    return results
+
+def saved_data_checksums(config):
+    """
+    Returns the checksums of the saved files the loader returns when no new values are loaded
+    (`charge_new_values: false`), which identify its output without reading them.
+
+    Parameters:
+        config (dict): The loader configuration.
+
+    Returns:
+        dict: The checksum of every file, None for the files not saved.
+    """
+    backend = create_backend(config.get('storage'), config['combine_configuration'])
+    if isinstance(backend, SqliteBackend):
+        return {backend.path: file_checksum(backend.path)}
+
+    checksums = {}
+    for name in ['merged_tec_info', *transformer.NEWS_TABLE_COLUMNS]:
+        path = dataset_path(name, backend)
+        if not os.path.exists(path):
+            # A dataset not migrated yet is read from its CSV file
+            path = dataset_path(name, CsvBackend())
+        checksums[path] = file_checksum(path)
+
+    return checksums
+
+def run_backfill(config, client, backend, dataframes, h_dataframes, f_dataframes, queue=None):
+    """
+    Loads only the slices missing from the stored history, as planned by `backfill_planner.plan_backfill` for
+    the months of the configuration (every month since 'historical_year' when 'historical_needed' is set, the
+    current month otherwise), and combines them with the history. The size of the plan is reported
+    before running it. The merged technical dataset is rebuilt from the combined history, so a new period or
+    symbol is merged over its whole history.
+
+    The local indicators of the loaded bars are computed with `compute_indicators` before the combination,
+    warmed up with the stored bars, and through the persisted indicator states when they are enabled. A period
+    missing from the stored indicators is computed over the whole stored history.
+
+    With the SQLite storage, the loaded slices are upserted into the stored tables instead of being combined
+    with the whole history in memory.
+
+    With the 'streaming' ingestion mode, every fetched slice is appended to the partitioned store as soon as it
+    arrives instead of being kept in memory, and the months of the plan are read back from the store once the
+    fetch is finished.
+
+    Parameters:
+        config (dict): The loader configuration.
+        client (ApiClient): The client used to fetch the planned requests.
+        backend: The storage backend of the saved datasets.
+        dataframes (dict): Empty dataframes where the new data is loaded.
+        h_dataframes (dict): Empty dataframes where the history is retrieved.
+        f_dataframes (dict): Dataframes where the combined datasets are stored.
+        queue (WorkQueue, optional): Persistent queue where the responses are committed as they arrive, so
+            an interrupted backfill is resumed by the next run.
+
+    Returns:
+        dict: The combined and merged dataframes, ready to be saved.
+    """
+    h_dataframes = data_loader.retrieve_data(h_dataframes, backend)
+    months = ut.get_months(config['historical_year'], config['historical_needed'])
+    indicator_source = config.get('indicator_source', 'api')
+    plan_args = (config['symbols'], months, config['periods'], config['topics'], indicator_source)
+
+    tasks = backfill_planner.plan_backfill(h_dataframes, *plan_args)
+    backfill_planner.report_plan(tasks, len(backfill_planner.plan_backfill({}, *plan_args)))
+
+    max_workers = config.get('max_workers', 8) if config.get('fetch_mode', 'sequential') == 'concurrent' else 1
+    fetch = partial(data_loader.fetch_task, news_limit=config.get('news_limit', 1000),
+                    news_bisect=config.get('news_fetch_mode', 'bisect') == 'bisect')
+    if config.get('ingestion_mode', 'memory') == 'streaming':
+        store_backend = None if isinstance(backend, SqliteBackend) else backend
+        store = PartitionedStore(config.get('store_directory', 'data/store'), store_backend)
+        dataframes = data_loader.load_tasks(dataframes, client, tasks, max_workers, queue, store, fetch)
+        planned_months = {task.month for task in tasks}
+        for dataset in {task.dataset for task in tasks}:
+            for table in data_loader.TASK_TABLES.get(dataset, [dataset]):
+                dataframes[table] = store.read(table, planned_months)
+    else:
+        dataframes = data_loader.load_tasks(dataframes, client, tasks, max_workers, queue, fetch=fetch)
+    dataframes = data_loader.load_economics(dataframes, client, config['economic_indicators'], backend)
+    if indicator_source == 'local':
+        dataframes = compute_backfill_indicators(config, backend, months, dataframes, h_dataframes)
+
+    if isinstance(backend, SqliteBackend):
+        f_dataframes = data_loader.upsert_dataframes(dataframes, f_dataframes, backend)
+    else:
+        f_dataframes = data_loader.combine_dataframes(h_dataframes, dataframes, f_dataframes,
+                                                      config['combine_configuration'])
+    if not f_dataframes['ticker'].empty:
+        # The retrieved history has datetime months, the economic indicators are merged on 'YYYY-MM' strings
+        f_dataframes['ticker'] = transformer.manage_dates(f_dataframes['ticker'], None)
+
+    return data_loader.merge_datasets(f_dataframes, config['periods'], config['tec_columns'], config['economic_columns'])
+
+def compute_backfill_indicators(config, backend, months, dfs, h_dataframes):
+    """
+    Computes the local indicators of the bars loaded by the backfill with `compute_indicators`, warmed up with
+    the retrieved history. When a configured period is missing from the stored indicators, every stored bar
+    is computed again, so the new period covers the whole history.
+
+    Parameters:
+        config (dict): The loader configuration.
+        backend: The storage backend of the saved datasets.
+        months (list): The planned months, as 'YYYY-MM' strings.
+        dfs (dict): The loaded dataframes, with the 'ticker' dataset.
+        h_dataframes (dict): The retrieved history.
+
+    Returns:
+        dict: The loaded dataframes with the 'sma', 'rsi' and 'macd' datasets computed.
+    """
+    df_history = h_dataframes.get('ticker', pd.DataFrame())
+    if df_history.empty:
+        return compute_indicators(config, backend, months, dfs, df_history)
+
+    missing_periods = any(set(config['periods'][key]) - set(h_dataframes[key]['period'] if not
+                                                              h_dataframes[key].empty else [])
+                          for key in ['sma', 'rsi'])
+    if missing_periods:
+        df_bars = pd.concat([df_history, dfs['ticker']]) if not dfs['ticker'].empty else df_history
+        df_bars = df_bars.drop_duplicates(subset=['ticker', 'datetime'], keep='last').sort_values(by='datetime')
+        computed = compute_indicators(config, backend, months, {'ticker': df_bars}, df_history.iloc[:0])
+        for key in ['sma', 'rsi', 'macd']:
+            dfs[key] = computed[key]
+        return dfs
 
-    h_dataframes = data_loader.retrieve_data(h_dataframes)
-    return {'tec_info': h_dataframes['merged_tec_info'], 'news': h_dataframes['news']}
\ No newline at end of file
+    return compute_indicators(config, backend, months, dfs, df_history)
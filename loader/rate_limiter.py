@@ -0,0 +1,203 @@
+import os
+import time
+import sqlite3
+import threading
+
+class TokenBucket:
+
+    def __init__(self, requests_per_minute=75, burst=5):
+        """
+        In-process token bucket rate limiter. The bucket holds up to `burst` tokens and is refilled
+        continuously; every request takes one token, and waits when none is available.
+
+        The refill rate is `(requests_per_minute - burst) / 60` tokens per second, so the requests
+        admitted in any rolling minute (the initial burst plus the refilled tokens) never exceed
+        `requests_per_minute`.
+
+        Each acquire has a constant cost: the bucket only keeps the number of tokens and the time of
+        the last update. When no token is available, the caller reserves the next one (the token count
+        goes below zero) and sleeps outside the lock, so waiting threads are admitted in order.
+
+        Attributes:
+            requests_per_minute (int): Maximum number of requests admitted in any rolling minute.
+            capacity (int): Maximum number of tokens in the bucket.
+            refill_rate (float): Tokens added to the bucket per second.
+            tokens (float): Tokens currently available. Negative values are tokens already reserved.
+            updated (float): Monotonic time of the last update of `tokens`.
+            lock (threading.Lock): Lock protecting the bucket state.
+        """
+        if burst < 1 or burst >= requests_per_minute:
+            raise ValueError('The burst must be at least 1 and lower than the number of requests per minute')
+
+        self.requests_per_minute = requests_per_minute
+        self.capacity = burst
+        self.refill_rate = (requests_per_minute - burst) / 60
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes one token from the bucket without waiting for it.
+
+        Returns:
+            float: The time in seconds until the taken token is available.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens, wait_time = take_token(self.tokens, now - self.updated, self.capacity, self.refill_rate)
+            self.updated = now
+
+        return wait_time
+
+    def acquire(self):
+        """
+        Takes one token from the bucket, waiting until it is available.
+
+        Returns:
+            float: The time in seconds the caller had to wait.
+        """
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return wait_time
+
+    def available(self):
+        """
+        Returns the number of tokens currently available, without taking any. Negative values are tokens
+        already reserved.
+        """
+        with self.lock:
+            return min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.refill_rate)
+
+class SqliteTokenBucket:
+
+    def __init__(self, path='data/rate_limit.sqlite', name='alphavantage', requests_per_minute=75, burst=5):
+        """
+        Token bucket rate limiter shared by several processes through a local SQLite database. It has the
+        same behavior as `TokenBucket`, but the bucket state is stored in a row of the database and updated
+        inside an exclusive transaction, so every process (and every thread) using the same file and name
+        shares one request budget, e.g. one API key.
+
+        Attributes:
+            path (str): Path of the SQLite database file.
+            name (str): Name of the bucket, which allows several buckets in the same file.
+            requests_per_minute (int): Maximum number of requests admitted in any rolling minute.
+            capacity (int): Maximum number of tokens in the bucket.
+            refill_rate (float): Tokens added to the bucket per second.
+        """
+        if burst < 1 or burst >= requests_per_minute:
+            raise ValueError('The burst must be at least 1 and lower than the number of requests per minute')
+
+        self.path = path
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.capacity = burst
+        self.refill_rate = (requests_per_minute - burst) / 60
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+            connection.execute('INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)', (name, float(burst), time.time()))
+
+    def _connect(self):
+        """
+        Opens a connection to the database. A new connection is used for each acquire, so the limiter
+        can be used from any thread, and a generous timeout lets the processes queue for the lock.
+        """
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def reserve(self):
+        """
+        Takes one token from the shared bucket without waiting for it.
+
+        Returns:
+            float: The time in seconds until the taken token is available.
+        """
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            tokens, updated = connection.execute('SELECT tokens, updated FROM buckets WHERE name = ?',
+                                                 (self.name,)).fetchone()
+            now = time.time()
+            tokens, wait_time = take_token(tokens, max(now - updated, 0), self.capacity, self.refill_rate)
+            connection.execute('UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?', (tokens, now, self.name))
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+        return wait_time
+
+    def acquire(self):
+        """
+        Takes one token from the shared bucket, waiting until it is available.
+
+        Returns:
+            float: The time in seconds the caller had to wait.
+        """
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return wait_time
+
+    def available(self):
+        """
+        Returns the number of tokens currently available in the shared bucket, without taking any.
+        """
+        connection = self._connect()
+        try:
+            tokens, updated = connection.execute('SELECT tokens, updated FROM buckets WHERE name = ?',
+                                                 (self.name,)).fetchone()
+        finally:
+            connection.close()
+
+        return min(self.capacity, tokens + max(time.time() - updated, 0) * self.refill_rate)
+
+def take_token(tokens, elapsed, capacity, refill_rate):
+    """
+    Refills a token bucket for the elapsed time and takes one token from it.
+
+    Parameters:
+        tokens (float): Tokens in the bucket at the last update. Negative values are reserved tokens.
+        elapsed (float): Seconds since the last update.
+        capacity (int): Maximum number of tokens in the bucket.
+        refill_rate (float): Tokens added per second.
+
+    Returns:
+        tuple[float, float]: The remaining tokens, and the seconds to wait until the taken token is
+        available (0 if it was already available).
+    """
+    tokens = min(capacity, tokens + elapsed * refill_rate) - 1
+    wait_time = -tokens / refill_rate if tokens < 0 else 0.0
+
+    return tokens, wait_time
+
+def create_rate_limiter(config, name='alphavantage'):
+    """
+    Creates the rate limiter described by the 'rate_limit' section of the loader configuration.
+
+    Parameters:
+        config (dict): Rate limit configuration with the keys 'requests_per_minute', 'burst', 'backend'
+            ('memory' or 'sqlite') and 'sqlite_path'.
+        name (str): Name of the bucket when the SQLite backend is used. Defaults to 'alphavantage'.
+
+    Returns:
+        TokenBucket | SqliteTokenBucket: The configured rate limiter.
+
+    Raises:
+        ValueError: If the backend is not supported.
+    """
+    requests_per_minute = config.get('requests_per_minute', 75)
+    burst = config.get('burst', 5)
+    backend = config.get('backend', 'memory')
+
+    if backend == 'memory':
+        return TokenBucket(requests_per_minute, burst)
+    if backend == 'sqlite':
+        return SqliteTokenBucket(config.get('sqlite_path', 'data/rate_limit.sqlite'), name, requests_per_minute, burst)
+
+    raise ValueError(f'Unsupported rate limit backend: {backend}')
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from utils.utils import get_time_now
+
+class ResponseCache:
+
+    def __init__(self, directory='data/cache', ttl_seconds=3600, max_size_mb=1024):
+        """
+        Persistent on-disk cache for the responses of the Alpha Vantage API. Every response is stored in a
+        JSON file whose name is the SHA-256 hash of the normalized request parameters (without the API key),
+        so the same request always resolves to the same entry.
+
+        Responses for closed months (historical months of intraday series, technical indicators or news)
+        cannot change any more and never expire. Responses for the current month, and requests without a
+        month such as economic indicators, expire after `ttl_seconds`. When the cache grows over
+        `max_size_mb`, the least recently used entries are evicted.
+
+        Attributes:
+            directory (str): Folder where the cached responses are stored.
+            ttl_seconds (int): Lifetime in seconds of the entries which can still change.
+            max_size_bytes (int): Maximum size of the cache before evicting entries.
+            hits (int): Number of requests served from the cache.
+            misses (int): Number of requests not found (or expired) in the cache.
+            bytes_saved (int): Size of the responses served from the cache instead of the network.
+            entries (dict): Index of the stored entries, mapping the key to its size and last access time.
+            lock (threading.Lock): Lock protecting the index and the counters, as the cache is shared
+                by the concurrent fetch workers.
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.entries = {}
+        self.lock = threading.Lock()
+        self._load_index()
+
+    @staticmethod
+    def make_key(params):
+        """
+        Builds the cache key of a request from its parameters.
+
+        The API key and the parameters without value are ignored, and the remaining parameters are
+        serialized with sorted keys, so the key does not depend on the parameter order.
+
+        Parameters:
+            params (dict): The query parameters of the request.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest identifying the request.
+        """
+        normalized = {key: str(value) for key, value in params.items() if key != 'apikey' and value is not None}
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_closed(params, now=None):
+        """
+        Checks whether the data requested by the given parameters belongs to a closed month.
+
+        A request is closed when its 'month' parameter (format 'YYYY-MM') or, for news, the month of its
+        'time_to' parameter (format 'YYYYMMDDTHHMM') is previous to the current month. Requests without any
+        of these parameters, such as economic indicators, are never closed.
+
+        Parameters:
+            params (dict): The query parameters of the request.
+            now (datetime, optional): Reference date. Defaults to the current date.
+
+        Returns:
+            bool: True if the response can not change any more.
+        """
+        now = now or datetime.now()
+        current = (now.year, now.month)
+
+        month = params.get('month')
+        if month:
+            year, month_number = str(month).split('-')[:2]
+            return (int(year), int(month_number)) < current
+
+        time_to = params.get('time_to')
+        if time_to:
+            time_to = str(time_to)
+            return (int(time_to[:4]), int(time_to[4:6])) < current
+
+        return False
+
+    def _path(self, key):
+        """
+        Returns the path of the file storing the given key. Entries are spread in subfolders by the
+        first two characters of the key to keep the folders small.
+        """
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def _load_index(self):
+        """
+        Scans the cache folder and rebuilds the index of stored entries with their size and last access time.
+        """
+        if not os.path.isdir(self.directory):
+            return
+
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith('.json'):
+                    stat = os.stat(os.path.join(root, file_name))
+                    self.entries[file_name[:-5]] = {'size': stat.st_size, 'last_access': stat.st_mtime}
+
+    def get(self, params):
+        """
+        Returns the cached response for the given request parameters, if it exists and has not expired.
+
+        Parameters:
+            params (dict): The query parameters of the request.
+
+        Returns:
+            dict | None: The cached response, or None on a cache miss.
+        """
+        key = self.make_key(params)
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as cache_file:
+                raw = cache_file.read()
+            entry = json.loads(raw)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        if not entry['closed'] and time.time() - entry['stored_at'] > self.ttl_seconds:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += len(raw)
+            self.entries[key] = {'size': len(raw), 'last_access': now}
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+        return entry['data']
+
+    def put(self, params, data):
+        """
+        Stores the response of a request. The file is written to a temporary path and then renamed, so
+        concurrent readers never see a partially written entry. The least recently used entries are
+        evicted afterward if the cache exceeds its maximum size.
+
+        Parameters:
+            params (dict): The query parameters of the request.
+            data (dict): The response returned by the API.
+        """
+        key = self.make_key(params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {'closed': self.is_closed(params), 'stored_at': time.time(), 'data': data}
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temp_path, path)
+
+        with self.lock:
+            self.entries[key] = {'size': os.path.getsize(path), 'last_access': time.time()}
+            self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache size is below its maximum size.
+        Must be called while holding `lock`.
+        """
+        total_size = sum(entry['size'] for entry in self.entries.values())
+        if total_size <= self.max_size_bytes:
+            return
+
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_access']):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            total_size -= self.entries.pop(key)['size']
+
+    def stats(self):
+        """
+        Returns the usage statistics of the cache.
+
+        Returns:
+            dict: The number of hits and misses, the hit rate, the bytes served from the cache instead of
+            the network, and the number and total size of the stored entries.
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 4) if requests else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'entries': len(self.entries),
+                'size_bytes': sum(entry['size'] for entry in self.entries.values())
+            }
+
+    def report(self):
+        """
+        Prints the usage statistics of the cache.
+        """
+        stats = self.stats()
+        print(f"{get_time_now()} :: Response cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"(hit rate {stats['hit_rate']:.2%}), {stats['bytes_saved'] / 1024 / 1024:.2f} MB saved, "
+              f"{stats['entries']} entries ({stats['size_bytes'] / 1024 / 1024:.2f} MB)")
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from utils.utils import get_time_now
+
+class WorkQueue:
+
+    def __init__(self, path='data/work_queue.sqlite'):
+        """
+        Persistent queue of the requests of a backfill, stored in a local SQLite database. Every FetchTask
+        is a row with a 'pending', 'done' or 'failed' status, and the raw response of every completed request
+        is committed with it as soon as it arrives.
+
+        When a run is interrupted (a network drop, Ctrl-C...), the next run enqueues the same plan and only
+        requests the slices which are not done yet; the stored responses are replayed through the usual
+        transformations, so no rate budget is spent on them again. The queue is cleared once the datasets
+        have been saved.
+
+        Attributes:
+            path (str): Path of the SQLite database file.
+            lock (threading.Lock): Lock serializing the writes of the concurrent fetch workers.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._execute('CREATE TABLE IF NOT EXISTS slices (key TEXT PRIMARY KEY, dataset TEXT, month TEXT, '
+                      'status TEXT, attempts INTEGER, response TEXT, updated REAL)')
+
+    def _execute(self, query, parameters=(), many=False):
+        """
+        Executes a statement in its own transaction and returns the fetched rows. A new connection is used
+        for each statement, so the queue can be used from any thread.
+        """
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                if many:
+                    return connection.executemany(query, parameters).fetchall()
+                return connection.execute(query, parameters).fetchall()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(task):
+        """
+        Builds the key of a FetchTask, the JSON list of its fields.
+        """
+        return json.dumps(list(task))
+
+    def enqueue(self, tasks):
+        """
+        Adds the tasks of a plan to the queue as pending. Tasks already in the queue keep their status, so
+        the slices completed by a previous run are not requested again.
+
+        Parameters:
+            tasks (list[FetchTask]): The planned requests.
+        """
+        rows = [(self.make_key(task), task.dataset, task.month, 'pending', 0, None, time.time()) for task in tasks]
+        with self.lock:
+            self._execute('INSERT OR IGNORE INTO slices VALUES (?, ?, ?, ?, ?, ?, ?)', rows, many=True)
+
+    def pending(self, tasks):
+        """
+        Returns the tasks of a plan which are not done yet, keeping their order.
+
+        Parameters:
+            tasks (list[FetchTask]): The planned requests.
+
+        Returns:
+            list[FetchTask]: The tasks still pending or failed.
+        """
+        done = {row[0] for row in self._execute("SELECT key FROM slices WHERE status = 'done'")}
+
+        return [task for task in tasks if self.make_key(task) not in done]
+
+    def mark_done(self, task, data):
+        """
+        Commits the response of a completed task.
+
+        Parameters:
+            task (FetchTask): The completed request.
+            data (dict | list): The response returned by the client.
+        """
+        self._update(task, 'done', json.dumps(data))
+
+    def mark_failed(self, task):
+        """
+        Marks a task as failed, so it is requested again by the next run.
+
+        Parameters:
+            task (FetchTask): The failed request.
+        """
+        self._update(task, 'failed', None)
+
+    def _update(self, task, status, response):
+        """
+        Stores the status and the response of a task, counting one more attempt.
+        """
+        with self.lock:
+            self._execute('UPDATE slices SET status = ?, attempts = attempts + 1, response = ?, updated = ? '
+                          'WHERE key = ?', (status, response, time.time(), self.make_key(task)))
+
+    def response(self, task):
+        """
+        Returns the stored response of a completed task.
+
+        Parameters:
+            task (FetchTask): The request.
+
+        Returns:
+            dict | list | None: The stored response, or None if the task is not done.
+        """
+        rows = self._execute("SELECT response FROM slices WHERE key = ? AND status = 'done'", (self.make_key(task),))
+
+        return json.loads(rows[0][0]) if rows else None
+
+    def counts(self):
+        """
+        Returns the number of tasks of every status.
+
+        Returns:
+            dict: A dictionary mapping every status to its number of tasks.
+        """
+        return dict(self._execute('SELECT status, COUNT(*) FROM slices GROUP BY status'))
+
+    def report(self):
+        """
+        Prints the number of tasks of every status.
+        """
+        counts = self.counts()
+        print(f"{get_time_now()} :: Work queue: {counts.get('done', 0)} done, {counts.get('pending', 0)} pending, "
+              f"{counts.get('failed', 0)} failed")
+
+    def clear(self):
+        """
+        Removes every task from the queue, once the datasets built from it have been saved.
+        """
+        with self.lock:
+            self._execute('DELETE FROM slices')
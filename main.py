@@ -5,6 +5,47 @@ import utils.eda as eda
 import model.model as model
 import loader.loader as loader
 import gen_dataset.gen_dataset as gen_dataset
+from utils.background_writer import background_writer
+from utils.stage_manifest import StageManifest, frame_checksum
+
+def load_and_generate(config):
+    """
+    Runs the loader and the dataset generation, skipping the stages whose inputs have not changed since the last
+    run, as recorded in the stage manifest.
+
+    When no new values are loaded, the loader output is identified by the checksums of the saved files, so with
+    the same files and configurations neither the loader nor the dataset generation are run, and the stored
+    generated dataset is loaded. Otherwise the loader is run and the generation is skipped if the loaded data
+    is the same as in the last run.
+
+    Parameters:
+        config (dict): The main configuration.
+
+    Returns:
+        DataFrame: The generated dataset.
+    """
+    manifest_config = config.get('stage_manifest', {})
+    if not manifest_config.get('enabled', False):
+        return gen_dataset.run_gen_dataset(loader.run_loader())
+
+    manifest = StageManifest(manifest_config.get('directory', 'data/stages'))
+    loader_config = ut.load_config('loader_config')
+    dataframes = None
+    if loader_config['charge_new_values']:
+        dataframes = loader.run_loader()
+        data_checksums = {table: frame_checksum(df) for table, df in dataframes.items()}
+    else:
+        data_checksums = loader.saved_data_checksums(loader_config)
+
+    inputs = {
+        'data': data_checksums,
+        'storage': loader_config.get('storage'),
+        'gen_dataset_config': ut.load_config('gen_dataset_config'),
+        'feature_eng_config': ut.load_config('feature_eng_config')
+    }
+
+    return manifest.run_stage('gen_dataset', inputs, lambda: gen_dataset.run_gen_dataset(
+        dataframes if dataframes is not None else loader.run_loader()))
 
 def main():
     """
@@ -16,7 +57,9 @@ def main():
     steps such as initializing the configuration logger, running data loaders,
     generating datasets, optionally performing exploratory data analysis if
     configured, and executing the desired model logic. The generated dataset
-    is saved to a CSV file for further usage.
+    is saved to a CSV file for further usage. The loading and generation are
+    skipped when their inputs have not changed since the last run. The files are written in the
+    background while the next steps run, and every write is waited for at the end.
 
     Parameters:
         No parameters are required for this function.
@@ -26,14 +69,16 @@ def main():
     """
     config = ut.load_config('main_config')
 
-    dataframes = loader.run_loader()
-    df_aqf = gen_dataset.run_gen_dataset(dataframes)
+    df_aqf = load_and_generate(config)
 
     if config.get('exec_eda', False):
         eda.run_eda(df_aqf)
 
     model.run_model(df_aqf)
 
+    # Barrier: every file written in the background is complete and on disk
+    background_writer().flush()
+
 if __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     main()
\ No newline at end of file
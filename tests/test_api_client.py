@@ -39,3 +39,41 @@ def test_get_data_failure(mock_get, api_client):
 
     assert "API request failed" in str(exc_info.value)
     mock_get.assert_called_once_with(f"{BASE_URL}/test_endpoint", params={"symbol": "INVALID", "apikey": API_KEY})
+
+def json_response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    return response
+
+@pytest.fixture
+def retry_client():
+    client = ApiClient(rate_limiter=MagicMock(), max_retries=2, backoff_base=0)
+    client.rate_limiter.reserve.return_value = 0
+    # Sin enfriamiento de la clave tras un throttling, para no esperar en los reintentos
+    client.key_pool.cooldown_seconds = 0
+    client.session.get = MagicMock()
+    return client
+
+def test_get_retries_throttled_response(retry_client):
+    throttled = json_response({"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is..."})
+    valid = json_response({"feed": []})
+    retry_client.session.get.side_effect = [throttled, valid]
+
+    # La respuesta de throttling se reintenta en lugar de tratarse como datos vacíos
+    assert retry_client._get({"function": "NEWS_SENTIMENT"}) == {"feed": []}
+    assert retry_client.session.get.call_count == 2
+    assert retry_client.rate_limiter.reserve.call_count == 2
+
+def test_get_retries_connection_errors(retry_client):
+    import requests
+    retry_client.session.get.side_effect = requests.exceptions.ConnectionError("connection reset")
+
+    assert retry_client._get({"function": "CPI"}) is None
+    assert retry_client.session.get.call_count == 3
+
+def test_get_does_not_retry_api_errors(retry_client):
+    retry_client.session.get.return_value = json_response({"Error Message": "Invalid API call."})
+
+    assert retry_client._get({"function": "SMA"}) is None
+    assert retry_client.session.get.call_count == 1
@@ -0,0 +1,95 @@
+import pandas as pd
+from functools import partial
+from unittest.mock import MagicMock
+from loader.backfill_planner import plan_backfill, closed_slices, normalize_month
+from loader.data_loader import FetchTask, load_tasks, fetch_task
+
+MONTHS = ["2024-01", "2024-02", "2024-03"]
+CURRENT_MONTH = "2024-04"
+
+def history(symbols, periods, months):
+    # Historial con una barra por mes, serie y periodo, con el mismo formato que data/df_*.csv
+    datetimes = [f"{month}-15 10:00:00" for month in months]
+    ticker = pd.DataFrame([{"ticker": s, "datetime": d, "close": 1.0} for s in symbols for d in datetimes])
+    sma = pd.DataFrame([{"ticker": s, "datetime": d, "period": p, "sma": 1.0}
+                        for s in symbols for p in periods["sma"] for d in datetimes])
+    rsi = pd.DataFrame([{"ticker": s, "datetime": d, "period": p, "rsi": 50.0}
+                        for s in symbols for p in periods["rsi"] for d in datetimes])
+    news = pd.DataFrame([{"topic": "technology", "datetime": d, "title": "t"} for d in datetimes])
+    return {"ticker": ticker, "macd": ticker.copy(), "sma": sma, "rsi": rsi, "news": news}
+
+def test_normalize_month():
+    assert normalize_month("2024-3") == "2024-03"
+    assert normalize_month("2024-11") == "2024-11"
+
+def test_last_stored_month_is_not_closed():
+    slices = closed_slices(history(["NVDA"], {"sma": [5], "rsi": []}, MONTHS)["sma"], "sma")
+
+    # El último mes pudo guardarse antes de cerrarse, por eso se vuelve a pedir
+    assert slices == {("NVDA", 5): {"2024-01", "2024-02"}}
+
+def test_empty_history_plans_everything():
+    periods = {"sma": [5], "rsi": [7]}
+    tasks = plan_backfill({}, ["NVDA"], MONTHS, periods, ["technology"], current_month=CURRENT_MONTH)
+
+    assert len(tasks) == len(MONTHS) * (4 + 1)
+
+def test_complete_history_only_plans_open_months():
+    periods = {"sma": [5], "rsi": [7]}
+    h_dfs = history(["NVDA"], periods, MONTHS + [CURRENT_MONTH])
+
+    tasks = plan_backfill(h_dfs, ["NVDA"], MONTHS + ["2024-4"], periods, ["technology"],
+                          current_month=CURRENT_MONTH)
+
+    assert {task.month for task in tasks} == {CURRENT_MONTH}
+    assert len(tasks) == 5
+
+def test_new_period_and_symbol_only_request_their_slices():
+    periods = {"sma": [5], "rsi": [7]}
+    h_dfs = history(["NVDA"], periods, MONTHS + [CURRENT_MONTH])
+    new_periods = {"sma": [5], "rsi": [7, 14]}
+
+    tasks = plan_backfill(h_dfs, ["NVDA", "AAPL"], MONTHS, new_periods, [], current_month=CURRENT_MONTH)
+
+    # Solo el nuevo periodo del RSI para NVDA y todas las series del nuevo símbolo
+    nvda = [task for task in tasks if task.symbol == "NVDA"]
+    aapl = [task for task in tasks if task.symbol == "AAPL"]
+    assert nvda == [FetchTask("rsi", "NVDA", month, 14) for month in MONTHS]
+    assert len(aapl) == len(MONTHS) * 5
+
+def test_local_indicators_only_plan_ticker():
+    tasks = plan_backfill({}, ["NVDA"], MONTHS, {"sma": [5], "rsi": [7]}, [], indicator_source="local",
+                          current_month=CURRENT_MONTH)
+
+    assert {task.dataset for task in tasks} == {"ticker"}
+
+def news_item(title="Title"):
+    return {
+        "title": title,
+        "time_published": "20240105T101500",
+        "overall_sentiment_score": 0.1,
+        "overall_sentiment_label": "Neutral",
+        "ticker_sentiment": [{"ticker": "NVDA", "relevance_score": "0.5", "ticker_sentiment_score": "0.2",
+                              "ticker_sentiment_label": "Neutral"}],
+        "topics": [{"topic": "Technology", "relevance_score": "1.0"}]
+    }
+
+def test_load_tasks_fetches_news():
+    client = MagicMock()
+    client.get_news_sentiment.return_value = [news_item()]
+
+    dfs = load_tasks({"news": pd.DataFrame()}, client, [FetchTask("news", None, "2024-01", None, "technology")])
+
+    client.get_news_sentiment.assert_called_once_with("technology", "20240101T0000", "20240131T2359", limit=1000)
+    assert dfs["news"]["topic"].tolist() == ["technology"]
+
+def test_load_tasks_uses_the_configured_news_settings():
+    client = MagicMock()
+    client.get_news_sentiment.return_value = [news_item(f"Title {index}") for index in range(10)]
+
+    # Con el límite configurado y sin bisección, una respuesta saturada no se divide
+    fetch = partial(fetch_task, news_limit=10, news_bisect=False)
+    load_tasks({"news": pd.DataFrame()}, client, [FetchTask("news", None, "2024-01", None, "technology")],
+               fetch=fetch)
+
+    client.get_news_sentiment.assert_called_once_with("technology", "20240101T0000", "20240131T2359", limit=10)
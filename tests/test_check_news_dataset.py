@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from gen_dataset.check_news_dataset import CheckNewsDataset
+
+def make_news(dtype, size=20000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"datetime": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 3000, size), unit="h"),
+                       "overall_sentiment_score": rng.normal(size=size).round(6),
+                       "relevance_score": rng.random(size).round(6),
+                       "article_id": rng.integers(0, size // 2, size)})
+    df = df.astype({"overall_sentiment_score": dtype, "relevance_score": dtype})
+    # Valores perdidos, y horas sin ningún valor de una columna
+    df.loc[rng.random(size) < 0.1, "overall_sentiment_score"] = np.nan
+    df.loc[df["datetime"] < "2024-01-03", "relevance_score"] = np.nan
+    df["w_ticker_ossm"] = df["overall_sentiment_score"] * df["relevance_score"]
+    return df
+
+def lambda_aggregation(df):
+    # Implementación anterior, con una función de Python por hora y columna
+    return df.groupby("datetime").agg({
+        "overall_sentiment_score": lambda x: round(x.mean(), 6),
+        "relevance_score": lambda x: round(x.mean(), 6),
+        "w_ticker_ossm": lambda x: round(x.sum() / max(x.count(), 1), 6),
+        "article_id": "nunique"
+    }).reset_index()
+
+def test_aggregation_matches_the_lambdas():
+    checker = CheckNewsDataset.__new__(CheckNewsDataset)
+    for dtype in ["float64", "float32"]:
+        df = make_news(dtype)
+        expected = lambda_aggregation(df)
+        df_means = checker.aggregate_by_datetime(df, means=["overall_sentiment_score", "relevance_score"],
+                                                 weighted_means=["w_ticker_ossm"], nunique="article_id")
+
+        # Los mismos tipos, y como mucho una unidad del sexto decimal de diferencia: las medias en un empate del
+        # redondeo, o las que el float32 acumulaba con error
+        pd.testing.assert_frame_equal(df_means, expected, check_exact=False, rtol=0,
+                                      atol=1e-6 + 4 * np.finfo(dtype).eps)
+        assert (df_means["w_ticker_ossm"] == 0).sum() == (expected["w_ticker_ossm"] == 0).sum() > 0
+
+    # Las métricas de un topic cuentan también las noticias de cada hora
+    df_topic = checker.aggregate_by_datetime(df, means=["overall_sentiment_score"], size="news_count")
+    assert df_topic["news_count"].tolist() == df.groupby("datetime").size().astype(float).tolist()
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from gen_dataset.check_tec_dataset import CheckTecDataset
+from utils.schema import apply_schema
+
+def looped_fill_missing_hours(df):
+    # Implementación anterior: un filtro por día y una copia de la fila por cada hora rellenada
+    unique_days = df[["year", "month", "day"]].drop_duplicates()
+    filled_rows = []
+    for year, month, day in unique_days.itertuples(index=False, name=None):
+        day_data = df[(df["year"] == year) & (df["month"] == month) & (df["day"] == day)]
+        missing_hours = sorted(set(range(24)) - set(day_data["time"].unique()))
+        first_hour_data = day_data[day_data["time"] == day_data["time"].min()].iloc[0]
+        last_hour_data = day_data[day_data["time"] == day_data["time"].max()].iloc[0]
+        for hour in missing_hours:
+            row = None
+            if hour < day_data["time"].min():
+                row = first_hour_data.copy()
+            elif hour > day_data["time"].max():
+                row = last_hour_data.copy()
+            if row is not None:
+                row["time"] = hour
+                filled_rows.append(row)
+    if filled_rows:
+        df = pd.concat([df, pd.DataFrame(filled_rows)], ignore_index=True)
+    df["hour"] = df["time"].astype(int)
+    df["datetime"] = pd.to_datetime(df[["year", "month", "day", "hour"]])
+    return df.drop(columns=["hour"])
+
+def looped_fill_missing_days(df):
+    # Implementación anterior: un filtro de todo el dataset y 24 copias de la fila por cada día perdido
+    df["datetime"] = pd.to_datetime(df[["year", "month", "day"]]) + pd.to_timedelta(df["time"], unit="h")
+    full_date_range = pd.date_range(start=df["datetime"].min().normalize(),
+                                    end=df["datetime"].max().normalize() - pd.Timedelta(days=1), freq="D")
+    missing_dates = sorted(set(full_date_range.date) - set(df["datetime"].dt.date.unique()))
+    filled_rows = []
+    for missing_date in missing_dates:
+        previous_day_data = df[df["datetime"].dt.date < missing_date]
+        last_day_data = previous_day_data[previous_day_data["datetime"] == previous_day_data["datetime"].max()]
+        for hour in range(24):
+            row = last_day_data.iloc[0].copy()
+            row["year"], row["month"], row["day"], row["time"] = (missing_date.year, missing_date.month,
+                                                                  missing_date.day, hour)
+            row["datetime"] = pd.Timestamp(year=row["year"], month=row["month"], day=row["day"], hour=row["time"])
+            filled_rows.append(row)
+    if filled_rows:
+        df = pd.concat([df, pd.DataFrame(filled_rows)], ignore_index=True)
+    return df.sort_values(by=["datetime"]).reset_index(drop=True)
+
+def make_checker():
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range("2024-01-02", periods=24 * 6, freq="h")
+    # Sesiones de 4 a 19 horas, con horas perdidas al principio, en medio y al final de algunos días
+    datetimes = datetimes[(datetimes.hour >= 4) & (datetimes.hour <= 19)].delete([0, 1, 20, 31, 40, 47])
+    df = pd.DataFrame({"ticker": "NVDA", "datetime": datetimes, "close": rng.normal(size=len(datetimes)),
+                       "volume": rng.integers(0, 1000, len(datetimes)), "sma_5": rng.normal(size=len(datetimes))})
+    df["date"] = df["datetime"].dt.normalize()
+    df["year_month"] = df["datetime"].dt.strftime("%Y-%m")
+    checker = CheckTecDataset(apply_schema(df, "merged_tec_info"))
+    checker.split_date()
+    return checker
+
+def test_fill_missing_hours_matches_looped_fill():
+    checker = make_checker()
+    expected = looped_fill_missing_hours(checker.df.copy())
+
+    df = checker.fill_missing_hours()
+
+    # Los tipos de las columnas se conservan, la implementación anterior convertía el ticker en texto
+    assert df["ticker"].dtype == "category"
+    assert df["sma_5"].dtype == "float32"
+    pd.testing.assert_frame_equal(df.astype({"ticker": str}), expected, check_dtype=False)
+    # Las horas entre dos barras del mismo día no se rellenan
+    day_3 = df[df["datetime"].dt.day == 3]
+    assert len(day_3) == 23 and 8 not in set(day_3["time"])
+
+def test_fill_missing_hours_fills_every_ticker_on_its_own():
+    checker = make_checker()
+    # Un segundo ticker con otras horas perdidas: el día 2 empieza antes y el día 4 acaba antes
+    df_aapl = checker.df.assign(ticker="AAPL", close=checker.df["close"] + 100)
+    df_aapl = pd.concat([df_aapl, df_aapl[(df_aapl["day"] == 2) & (df_aapl["time"] == 6)].assign(time=3)])
+    df_aapl = df_aapl[~((df_aapl["day"] == 4) & (df_aapl["time"] > 15))]
+    checker.df = apply_schema(pd.concat([checker.df, df_aapl], ignore_index=True), "merged_tec_info")
+    source = checker.df.astype({"ticker": str})
+    # La implementación anterior por ticker; la de todos los tickers a la vez rellenaba cada día con la primera o
+    # la última barra de uno solo de ellos
+    expected = pd.concat([looped_fill_missing_hours(source[source["ticker"] == ticker].copy())
+                          for ticker in ["NVDA", "AAPL"]], ignore_index=True)
+
+    df = checker.fill_missing_hours().astype({"ticker": str})
+
+    pd.testing.assert_frame_equal(df.sort_values(["ticker", "datetime"]).reset_index(drop=True),
+                                  expected.sort_values(["ticker", "datetime"]).reset_index(drop=True),
+                                  check_dtype=False)
+    all_tickers = looped_fill_missing_hours(source.copy())
+    assert len(df) > len(all_tickers)
+    # Las últimas horas del día 4 de AAPL repiten su propia última barra, no la de NVDA
+    day_4 = df[(df["ticker"] == "AAPL") & (df["day"] == 4)].set_index("time")["close"]
+    assert (day_4.loc[16:] == day_4.loc[15]).all() and day_4.index.max() == 23
+
+def test_fill_missing_days_matches_looped_fill():
+    checker = make_checker()
+    # Un cierre de varios días, con la última barra anterior repetida
+    df = checker.df[~checker.df["day"].isin([4, 5])]
+    checker.df = pd.concat([df, df[df["day"] == 3].tail(1).assign(close=0.0)], ignore_index=True)
+    expected = looped_fill_missing_days(checker.df.copy())
+
+    df = checker.fill_missing_days()
+
+    assert df["ticker"].dtype == "category"
+    pd.testing.assert_frame_equal(df.astype({"ticker": str}), expected, check_dtype=False)
+    # Los días perdidos repiten la primera de las últimas barras anteriores
+    assert (df.loc[df["day"] == 4, "close"] != 0.0).all() and len(df[df["day"] == 5]) == 24
@@ -1,6 +1,6 @@
 import pytest
 import pandas as pd
-from loader.data_transform import manage_dates, transform_intraday
+from loader.data_transform import manage_dates, transform_intraday, transform_sma, transform_rsi, transform_macd
 
 @pytest.fixture
 def sample_dataframe():
@@ -38,3 +38,28 @@ def test_transform_intraday():
     assert "ticker" in transformed_df.columns
     assert transformed_df["open"].iloc[0] == 100.0
     assert transformed_df["ticker"].iloc[0] == symbol
+
+def test_transform_intraday_parses_datetimes_once():
+    raw_data = {
+        "2023-01-31 19:00:00": {"1. open": "1.5", "2. high": "2", "3. low": "1", "4. close": "1.75", "5. volume": "7"},
+        "2023-02-01 04:00:30": {"1. open": "2", "2. high": "3", "3. low": "1", "4. close": "2.5", "5. volume": "8"}
+    }
+    transformed_df = transform_intraday("AAPL", raw_data)
+
+    # Las fechas se guardan como datetime64, sin segundos, y el mes se deriva de ellas
+    assert pd.api.types.is_datetime64_any_dtype(transformed_df["datetime"])
+    assert transformed_df["datetime"].tolist() == [pd.Timestamp("2023-01-31 19:00"), pd.Timestamp("2023-02-01 04:00")]
+    assert transformed_df["year_month"].tolist() == ["2023-01", "2023-02"]
+    assert transformed_df["volume"].dtype == "int64"
+
+def test_transform_indicators_columns():
+    df_sma = transform_sma("AAPL", {"2023-01-02 10:00": {"SMA": "101.5"}}, 5)
+    df_rsi = transform_rsi("AAPL", {"2023-01-02 10:00": {"RSI": "55.25"}}, 7)
+    df_macd = transform_macd("AAPL", {"2023-01-02 10:00": {"MACD": "0.5", "MACD_Signal": "0.25", "MACD_Hist": "0.25"}})
+
+    assert list(df_sma.columns) == ["ticker", "datetime", "sma", "period", "date", "year_month"]
+    assert df_sma["sma"].iloc[0] == 101.5 and df_sma["period"].iloc[0] == 5
+    assert df_rsi["rsi"].iloc[0] == 55.25 and df_rsi["period"].iloc[0] == 7
+    # Los indicadores se guardan como float32 y el ticker como categoría
+    assert df_macd[["MACD", "MACD_Signal", "MACD_Hist"]].dtypes.eq("float32").all()
+    assert df_sma["ticker"].dtype == "category" and df_sma["period"].dtype == "int16"
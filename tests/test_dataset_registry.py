@@ -0,0 +1,56 @@
+import pandas as pd
+from unittest.mock import patch
+from loader.dataset_registry import DatasetRegistry
+from utils.storage import ParquetBackend, write_dataset
+import utils.storage as storage
+
+def make_ticker():
+    return pd.DataFrame({"ticker": ["NVDA", "NVDA", "AAPL"],
+                         "datetime": ["2024-01-02 10:00:00", "2024-02-01 10:00:00", "2024-02-01 10:00:00"],
+                         "close": [1.0, 2.0, 3.0],
+                         "year_month": ["2024-01", "2024-02", "2024-02"]})
+
+def test_datasets_are_read_on_first_access(tmp_path):
+    for name in ["ticker", "macd", "merged_tec_info"]:
+        write_dataset(make_ticker(), name, directory=str(tmp_path))
+    registry = DatasetRegistry(["ticker", "macd", "merged_tec_info"], directory=str(tmp_path))
+
+    with patch("loader.dataset_registry.storage.read_dataset", wraps=storage.read_dataset) as read_dataset:
+        df = registry["merged_tec_info"]
+        registry["merged_tec_info"]
+
+    # Sólo se lee el dataset accedido, una vez, y con las fechas ya convertidas
+    assert read_dataset.call_count == 1
+    assert list(registry.loaded) == ["merged_tec_info"]
+    assert list(registry) == ["ticker", "macd", "merged_tec_info"]
+    assert "macd" in registry and "news" not in registry
+    assert pd.api.types.is_datetime64_any_dtype(df["datetime"])
+    assert df["year_month"].dtype == "category" and df["year_month"].tolist() == ["2024-01", "2024-02", "2024-02"]
+
+def test_projection_and_date_range(tmp_path):
+    write_dataset(make_ticker(), "ticker", ParquetBackend(), str(tmp_path))
+    registry = DatasetRegistry(["ticker"], ParquetBackend(), str(tmp_path), start="2024-02-01", tickers=["NVDA"])
+
+    df = registry.read("ticker", ["close"])
+
+    # Las columnas filtradas no se devuelven si no se piden, y la proyección no se guarda
+    assert df.columns.tolist() == ["close"]
+    assert df["close"].tolist() == [2.0]
+    assert registry.loaded == {}
+    assert registry["ticker"]["close"].tolist() == [2.0]
+    assert registry.read("ticker", ["close"], start="2024-01-01")["close"].tolist() == [1.0, 2.0]
+
+def test_wide_news_is_split_on_access(tmp_path):
+    df_wide = pd.DataFrame({"datetime": ["2024-01-02 10:00:00"] * 2, "title": ["A", "A"], "url": ["u", "u"],
+                            "authors": ["x", "x"], "summary": ["s", "s"], "source": ["r", "r"],
+                            "overall_sentiment_score": [0.1, 0.1], "overall_sentiment_label": ["Neutral"] * 2,
+                            "ticker": ["NVDA", "AAPL"], "relevance_score": [0.5, 0.2],
+                            "ticker_sentiment_score": [0.3, 0.1], "ticker_sentiment_label": ["Neutral"] * 2,
+                            "affected_topic": ["Technology"] * 2, "affected_topic_relevance_score": [0.9, 0.9],
+                            "topic": ["technology"] * 2})
+    write_dataset(df_wide, "news", directory=str(tmp_path))
+    registry = DatasetRegistry(["news", "news_tickers", "news_topics"], directory=str(tmp_path))
+
+    assert registry["news_tickers"]["ticker"].tolist() == ["NVDA", "AAPL"]
+    assert len(registry["news"]) == 1
+    assert len(registry["news_topics"]) == 1
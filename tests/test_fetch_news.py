@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from loader.data_loader import fetch_news, deduplicate_feed
+
+def article(published):
+    return {"title": f"News {published}", "url": f"https://news/{published}",
+            "time_published": published.strftime("%Y%m%dT%H%M%S")}
+
+def make_client(articles):
+    # Simula el endpoint: devuelve como máximo `limit` noticias de la ventana, las más recientes primero
+    def get_news_sentiment(topic, time_from, time_to, limit=1000):
+        start = datetime.strptime(time_from, "%Y%m%dT%H%M")
+        end = datetime.strptime(time_to, "%Y%m%dT%H%M") + timedelta(seconds=59)
+        window = [item for item in articles if start <= datetime.strptime(item["time_published"], "%Y%m%dT%H%M%S")
+                  <= end]
+        return sorted(window, key=lambda item: item["time_published"], reverse=True)[:limit]
+
+    client = MagicMock()
+    client.get_news_sentiment.side_effect = get_news_sentiment
+    return client
+
+def test_fetch_news_single_request_under_limit():
+    articles = [article(datetime(2024, 1, day, 10)) for day in range(1, 6)]
+    client = make_client(articles)
+
+    feed = fetch_news(client, "technology", "20240101T0000", "20240131T2359", limit=10)
+
+    assert len(feed) == 5
+    assert client.get_news_sentiment.call_count == 1
+
+def test_fetch_news_bisects_saturated_windows():
+    articles = [article(datetime(2024, 1, 1) + timedelta(hours=7 * i)) for i in range(100)]
+    client = make_client(articles)
+
+    feed = fetch_news(client, "technology", "20240101T0000", "20240131T2359", limit=10)
+
+    # Se recuperan todas las noticias del mes, sin duplicados
+    assert sorted(item["url"] for item in feed) == sorted(item["url"] for item in articles)
+    assert client.get_news_sentiment.call_count < 40
+
+def test_fetch_news_without_bisect_keeps_truncated_response():
+    articles = [article(datetime(2024, 1, 1) + timedelta(hours=i)) for i in range(20)]
+    client = make_client(articles)
+
+    feed = fetch_news(client, "technology", "20240101T0000", "20240131T2359", limit=10, bisect=False)
+
+    assert len(feed) == 10
+    assert client.get_news_sentiment.call_count == 1
+
+def test_deduplicate_feed():
+    item = article(datetime(2024, 1, 1))
+    without_url = {"title": "Title", "time_published": "20240101T000000"}
+
+    assert deduplicate_feed([item, dict(item), without_url, dict(without_url)]) == [item, without_url]
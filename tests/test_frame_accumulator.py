@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from loader.data_loader import combine_data
+from loader.frame_accumulator import FrameAccumulator
+from utils.schema import apply_schema
+
+def make_response(rng, index):
+    # Respuestas que se solapan con las anteriores, con filas vacías y duplicados internos
+    datetimes = pd.date_range("2024-01-01", periods=20, freq="h") + pd.Timedelta(hours=5 * index)
+    df = pd.DataFrame({"ticker": rng.choice(["NVDA", "AAPL"], 20), "datetime": datetimes,
+                       "close": rng.normal(size=20)})
+    df.loc[3] = np.nan
+    return pd.concat([df, df.iloc[[0]].assign(close=0.0)])
+
+def test_accumulator_matches_successive_combine_data():
+    rng = np.random.default_rng(0)
+    responses = [make_response(rng, index) for index in range(30)]
+    responses.insert(10, pd.DataFrame())
+    df_history = make_response(rng, 2)
+
+    expected = df_history
+    accumulator = FrameAccumulator({"ticker": df_history, "macd": df_history}, {"ticker": ["ticker", "datetime"]})
+    for df in responses:
+        expected = combine_data(expected, df, subset_columns=["ticker", "datetime"])
+        accumulator.add("ticker", df)
+    dfs = accumulator.combine()
+
+    # El resultado combinado tiene los tipos del esquema del dataset
+    pd.testing.assert_frame_equal(dfs["ticker"], apply_schema(expected, "ticker"))
+    # Los datasets sin respuestas no cambian
+    assert dfs["macd"] is df_history
+
+def test_accumulator_single_frame_is_not_deduplicated():
+    df = pd.DataFrame({"datetime": ["2024-01-01", "2024-01-01"], "close": [1.0, 2.0]})
+    accumulator = FrameAccumulator({"ticker": pd.DataFrame(columns=["datetime", "close"])}, {"ticker": ["datetime"]})
+    accumulator.add("ticker", df)
+
+    pd.testing.assert_frame_equal(accumulator.combine()["ticker"], combine_data(pd.DataFrame(), df, ["datetime"]))
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from loader.indicators import sma, rsi, macd, compute_local_indicators, update_local_indicators
+from loader.indicator_state import SmaState, RsiState, MacdState, load_states, save_states
+import loader.data_transform as transformer
+from loader.loader import compute_indicators
+
+PERIODS = {"sma": [5, 12], "rsi": [7, 14]}
+
+def make_close(size=3000):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(size=size)).round(4)
+    # Un tramo sin cambios de precio
+    close[100:130] = close[99]
+    return close
+
+def make_ticker(start, end):
+    datetimes = pd.date_range("2024-01-01", "2024-04-30 23:00", freq="h")
+    df = pd.DataFrame({"ticker": "NVDA", "datetime": datetimes, "close": make_close(len(datetimes))})
+    return transformer.manage_dates(df[(df["datetime"] >= start) & (df["datetime"] < end)].reset_index(drop=True),
+                                    None)
+
+def test_states_replay_the_batch_formulas_exactly():
+    close = make_close()
+    states = {"sma": SmaState(12), "rsi": RsiState(14), "macd": MacdState()}
+    values = {key: [] for key in states}
+    for index, value in enumerate(close):
+        if index == 1000:
+            # El estado se restaura a mitad de la serie, como entre dos ejecuciones
+            states = {key: type(state).from_dict(state.to_dict()) for key, state in states.items()}
+        for key, state in states.items():
+            values[key].append(state.update(value))
+
+    np.testing.assert_array_equal(values["sma"], sma(close, 12))
+    np.testing.assert_array_equal(values["rsi"], rsi(close, 14))
+    np.testing.assert_array_equal(np.array(values["macd"]), np.column_stack(macd(close)))
+
+def test_persisted_states_resume_on_the_next_runs(tmp_path):
+    path = str(tmp_path / "indicator_state.json")
+    df_full = make_ticker("2024-01-01", "2024-05-01")
+    expected = compute_local_indicators({"ticker": df_full}, PERIODS)
+
+    # Carga histórica de enero y febrero, y después dos ejecuciones que cargan marzo y abril
+    states = {}
+    update_local_indicators({"ticker": make_ticker("2024-01-01", "2024-03-01")}, PERIODS, states)
+    save_states(states, path)
+    for start, end in [("2024-03-01", "2024-04-01"), ("2024-03-15", "2024-05-01")]:
+        states = load_states(path)
+        df_history = df_full[df_full["datetime"] < start]
+        df_new = make_ticker(start, end)
+        dfs = update_local_indicators({"ticker": df_new}, PERIODS, states, df_history)
+        save_states(states, path)
+
+        for key in ["sma", "rsi", "macd"]:
+            expected_new = expected[key][expected[key]["datetime"].isin(df_new["datetime"])].reset_index(drop=True)
+            # Las categorías de los meses dependen de los meses calculados
+            pd.testing.assert_frame_equal(dfs[key].astype({"year_month": str}),
+                                          expected_new.astype({"year_month": str}))
+
+    # El estado se guarda antes de la primera barra del último mes cargado
+    assert load_states(path)["NVDA"].last_datetime == pd.Timestamp("2024-03-31 23:00")
+
+def test_backfill_fills_a_gap_through_the_states(tmp_path):
+    path = str(tmp_path / "indicator_state.json")
+    config = {"indicator_state": {"enabled": True, "path": path}, "historical_needed": False, "periods": PERIODS,
+              "symbols": ["NVDA"]}
+    df_full = make_ticker("2024-01-01", "2024-05-01")
+    expected = compute_local_indicators({"ticker": df_full}, PERIODS)
+
+    # El historial guardado no tiene marzo, y el estado ya está en abril
+    df_history = df_full[(df_full["datetime"] < "2024-03-01") | (df_full["datetime"] >= "2024-04-01")]
+    states = {}
+    update_local_indicators({"ticker": df_history}, PERIODS, states)
+    save_states(states, path)
+
+    dfs = compute_indicators(config, None, ["2024-03"], {"ticker": make_ticker("2024-03-01", "2024-04-01")},
+                             df_history)
+
+    # Marzo y las barras guardadas después se calculan en orden
+    for key in ["sma", "rsi", "macd"]:
+        expected_new = expected[key][expected[key]["datetime"] >= "2024-03-01"].reset_index(drop=True)
+        pd.testing.assert_frame_equal(dfs[key].astype({"year_month": str}), expected_new.astype({"year_month": str}))
+    assert load_states(path)["NVDA"].last_datetime == pd.Timestamp("2024-03-31 23:00")
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+import pandas as pd
+from loader.data_transform import transform_intraday, transform_rsi, transform_sma
+from loader.indicators import sma, rsi, macd, compute_local_indicators
+
+# Precios de cierre y RSI(14) publicados como ejemplo de referencia del método de Wilder (StockCharts).
+# Los valores publicados redondean los promedios intermedios, por eso se compara con tolerancia.
+REFERENCE_CLOSES = [44.3389, 44.0902, 44.1497, 43.6124, 44.3278, 44.8264, 45.0955, 45.4245, 45.8433, 46.0826,
+                    45.8931, 46.0328, 45.6140, 46.2820, 46.2820, 46.0028, 46.0328, 46.4116, 46.2222, 45.6439,
+                    46.2122, 46.2521, 45.7137, 46.4515, 45.7835, 45.3548, 44.0288, 44.1783, 44.2181, 44.5672,
+                    43.4205, 42.6628, 43.1314]
+REFERENCE_RSI_14 = [70.53, 66.32, 66.55, 69.41, 66.36, 57.97, 62.93, 63.26, 56.06, 62.38, 54.71, 50.42, 39.99,
+                    41.46, 41.87, 45.46, 37.30, 33.09, 37.79]
+
+@pytest.fixture
+def intraday_payload():
+    datetimes = pd.date_range("2023-01-02 04:00", periods=len(REFERENCE_CLOSES), freq="h")
+    return {
+        dt.strftime("%Y-%m-%d %H:%M:%S"): {
+            "1. open": str(close),
+            "2. high": str(close + 0.5),
+            "3. low": str(close - 0.5),
+            "4. close": str(close),
+            "5. volume": "1000"
+        }
+        for dt, close in zip(datetimes, REFERENCE_CLOSES)
+    }
+
+@pytest.fixture
+def api_rsi_payload():
+    # Respuesta con el formato de la API (más reciente primero) para el RSI de referencia
+    datetimes = pd.date_range("2023-01-02 04:00", periods=len(REFERENCE_CLOSES), freq="h")[14:]
+    return {dt.strftime("%Y-%m-%d %H:%M"): {"RSI": f"{value:.4f}"}
+            for dt, value in reversed(list(zip(datetimes, REFERENCE_RSI_14)))}
+
+def test_sma_matches_window_mean():
+    close = np.array(REFERENCE_CLOSES)
+    expected = [close[i - 4:i + 1].mean() for i in range(4, len(close))]
+
+    result = sma(close, 5)
+
+    assert np.isnan(result[:4]).all()
+    np.testing.assert_allclose(result[4:], expected, rtol=1e-12)
+
+def test_rsi_matches_reference_values():
+    result = rsi(REFERENCE_CLOSES, 14)
+
+    assert np.isnan(result[:14]).all()
+    np.testing.assert_allclose(result[14:], REFERENCE_RSI_14, atol=0.025)
+
+def test_macd_matches_partial_formula():
+    close = pd.Series(REFERENCE_CLOSES)
+    expected = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+
+    macd_line, signal_line, hist = macd(close)
+
+    np.testing.assert_allclose(macd_line[25:], expected[25:], rtol=1e-12)
+    np.testing.assert_allclose(hist[25:], macd_line[25:] - signal_line[25:], rtol=1e-12)
+
+def test_local_indicators_parity_with_api(intraday_payload, api_rsi_payload):
+    dfs = {"ticker": transform_intraday("NVDA", intraday_payload)}
+    dfs = compute_local_indicators(dfs, {"sma": [5], "rsi": [14]})
+
+    df_api = transform_rsi("NVDA", api_rsi_payload, 14).sort_values("datetime").reset_index(drop=True)
+
+    # Mismo esquema que los datos de la API y valores equivalentes
+    assert list(dfs["rsi"].columns) == list(df_api.columns)
+    assert list(dfs["sma"].columns) == list(transform_sma("NVDA", {"2023-01-02 04:00": {"SMA": "1"}}, 5).columns)
+    pd.testing.assert_series_equal(dfs["rsi"]["datetime"], df_api["datetime"])
+    np.testing.assert_allclose(dfs["rsi"]["rsi"], df_api["rsi"], atol=0.025)
+
+def test_local_indicators_use_history_for_warm_up(intraday_payload):
+    df_ticker = transform_intraday("NVDA", intraday_payload)
+    df_history, df_new = df_ticker.iloc[:20], df_ticker.iloc[20:]
+
+    full = compute_local_indicators({"ticker": df_ticker}, {"sma": [5], "rsi": [14]})
+    incremental = compute_local_indicators({"ticker": df_new}, {"sma": [5], "rsi": [14]}, df_history)
+
+    # Solo se devuelven las barras nuevas, con los mismos valores que el cálculo completo
+    for key in ["sma", "rsi", "macd"]:
+        expected = full[key][full[key]["datetime"].isin(df_new["datetime"])].reset_index(drop=True)
+        pd.testing.assert_frame_equal(incremental[key], expected)
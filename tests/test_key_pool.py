@@ -0,0 +1,73 @@
+import time
+from unittest.mock import MagicMock
+from loader.api_client import ApiClient
+from loader.key_pool import KeyPool, read_api_keys
+from loader.rate_limiter import TokenBucket
+
+def make_pool(keys, **kwargs):
+    return KeyPool(keys, [TokenBucket(requests_per_minute=600, burst=5) for _ in keys], **kwargs)
+
+def test_requests_are_balanced_between_keys():
+    pool = make_pool(["key-a", "key-b", "key-c"])
+
+    used = [pool.acquire() for _ in range(15)]
+
+    # Cada clave atiende su ráfaga sin esperas
+    assert all(wait == 0 for _, wait in used)
+    assert pool.stats() == {"...ey-a": 5, "...ey-b": 5, "...ey-c": 5}
+    assert pool.requests_per_minute == 1800
+
+def test_throttled_key_leaves_rotation():
+    pool = make_pool(["key-a", "key-b"], cooldown_seconds=60)
+    pool.report_throttled("key-a")
+
+    assert {pool.acquire()[0] for _ in range(4)} == {"key-b"}
+
+def test_waits_for_the_first_cooldown():
+    pool = make_pool(["key-a", "key-b"], cooldown_seconds=60)
+    pool.report_throttled("key-a")
+    pool.report_throttled("key-b")
+    # La clave b sale antes de la espera
+    pool.cooldown_until[1] = time.monotonic() + 0.2
+
+    start = time.monotonic()
+    key, wait = pool.acquire()
+
+    assert key == "key-b"
+    assert wait > 0 and time.monotonic() - start >= 0.2
+
+def test_daily_quota():
+    pool = make_pool(["key-a", "key-b"], daily_quota=2)
+
+    keys = [pool.acquire()[0] for _ in range(4)]
+
+    assert sorted(keys) == ["key-a", "key-a", "key-b", "key-b"]
+    assert pool.exhausted()
+    assert pool.acquire() == (None, 0.0)
+
+def test_read_api_keys(monkeypatch):
+    monkeypatch.setenv("ALPHAVKEY", "single")
+    monkeypatch.setenv("ALPHAVKEYS", "first, second")
+    assert read_api_keys() == ["first", "second"]
+
+    monkeypatch.delenv("ALPHAVKEYS")
+    assert read_api_keys() == ["single"]
+
+def test_api_client_switches_key_when_throttled():
+    throttled, valid = MagicMock(), MagicMock()
+    throttled.json.return_value = {"Note": "API call frequency exceeded"}
+    valid.json.return_value = {"feed": []}
+
+    client = ApiClient(key_pool=make_pool(["key-a", "key-b"]), max_retries=1, backoff_base=0)
+    client.session.get = MagicMock(side_effect=[throttled, valid])
+    client._get({"function": "NEWS_SENTIMENT"})
+
+    api_keys = [call.kwargs["params"]["apikey"] for call in client.session.get.call_args_list]
+    assert api_keys[0] != api_keys[1]
+
+def test_api_client_stops_when_quota_is_spent():
+    client = ApiClient(key_pool=make_pool(["key-a", "key-b"], daily_quota=0))
+    client.session.get = MagicMock()
+
+    assert client._get({"function": "NEWS_SENTIMENT"}) is None
+    client.session.get.assert_not_called()
@@ -0,0 +1,79 @@
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+import pandas as pd
+from loader.data_loader import load_data, load_data_concurrent, build_fetch_tasks
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.get_intraday_data.side_effect = lambda symbol, month: {
+        f"{month}-01 10:00": {
+            "1. open": "100",
+            "2. high": "110",
+            "3. low": "90",
+            "4. close": "105",
+            "5. volume": "1000"
+        }
+    }
+    client.get_macd.return_value = {
+        "2023-01-01 10:00": {
+            "MACD": 1.2,
+            "MACD_Signal": 1.0,
+            "MACD_Hist": 0.2
+        }
+    }
+    client.get_sma.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"SMA": 100 + period}}
+    client.get_rsi.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"RSI": 50 + period}}
+    return client
+
+def empty_dfs():
+    return {
+        "ticker": pd.DataFrame(),
+        "macd": pd.DataFrame(),
+        "sma": pd.DataFrame(),
+        "rsi": pd.DataFrame()
+    }
+
+def test_build_fetch_tasks_order():
+    tasks = build_fetch_tasks(["AAPL"], ["2023-01"], {"sma": [5, 10], "rsi": [14]})
+
+    # Mismo orden que el bucle secuencial original
+    assert [(t.dataset, t.period) for t in tasks] == [("ticker", None), ("macd", None), ("sma", 5), ("sma", 10),
+                                                      ("rsi", 14)]
+
+def test_load_data_concurrent_matches_sequential(mock_client):
+    symbols = ["AAPL", "MSFT"]
+    months = ["2023-01", "2023-02"]
+    periods = {"sma": [5, 10], "rsi": [7, 9]}
+
+    sequential = load_data(empty_dfs(), mock_client, symbols, months, periods)
+    concurrent = load_data_concurrent(empty_dfs(), mock_client, symbols, months, periods, max_workers=4)
+
+    for key in ["ticker", "macd", "sma", "rsi"]:
+        pd.testing.assert_frame_equal(sequential[key], concurrent[key])
+
+def test_load_data_concurrent_overlaps_requests():
+    client = MagicMock()
+    in_flight = {"current": 0, "max": 0}
+    lock = threading.Lock()
+
+    def slow_response(*args):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["current"] -= 1
+        return None
+
+    client.get_intraday_data.side_effect = slow_response
+    client.get_macd.side_effect = slow_response
+    client.get_sma.side_effect = slow_response
+    client.get_rsi.side_effect = slow_response
+
+    load_data_concurrent(empty_dfs(), client, ["AAPL"], ["2023-01"], {"sma": [5, 10], "rsi": [7, 9]}, max_workers=3)
+
+    # Verificar que varias peticiones estuvieron en curso a la vez sin superar el límite de workers
+    assert 1 < in_flight["max"] <= 3
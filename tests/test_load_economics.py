@@ -23,8 +23,11 @@ def sample_dfs():
         "nonfarm_payroll": pd.DataFrame(columns=["datetime", "value"])
     }
 
-def test_load_economics(mock_client, sample_dfs):
+def test_load_economics(mock_client, sample_dfs, tmp_path, monkeypatch):
     indicators = ["unemployment", "cpi", "nonfarm_payroll"]
+    # Los ficheros se guardan en un directorio temporal, no en el data/ del repositorio
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
 
     updated_dfs = load_economics(sample_dfs, mock_client, indicators)
 
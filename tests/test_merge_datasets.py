@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from loader.data_loader import merge_datasets
+import loader.data_transform as transformer
+from utils.schema import apply_schema
+
+PERIODS = {"sma": [5, 10], "rsi": [7]}
+TEC_COLUMNS = {
+    "macd": ["ticker", "datetime", "MACD", "MACD_Signal", "MACD_Hist"],
+    "rsi_7": ["ticker", "datetime", "rsi_7"],
+    "sma_5": ["ticker", "datetime", "sma_5"],
+    "sma_10": ["ticker", "datetime", "sma_10"]
+}
+ECONOMIC_COLUMNS = {"cpi": "cpi", "unemployment": "unemployment"}
+
+def transform_indicators(dfs, period, tech_indicator):
+    # Implementación anterior: el indicador de un periodo, con la columna renombrada
+    df = dfs[tech_indicator][dfs[tech_indicator]["period"] == period][["ticker", "datetime", tech_indicator]].copy()
+    return df.rename(columns={tech_indicator: f"{tech_indicator}_{period}"})
+
+def chained_merge(dfs):
+    # Implementación anterior: un filtro por periodo y un merge por dataset
+    for key in PERIODS:
+        for period in PERIODS[key]:
+            dfs[f"{key}_{period}"] = transform_indicators(dfs, period, key)
+    df = dfs["ticker"]
+    for key, cols in TEC_COLUMNS.items():
+        df = pd.merge(df, dfs[key][cols], on=["ticker", "datetime"], how="left")
+    for key, col_name in ECONOMIC_COLUMNS.items():
+        df = pd.merge(df, dfs[key][["year_month", "value"]].rename(columns={"value": col_name}), on="year_month",
+                      how="left")
+    return df
+
+def make_dfs():
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range("2024-01-30", periods=60, freq="h")
+    ticker = pd.concat([pd.DataFrame({"ticker": symbol, "datetime": datetimes, "close": rng.normal(size=60)})
+                        for symbol in ["NVDA", "AAPL"]], ignore_index=True)
+    dfs = {"ticker": transformer.manage_dates(ticker, None)}
+    # Los indicadores no cubren todas las barras
+    dfs["macd"] = ticker[["ticker", "datetime"]].iloc[::2].assign(MACD=1.0, MACD_Signal=2.0, MACD_Hist=3.0)
+    for key in PERIODS:
+        dfs[key] = pd.concat([ticker[["ticker", "datetime"]].iloc[period:].assign(**{key: rng.normal(size=120 - period),
+                                                                                   "period": period})
+                              for period in PERIODS[key]], ignore_index=True)
+    for key in ECONOMIC_COLUMNS:
+        dfs[key] = pd.DataFrame({"year_month": ["2024-01", "2024-02"], "value": rng.normal(size=2)})
+    return dfs
+
+def test_merge_datasets_matches_chained_merges():
+    expected = chained_merge(make_dfs())
+
+    dfs = merge_datasets(make_dfs(), PERIODS, TEC_COLUMNS, ECONOMIC_COLUMNS)
+
+    pd.testing.assert_frame_equal(dfs["merged_tec_info"], apply_schema(expected, "merged_tec_info"))
+    # Los datasets de cada periodo se siguen guardando, ordenados por ticker y fecha
+    expected_sma_5 = transform_indicators(make_dfs(), 5, "sma").sort_values(["ticker", "datetime"])
+    pd.testing.assert_frame_equal(dfs["sma_5"], expected_sma_5.reset_index(drop=True))
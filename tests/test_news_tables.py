@@ -0,0 +1,159 @@
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+from loader.data_loader import load_tasks, FetchTask
+from loader.data_transform import transform_news_data, normalize_news_frame, article_id
+from gen_dataset.check_news_dataset import CheckNewsDataset
+from utils.storage import PartitionedStore
+
+def news_item(title, published, tickers, topics, score=0.5):
+    return {
+        "title": title,
+        "time_published": published,
+        "overall_sentiment_score": score,
+        "overall_sentiment_label": "Neutral",
+        "ticker_sentiment": [{"ticker": ticker, "relevance_score": relevance, "ticker_sentiment_score": sentiment,
+                              "ticker_sentiment_label": "Neutral"} for ticker, relevance, sentiment in tickers],
+        "topics": [{"topic": topic, "relevance_score": relevance} for topic, relevance in topics]
+    }
+
+@pytest.fixture
+def feed():
+    return [
+        news_item("Chips, rally", "20240102T101500", [("NVDA", 0.8, 0.4), ("AMD", 0.2, 0.1)],
+                  [("Technology", 0.9), ("Financial Markets", 0.5)], score=0.3),
+        news_item("Rates hold", "20240102T103000", [("SPY", 0.6, -0.2)], [("Financial Markets", 0.7)], score=-0.1),
+        news_item("Fab expansion", "20240102T110000", [("TSM", 0.9, 0.5)], [("Technology", 0.8)], score=0.6)
+    ]
+
+def test_transform_news_data_normalizes_the_feed(feed):
+    tables = transform_news_data(feed, "technology")
+
+    # Una fila por noticia, por ticker y por topic, en lugar del producto cruzado
+    assert len(tables["news"]) == 3
+    assert len(tables["news_tickers"]) == 4
+    assert len(tables["news_topics"]) == 4
+    assert tables["news"]["article_id"].dtype == "int64"
+    assert tables["news"]["title"].tolist()[0] == "Chips rally"
+    assert tables["news"]["datetime"].tolist()[0] == pd.Timestamp("2024-01-02 10:00")
+
+    # La clave solo depende del título y de la hora
+    assert tables["news"]["article_id"].iloc[0] == article_id("Chips rally", "2024-01-02 10:00:00")
+    assert set(tables["news_tickers"]["article_id"]) == set(tables["news"]["article_id"])
+
+def test_normalize_news_frame_matches_transform(feed):
+    tables = transform_news_data(feed, "technology")
+    df_wide = (tables["news"].merge(tables["news_tickers"], on="article_id")
+               .merge(tables["news_topics"], on="article_id").drop(columns="article_id"))
+
+    migrated = normalize_news_frame(df_wide)
+
+    for table, df in tables.items():
+        pd.testing.assert_frame_equal(migrated[table].reset_index(drop=True), df[migrated[table].columns],
+                                      check_dtype=False)
+
+def test_load_tasks_deduplicates_articles_by_key(feed, tmp_path):
+    client = MagicMock()
+    client.get_news_sentiment.side_effect = lambda topic, time_from, time_to, limit=1000: feed
+    tasks = [FetchTask("news", None, "2024-01", None, topic) for topic in ["technology", "financial_markets"]]
+    tasks.append(tasks[0])
+
+    dfs = load_tasks({}, client, tasks)
+
+    # Cada noticia se guarda una vez por topic consultado, y sus tickers y topics una sola vez
+    assert len(dfs["news"]) == 6
+    assert len(dfs["news_tickers"]) == 4
+    assert len(dfs["news_topics"]) == 4
+
+    store = PartitionedStore(str(tmp_path / "store"))
+    load_tasks({}, client, tasks, store=store)
+    assert len(store.read("news", ["2024-01"])) == 6
+    assert len(store.read("news_tickers", ["2024-01"]).drop_duplicates(subset=["article_id", "ticker"])) == 4
+    assert len(store.partitions("news_topics", ["2024-01"])) == 2
+
+def test_check_news_dataset_consumes_the_tables(feed):
+    tables = transform_news_data(feed, "technology")
+    checker = CheckNewsDataset(tables, "NVDA")
+    checker.config = {"generate_ticker_features": {"weight_ticker_value": True, "average_ticker_value": True},
+                      "news_topic_features": {"technology": True, "financial_markets": True}}
+
+    checker.generate_ticker_features()
+    checker.generate_topic_features()
+    checker.generate_news_global_metrics()
+    df = checker.df.set_index("datetime")
+
+    # La noticia de NVDA pondera sus dos topics
+    assert df.loc["2024-01-02 10:00", "w_ticker_atrsm"] == pytest.approx(round((0.9 + 0.5) * 0.8 / 2, 6))
+    assert df.loc["2024-01-02 10:00", "avg_ticker_nc"] == 1
+    # Las noticias de NVDA no cuentan para los topics
+    assert df.loc["2024-01-02 10:00", "financial_markets_ossm"] == pytest.approx(-0.1)
+    assert df.loc["2024-01-02 11:00", "technology_nc"] == 1
+    assert df.loc["2024-01-02 10:00", "ticker_score"] == pytest.approx(0.8 * 0.4 * 5)
+
+def wide_news_features(feed, ticker, topics):
+    # Implementación anterior: una fila por ticker y topic de cada noticia, así que las noticias sin tickers o
+    # sin topics no tenían ninguna fila
+    df = pd.DataFrame([{"title": item["title"].replace(",", ""),
+                        "datetime": pd.to_datetime(item["time_published"]).floor("h"),
+                        "overall_sentiment_score": item["overall_sentiment_score"], "ticker": ticker_data["ticker"],
+                        "relevance_score": float(ticker_data["relevance_score"]),
+                        "ticker_sentiment_score": float(ticker_data["ticker_sentiment_score"]),
+                        "affected_topic": topic_data["topic"],
+                        "affected_topic_relevance_score": float(topic_data["relevance_score"])}
+                       for item in feed for ticker_data in item["ticker_sentiment"] for topic_data in item["topics"]])
+    df_ticker = df[df["ticker"] == ticker]
+
+    weighted = df_ticker.assign(
+        w_ticker_ossm=df_ticker["overall_sentiment_score"] * df_ticker["relevance_score"],
+        w_ticker_ssm=df_ticker["ticker_sentiment_score"] * df_ticker["relevance_score"],
+        w_ticker_atrsm=df_ticker["affected_topic_relevance_score"] * df_ticker["relevance_score"]
+    ).groupby("datetime").agg(w_ticker_ossm=("w_ticker_ossm", "mean"), w_ticker_ssm=("w_ticker_ssm", "mean"),
+                              w_ticker_atrsm=("w_ticker_atrsm", "mean"), w_ticker_nc=("title", "nunique"))
+    average = df_ticker.groupby("datetime").agg(
+        avg_ticker_ossm=("overall_sentiment_score", "mean"), avg_ticker_rsm=("relevance_score", "mean"),
+        avg_ticker_ssm=("ticker_sentiment_score", "mean"), avg_ticker_atrsm=("affected_topic_relevance_score", "mean"),
+        avg_ticker_nc=("title", "nunique"))
+    features = [weighted, average]
+
+    non_related = df[~df["title"].isin(df_ticker["title"])]
+    for name, topic in topics.items():
+        topic_data = non_related[non_related["affected_topic"] == name][
+            ["datetime", "title", "overall_sentiment_score", "affected_topic_relevance_score"]].drop_duplicates()
+        features.append(topic_data.groupby("datetime").agg(
+            **{f"{topic}_ossm": ("overall_sentiment_score", "mean"),
+               f"{topic}_atrsm": ("affected_topic_relevance_score", "mean"), f"{topic}_nc": ("title", "size")}))
+
+    ticker_score = df_ticker.drop_duplicates(subset=["title", "datetime", "relevance_score", "ticker_sentiment_score"])
+    ticker_score = (ticker_score["relevance_score"] * ticker_score["ticker_sentiment_score"] * 5).groupby(
+        ticker_score["datetime"]).sum().rename("ticker_score")
+    news_data = df[["datetime", "title", "overall_sentiment_score", "relevance_score"]].drop_duplicates()
+    global_metrics = news_data.groupby("datetime")[["overall_sentiment_score", "relevance_score"]].mean()
+    global_score = (global_metrics["overall_sentiment_score"] * global_metrics["relevance_score"]).rename(
+        "global_score")
+    features.append(pd.concat([global_score, ticker_score], axis=1).fillna(0))
+
+    return pd.concat(features, axis=1)
+
+def test_check_news_dataset_matches_the_wide_format():
+    topics = {"Technology": "technology", "Financial Markets": "financial_markets"}
+    feed = [
+        news_item("No tickers", "20240102T101500", [], [("Technology", 0.9)], score=0.5),
+        news_item("No topics", "20240102T103000", [("NVDA", 0.8, 0.4)], [], score=0.2),
+        news_item("Peer", "20240102T110000", [("AMD", 0.6, 0.1)], [("Technology", 0.7)], score=-0.3),
+        news_item("Target", "20240102T112000", [("NVDA", 0.5, 0.3), ("AMD", 0.4, 0.2)],
+                  [("Technology", 0.8), ("Financial Markets", 0.6)], score=0.6),
+        news_item("Nothing", "20240102T120500", [], [], score=0.1),
+        news_item("Index", "20240102T124000", [("SPY", 0.7, -0.2)], [("Financial Markets", 0.9)], score=-0.4)
+    ]
+    checker = CheckNewsDataset(transform_news_data(feed, "technology"), "NVDA")
+    checker.config = {"generate_ticker_features": {"weight_ticker_value": True, "average_ticker_value": True},
+                      "news_topic_features": {topic: True for topic in topics.values()}}
+
+    checker.generate_ticker_features()
+    checker.generate_topic_features()
+    checker.generate_news_global_metrics()
+
+    # Sin filas para las horas que solo tienen noticias sin tickers o sin topics
+    expected = wide_news_features(feed, "NVDA", topics)
+    pd.testing.assert_frame_equal(checker.df.set_index("datetime"), expected, check_dtype=False,
+                                  check_index_type=False, check_names=False, atol=1e-6)
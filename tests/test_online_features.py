@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import loader.data_transform as transformer
+from gen_dataset.online_features import OnlineFeatureEngine, RollingMean, run_batch_stages
+from utils.schema import apply_schema
+
+NEWS_TABLES = ["news", "news_tickers", "news_topics"]
+TOPICS = ["Technology", "Financial Markets", "Earnings", "Blockchain"]
+
+def make_inputs(days=20, articles=600):
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range("2024-01-02", periods=days * 24, freq="h")
+    # Sesiones de 4 a 19 horas en días laborables, con algunas horas perdidas
+    datetimes = datetimes[(datetimes.hour >= 4) & (datetimes.hour <= 19) & (datetimes.dayofweek < 5)]
+    datetimes = datetimes[rng.random(len(datetimes)) > 0.05]
+    size = len(datetimes)
+    close = 100 + np.cumsum(rng.normal(size=size)).round(4)
+    tec = pd.DataFrame({"ticker": "NVDA", "datetime": datetimes, "open": close + rng.normal(0, 0.1, size).round(4),
+                        "high": close + 0.5, "low": close - 0.5, "close": close,
+                        "volume": rng.integers(1000, 100000, size)})
+    tec = transformer.manage_dates(tec, None)
+    for column in ["MACD", "MACD_Signal", "MACD_Hist"]:
+        tec[column] = rng.normal(size=size).round(4)
+    for column in ["sma_5", "sma_10", "sma_12", "rsi_5", "rsi_7", "rsi_9"]:
+        tec[column] = rng.normal(50, 10, size).round(4)
+    # Indicadores que se calculan y una barra incompleta que se descarta
+    tec.loc[rng.random(size) < 0.05, "sma_5"] = np.nan
+    tec.loc[size - 30, "open"] = np.nan
+    for column in ["cpi", "nonfarm_payroll", "unemployment"]:
+        tec[column] = 1.0
+
+    ids = np.arange(articles)
+    news = pd.DataFrame({"article_id": ids, "title": [f"Title {index}" for index in ids],
+                         "datetime": rng.choice(pd.date_range("2024-01-02", periods=days * 24, freq="h"), articles),
+                         "overall_sentiment_score": rng.normal(size=articles).round(6),
+                         "overall_sentiment_label": "Neutral", "topic": "technology"})
+    news_tickers = pd.DataFrame({"article_id": np.repeat(ids, 2),
+                                 "ticker": rng.choice(["NVDA", "AAPL", "MSFT"], 2 * articles),
+                                 "relevance_score": rng.random(2 * articles).round(6),
+                                 "ticker_sentiment_score": rng.normal(size=2 * articles).round(6),
+                                 "ticker_sentiment_label": "Neutral"})
+    news_topics = pd.DataFrame({"article_id": np.repeat(ids, 2), "affected_topic": rng.choice(TOPICS, 2 * articles),
+                                "affected_topic_relevance_score": rng.random(2 * articles).round(6)})
+
+    return {"tec_info": apply_schema(tec, "merged_tec_info"), "news": news, "news_tickers": news_tickers,
+            "news_topics": news_topics}
+
+def until(dfs, datetime, start=None):
+    # Las barras y noticias hasta la fecha, o solo las posteriores a start
+    tec = dfs["tec_info"]
+    news = dfs["news"][(dfs["news"]["datetime"] <= datetime) &
+                       (True if start is None else dfs["news"]["datetime"] > start)]
+    tables = {"tec_info": tec[tec["datetime"] <= datetime].reset_index(drop=True), "news": news}
+    for key in ["news_tickers", "news_topics"]:
+        tables[key] = dfs[key][dfs[key]["article_id"].isin(news["article_id"])]
+    return tables
+
+def test_rolling_mean_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500).round(2)
+    values[rng.random(500) < 0.1] = np.nan
+    values[100:120] = 3.0
+    values[200:220] = -0.0
+    times = pd.Series(pd.date_range("2024-01-01", periods=500, freq="h")).sample(frac=0.7, random_state=0)
+    times = times.sort_values()
+
+    for window, min_periods in [(5, None), (5, 1), (1, None)]:
+        state = RollingMean(window, min_periods=min_periods)
+        expected = pd.Series(values).rolling(window, min_periods=min_periods).mean()
+        np.testing.assert_array_equal([state.update(value) for value in values], expected)
+
+    state = RollingMean(offset=pd.Timedelta(hours=3))
+    series = pd.Series(values[:len(times)], index=times.to_numpy())
+    expected = series.rolling("3h", min_periods=1).mean()
+    np.testing.assert_array_equal([state.update(value, key.value) for key, value in series.items()], expected)
+
+def test_online_rows_match_the_batch_dataset():
+    dfs = make_inputs()
+    datetimes = dfs["tec_info"]["datetime"]
+    start = len(datetimes) // 2
+    engine = OnlineFeatureEngine(until(dfs, datetimes[start - 1]))
+
+    previous = datetimes[start - 1]
+    for index in range(start, len(datetimes)):
+        # Cada barra llega con las noticias desde la barra anterior
+        news_tables = until(dfs, datetimes[index], previous)
+        row = engine.update(dfs["tec_info"].iloc[[index]], {key: news_tables[key] for key in NEWS_TABLES})
+        previous = datetimes[index]
+
+        if index % 20 == 0 or index == len(datetimes) - 1:
+            expected = run_batch_stages(until(dfs, datetimes[index]))["features"].iloc[[-1]]
+            pd.testing.assert_frame_equal(row, expected.reset_index(drop=True))
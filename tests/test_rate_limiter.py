@@ -0,0 +1,35 @@
+import time
+import pytest
+from loader.rate_limiter import TokenBucket, SqliteTokenBucket, take_token, create_rate_limiter
+
+def test_take_token_refills_and_reserves():
+    # Con tokens disponibles no hay espera
+    assert take_token(3, 0, 5, 1.0) == (2, 0.0)
+    # El bucket nunca supera su capacidad
+    assert take_token(5, 100, 5, 1.0) == (4, 0.0)
+    # Sin tokens se reserva el siguiente y se calcula la espera
+    assert take_token(0, 0, 5, 2.0) == (-1, 0.5)
+
+def test_token_bucket_burst_and_rate():
+    bucket = TokenBucket(requests_per_minute=6000, burst=10)
+    start = time.monotonic()
+    waits = [bucket.acquire() for _ in range(30)]
+    elapsed = time.monotonic() - start
+
+    assert waits[:10] == [0.0] * 10
+    # 20 peticiones tras la ráfaga a (6000 - 10) / 60 tokens por segundo
+    assert elapsed == pytest.approx(20 / ((6000 - 10) / 60), rel=0.3)
+
+def test_sqlite_bucket_is_shared(tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite")
+    first = SqliteTokenBucket(path, "key", requests_per_minute=120, burst=2)
+    second = SqliteTokenBucket(path, "key", requests_per_minute=120, burst=2)
+
+    assert first.acquire() == 0.0
+    assert second.acquire() == 0.0
+    # La ráfaga ya se consumió entre ambos limitadores
+    assert second.acquire() > 0
+
+def test_create_rate_limiter_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_rate_limiter({"backend": "redis"})
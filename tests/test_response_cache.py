@@ -0,0 +1,68 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from loader.api_client import ApiClient
+from loader.response_cache import ResponseCache
+
+CLOSED_PARAMS = {"function": "SMA", "symbol": "NVDA", "month": "2022-01", "time_period": 5}
+OPEN_PARAMS = {"function": "CPI"}
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(directory=str(tmp_path / "cache"), ttl_seconds=3600, max_size_mb=1)
+
+def test_make_key_ignores_apikey_and_order():
+    key = ResponseCache.make_key({"symbol": "NVDA", "function": "SMA", "apikey": "secret"})
+
+    assert key == ResponseCache.make_key({"function": "SMA", "symbol": "NVDA"})
+    assert key != ResponseCache.make_key({"function": "RSI", "symbol": "NVDA"})
+
+def test_is_closed():
+    now = datetime(2024, 5, 15)
+
+    assert ResponseCache.is_closed({"month": "2024-04"}, now)
+    assert not ResponseCache.is_closed({"month": "2024-5"}, now)
+    assert ResponseCache.is_closed({"time_to": "20240430T0000"}, now)
+    assert not ResponseCache.is_closed({"function": "CPI"}, now)
+
+def test_cache_hits_and_expiration(cache):
+    cache.put(CLOSED_PARAMS, {"value": 1})
+    cache.put(OPEN_PARAMS, {"value": 2})
+
+    assert cache.get(CLOSED_PARAMS) == {"value": 1}
+    assert cache.get(OPEN_PARAMS) == {"value": 2}
+
+    # Las respuestas abiertas caducan con el TTL, las de meses cerrados nunca
+    cache.ttl_seconds = -1
+    assert cache.get(CLOSED_PARAMS) == {"value": 1}
+    assert cache.get(OPEN_PARAMS) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["bytes_saved"] > 0
+
+def test_cache_evicts_least_recently_used(cache):
+    cache.max_size_bytes = 300
+    payload = {"data": "x" * 100}
+
+    cache.put({"function": "SMA", "month": "2022-01"}, payload)
+    cache.put({"function": "SMA", "month": "2022-02"}, payload)
+    cache.put({"function": "SMA", "month": "2022-03"}, payload)
+
+    assert cache.get({"function": "SMA", "month": "2022-01"}) is None
+    assert cache.get({"function": "SMA", "month": "2022-03"}) == payload
+    assert cache.stats()["size_bytes"] <= 300
+
+def test_api_client_uses_cache(cache):
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"Technical Analysis: SMA": {"2022-01-03 10:00": {"SMA": "1.0"}}}
+
+    client = ApiClient(cache)
+    client.session.get = mock_get = MagicMock(return_value=mock_response)
+    first = client.get_sma("NVDA", "2022-01", 5)
+    second = client.get_sma("NVDA", "2022-01", 5)
+
+    # La segunda petición se sirve desde la caché sin usar la red
+    assert first == second
+    assert mock_get.call_count == 1
@@ -0,0 +1,44 @@
+import os
+import pandas as pd
+from unittest.mock import MagicMock
+from utils.stage_manifest import StageManifest, file_checksum, frame_checksum
+
+def make_df():
+    return pd.DataFrame({"datetime": pd.date_range("2024-01-02 10:00", periods=3, freq="h"),
+                         "close": [1.0, 2.0, 3.0], "target": [1, 0, 1]})
+
+def test_unchanged_inputs_load_the_stored_output(tmp_path):
+    run = MagicMock(side_effect=make_df)
+    inputs = {"data": {"df_merged_tec_info.parquet": "abc"}, "gen_dataset_config": {"lags": [5]}}
+
+    df_first = StageManifest(str(tmp_path)).run_stage("gen_dataset", inputs, run)
+    # Una nueva ejecución lee el manifiesto guardado y no vuelve a ejecutar la etapa
+    df_second = StageManifest(str(tmp_path)).run_stage("gen_dataset", inputs, run)
+
+    assert run.call_count == 1
+    pd.testing.assert_frame_equal(df_second, df_first)
+
+def test_changed_inputs_or_missing_artifact_run_the_stage(tmp_path):
+    run = MagicMock(side_effect=make_df)
+    manifest = StageManifest(str(tmp_path))
+    manifest.run_stage("gen_dataset", {"data": "abc", "lags": [5]}, run)
+
+    # Un cambio en la configuración invalida la salida guardada
+    manifest.run_stage("gen_dataset", {"data": "abc", "lags": [10]}, run)
+    assert run.call_count == 2
+
+    # Si falta el artefacto la etapa se vuelve a ejecutar aunque la clave coincida
+    os.remove(tmp_path / "df_gen_dataset.parquet")
+    manifest.run_stage("gen_dataset", {"data": "abc", "lags": [10]}, run)
+    assert run.call_count == 3
+
+def test_checksums_follow_the_contents(tmp_path):
+    path = tmp_path / "df_ticker.csv"
+    assert file_checksum(str(path)) is None
+    make_df().to_csv(path, index=False)
+    checksum = file_checksum(str(path))
+    make_df().assign(close=0.0).to_csv(path, index=False)
+
+    assert file_checksum(str(path)) != checksum
+    assert frame_checksum(make_df()) == frame_checksum(make_df())
+    assert frame_checksum(make_df()) != frame_checksum(make_df().assign(close=0.0))
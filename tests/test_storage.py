@@ -0,0 +1,158 @@
+import os
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+from loader.data_loader import load_tasks, build_fetch_tasks
+from utils.storage import PartitionedStore, ParquetBackend, FeatherBackend, SqliteBackend, create_backend, \
+    read_dataset, write_dataset, migrate_csv
+from loader.data_loader import combine_dataframes, upsert_dataframes
+from utils.background_writer import BackgroundWriter
+
+@pytest.fixture
+def store(tmp_path):
+    return PartitionedStore(str(tmp_path / "store"))
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.get_intraday_data.side_effect = lambda symbol, month: {
+        f"{month}-0{day} 10:00": {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": str(day),
+                                  "5. volume": "10"} for day in range(1, 4)
+    }
+    client.get_macd.side_effect = lambda symbol, month: {f"{month}-01 10:00": {"MACD": 1, "MACD_Signal": 1,
+                                                                              "MACD_Hist": 0}}
+    client.get_sma.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"SMA": period}}
+    client.get_rsi.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"RSI": period}}
+    return client
+
+def test_append_partitions_and_deduplicates(store):
+    df = pd.DataFrame({"ticker": ["NVDA", "NVDA", "AAPL"],
+                       "datetime": pd.to_datetime(["2024-01-02 10:00", "2024-02-01 10:00", "2024-01-02 10:00"]),
+                       "close": [1.0, 2.0, 3.0]})
+    store.append("ticker", df, ["ticker", "datetime"])
+
+    # Un fichero por dataset, ticker y mes
+    assert os.path.exists(store.partition_path("ticker", "NVDA", "2024-01"))
+    assert os.path.exists(store.partition_path("ticker", "NVDA", "2024-02"))
+    assert len(store.partitions("ticker", ["2024-01"])) == 2
+
+    # Volver a añadir el mismo registro lo reemplaza
+    store.append("ticker", df.iloc[[0]].assign(close=10.0), ["ticker", "datetime"])
+    df_stored = store.read("ticker").sort_values(["ticker", "datetime"]).reset_index(drop=True)
+    assert df_stored["close"].tolist() == [3.0, 10.0, 2.0]
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+@pytest.mark.parametrize("storage_format", ["csv", "parquet"])
+def test_streaming_matches_in_memory_load(tmp_path, mock_client, max_workers, storage_format):
+    store = PartitionedStore(str(tmp_path / "store"), create_backend({"format": storage_format}))
+    tasks = build_fetch_tasks(["NVDA", "AAPL"], ["2024-01", "2024-02"], {"sma": [5, 10], "rsi": [7]})
+    expected = load_tasks({key: pd.DataFrame() for key in ["ticker", "macd", "sma", "rsi"]}, mock_client, tasks)
+
+    dfs = load_tasks({}, mock_client, tasks, max_workers, store=store)
+
+    assert dfs == {}
+    for key, df_expected in expected.items():
+        columns = ["ticker", "datetime"] + (["period"] if key in ["sma", "rsi"] else [])
+        df_stored = store.read(key).sort_values(columns).reset_index(drop=True)
+        df_expected = df_expected.sort_values(columns).reset_index(drop=True)
+        pd.testing.assert_frame_equal(df_stored[columns], df_expected[columns], check_dtype=False)
+        assert df_stored.drop(columns=["date", "year_month"]).shape == df_expected.drop(
+            columns=["date", "year_month"]).shape
+
+@pytest.mark.parametrize("backend", [ParquetBackend(), FeatherBackend()])
+def test_columnar_dataset_keeps_dtypes(tmp_path, backend):
+    df = pd.DataFrame({"ticker": ["NVDA", "NVDA"], "datetime": pd.to_datetime(["2024-01-02 10:00", "2024-01-02 11:00"]),
+                       "close": [1.5, 2.5], "volume": [10, 20]})
+    write_dataset(df, "ticker", backend, str(tmp_path))
+
+    # Los tipos se conservan y solo se leen las columnas pedidas
+    pd.testing.assert_frame_equal(read_dataset("ticker", backend, directory=str(tmp_path)), df)
+    df_projected = read_dataset("ticker", backend, ["datetime", "close", "missing"], str(tmp_path))
+    assert df_projected.columns.tolist() == ["datetime", "close"]
+    assert pd.api.types.is_datetime64_any_dtype(df_projected["datetime"])
+
+def test_migrate_csv(tmp_path):
+    directory = str(tmp_path)
+    df = pd.DataFrame({"ticker": ["NVDA"], "datetime": ["2024-01-02 10:00:00"], "date": ["2024-01-02"],
+                       "score": [0.5]})
+    df.to_csv(tmp_path / "df_ticker.csv", index=False)
+    store = PartitionedStore(str(tmp_path / "store"))
+    store.append("ticker", df.drop(columns="date"), ["ticker", "datetime"])
+
+    # Antes de migrar, el dataset se lee del CSV
+    assert len(read_dataset("ticker", ParquetBackend(), directory=directory)) == 1
+
+    migrated = migrate_csv(ParquetBackend(), directory, str(tmp_path / "store"))
+
+    assert len(migrated) == 2
+    df_migrated = read_dataset("ticker", ParquetBackend(), directory=directory)
+    assert pd.api.types.is_datetime64_any_dtype(df_migrated["date"])
+    assert PartitionedStore(str(tmp_path / "store"), ParquetBackend()).read("ticker")["score"].tolist() == [0.5]
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    return create_backend({"format": "sqlite", "path": str(tmp_path / "aqf.sqlite")},
+                          {"ticker": ["ticker", "datetime"], "news": ["article_id", "topic"]})
+
+def test_sqlite_upserts_and_pushes_predicates(sqlite_backend):
+    assert isinstance(sqlite_backend, SqliteBackend)
+    df = pd.DataFrame({"ticker": ["NVDA", "NVDA", "AAPL"],
+                       "datetime": pd.to_datetime(["2024-01-02 10:00", "2024-02-01 10:00", "2024-01-02 10:00"]),
+                       "close": [1.0, 2.0, 3.0]})
+    write_dataset(df, "ticker", sqlite_backend)
+    # Volver a escribir una fila la actualiza, y las columnas nuevas se añaden a la tabla
+    write_dataset(df.iloc[[0]].assign(close=10.0, volume=5), "ticker", sqlite_backend)
+
+    df_stored = read_dataset("ticker", sqlite_backend)
+    assert len(df_stored) == 3
+    assert df_stored["datetime"].tolist() == sorted(df_stored["datetime"])
+    assert df_stored.set_index(["ticker", "datetime"]).loc[("NVDA", "2024-01-02 10:00:00"), "close"] == 10.0
+
+    df_filtered = read_dataset("ticker", sqlite_backend, ["datetime", "close"], start="2024-01-01", end="2024-02-01",
+                               tickers=["NVDA"])
+    assert df_filtered.to_dict("list") == {"datetime": ["2024-01-02 10:00:00"], "close": [10.0]}
+
+def test_upsert_dataframes_matches_combine_dataframes(sqlite_backend):
+    economic = {key: pd.DataFrame({"date": ["2024-01-01"], key: [1.0]}) for key in
+                ["unemployment", "nonfarm_payroll", "cpi"]}
+    history = {"ticker": pd.DataFrame({"ticker": ["NVDA"] * 2, "datetime": pd.to_datetime(["2024-01-02 10:00",
+                                                                                            "2024-01-02 11:00"]),
+                                       "close": [1.0, 2.0]})}
+    current = {"ticker": pd.DataFrame({"ticker": ["NVDA"] * 2, "datetime": pd.to_datetime(["2024-01-02 11:00",
+                                                                                            "2024-01-02 12:00"]),
+                                       "close": [20.0, 30.0]}), **economic}
+    upsert_dataframes(history, {}, sqlite_backend)
+
+    combined = combine_dataframes(history, current, {}, {"ticker": ["ticker", "datetime"]})
+    upserted = upsert_dataframes(current, {key: pd.DataFrame() for key in current}, sqlite_backend)
+
+    pd.testing.assert_frame_equal(upserted["ticker"], combined["ticker"].reset_index(drop=True))
+    assert upserted["cpi"]["cpi"].tolist() == [1.0]
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_background_writer_keeps_submission_order(tmp_path, max_workers):
+    writer = BackgroundWriter(max_workers)
+    df = pd.DataFrame({"ticker": ["NVDA"], "close": [1.0]})
+    writer.write_dataset(df, "ticker", directory=str(tmp_path))
+    # El escritor guarda una copia, así que modificar el dataframe no afecta a la escritura pendiente
+    df["close"] = 2.0
+    writer.write_csv(df, str(tmp_path / "gen_data.csv"))
+    for close in [3.0, 4.0]:
+        writer.write_dataset(df.assign(close=close), "macd", directory=str(tmp_path))
+    writer.close()
+
+    assert read_dataset("ticker", directory=str(tmp_path))["close"].tolist() == [1.0]
+    assert pd.read_csv(tmp_path / "gen_data.csv")["close"].tolist() == [2.0]
+    # La última escritura de un fichero es la que queda, y no quedan ficheros temporales
+    assert read_dataset("macd", directory=str(tmp_path))["close"].tolist() == [4.0]
+    assert sorted(os.listdir(tmp_path)) == ["df_macd.csv", "df_ticker.csv", "gen_data.csv"]
+
+def test_background_writer_raises_failed_writes_on_flush(tmp_path):
+    writer = BackgroundWriter(2)
+    backend = MagicMock(extension="csv")
+    backend.write.side_effect = OSError("disk full")
+    writer.write_dataset(pd.DataFrame({"close": [1.0]}), "ticker", backend, str(tmp_path))
+
+    with pytest.raises(OSError, match="disk full"):
+        writer.flush()
+    writer.close()
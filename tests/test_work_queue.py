@@ -0,0 +1,62 @@
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+from loader.data_loader import FetchTask, load_tasks, build_fetch_tasks
+from loader.work_queue import WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.sqlite"))
+
+def make_client():
+    client = MagicMock()
+    client.get_intraday_data.side_effect = lambda symbol, month: {
+        f"{month}-01 10:00": {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"}
+    }
+    client.get_macd.side_effect = lambda symbol, month: {f"{month}-01 10:00": {"MACD": 1, "MACD_Signal": 1,
+                                                                              "MACD_Hist": 0}}
+    client.get_sma.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"SMA": period}}
+    client.get_rsi.side_effect = lambda symbol, month, period: {f"{month}-01 10:00": {"RSI": period}}
+    return client
+
+def empty_dfs():
+    return {key: pd.DataFrame() for key in ["ticker", "macd", "sma", "rsi"]}
+
+def test_queue_status(queue):
+    done, failed = FetchTask("ticker", "NVDA", "2024-01", None), FetchTask("sma", "NVDA", "2024-01", 5)
+    queue.enqueue([done, failed])
+    queue.mark_done(done, {"value": 1})
+    queue.mark_failed(failed)
+
+    # Volver a encolar no cambia el estado de las tareas terminadas
+    queue.enqueue([done, failed])
+    assert queue.counts() == {"done": 1, "failed": 1}
+    assert queue.pending([done, failed]) == [failed]
+    assert queue.response(done) == {"value": 1}
+    assert queue.response(failed) is None
+
+    queue.clear()
+    assert queue.counts() == {}
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_interrupted_run_is_resumed(queue, max_workers):
+    tasks = build_fetch_tasks(["NVDA", "AAPL"], ["2024-01", "2024-02"], {"sma": [5], "rsi": [7]})
+    expected = load_tasks(empty_dfs(), make_client(), tasks)
+
+    # Primera ejecución interrumpida a mitad del plan
+    interrupted = make_client()
+    interrupted.get_sma.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        load_tasks(empty_dfs(), interrupted, tasks, max_workers, queue)
+    done = queue.counts().get("done", 0)
+    assert 0 < done < len(tasks)
+
+    # La segunda ejecución solo pide las tareas pendientes
+    client = make_client()
+    result = load_tasks(empty_dfs(), client, tasks, max_workers, queue)
+
+    requests = sum(method.call_count for method in [client.get_intraday_data, client.get_macd, client.get_sma,
+                                                     client.get_rsi])
+    assert requests == len(tasks) - done
+    for key in expected:
+        pd.testing.assert_frame_equal(result[key].reset_index(drop=True), expected[key].reset_index(drop=True))
@@ -0,0 +1,146 @@
+import os
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import utils.storage as storage
+from utils.utils import get_time_now
+
+class BackgroundWriter:
+
+    def __init__(self, max_workers=2):
+        """
+        Write-behind writer of the datasets: the files are serialized by a pool of threads while the pipeline goes
+        on with the next stage, and `flush` is the barrier waiting for every pending write.
+
+        Every file is written through a temporary file, flushed to disk and renamed once complete, so an
+        interrupted run never leaves a partial file. The writer keeps a copy of every submitted dataframe, so the
+        pipeline can keep modifying it. The writes of the same file are run in the order they are submitted.
+
+        With no workers, every write is run synchronously, as before the writer existed.
+
+        Attributes:
+            max_workers (int): The number of writing threads. 0 writes synchronously.
+            executor (ThreadPoolExecutor): The pool running the writes, None when writing synchronously.
+            pending (dict): The last submitted write of every path.
+            directories (set): The folders of the written files, flushed to disk by `flush`.
+            lock (threading.Lock): Lock protecting the pending writes.
+        """
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='writer') if max_workers > 0 else None
+        self.pending = {}
+        self.directories = set()
+        self.lock = threading.Lock()
+
+    def submit(self, path, function, *args):
+        """
+        Runs a write of a path in the background, after the previous write of the same path.
+
+        Parameters:
+            path (str): The path of the written file, or the name of the written table.
+            function (callable): The writing function.
+            *args: The arguments of the writing function.
+        """
+        if self.executor is None:
+            function(*args)
+            return
+
+        directory = os.path.dirname(path)
+        with self.lock:
+            previous = self.pending.get(path)
+            self.pending[path] = self.executor.submit(self._run_after, previous, function, *args)
+            if directory:
+                self.directories.add(directory)
+
+    @staticmethod
+    def _run_after(previous, function, *args):
+        # The earlier write was submitted first, so it is already running or ahead in the queue. If it failed,
+        # this later write of the same file supersedes it.
+        if previous is not None:
+            wait([previous])
+        function(*args)
+
+    def write_dataset(self, df, name, backend=None, directory='data'):
+        """
+        Saves a dataset in the background, as `storage.write_dataset` does.
+
+        Parameters:
+            df (pandas.DataFrame): The dataset.
+            name (str): The name of the dataset.
+            backend (optional): The storage backend. Defaults to CSV.
+            directory (str): The folder of the datasets. Defaults to 'data'.
+        """
+        if isinstance(backend, storage.SqliteBackend):
+            path = f'{backend.path}:{name}'
+        else:
+            path = storage.dataset_path(name, backend or storage.CsvBackend(), directory)
+        self.submit(path, storage.write_dataset, df.copy(), name, backend, directory, self.executor is not None)
+
+    def write_csv(self, df, path):
+        """
+        Saves a dataframe as a CSV file in the background.
+
+        Parameters:
+            df (pandas.DataFrame): The dataframe.
+            path (str): The path of the CSV file.
+        """
+        df = df.copy()
+
+        def write(temp_path):
+            df.to_csv(temp_path, encoding='utf-8', index=False)
+
+        self.submit(path, storage.atomic_write, path, write, self.executor is not None)
+
+    def flush(self):
+        """
+        Waits for every pending write and flushes the folders of the written files to disk, so the renames are
+        durable. The first failed write, if any, is raised.
+        """
+        with self.lock:
+            futures = list(self.pending.values())
+            directories = list(self.directories)
+            self.pending = {}
+            self.directories = set()
+        if not futures:
+            return
+
+        wait(futures)
+        for directory in directories:
+            storage.fsync_path(directory)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            print(f'{get_time_now()} :: Background Writer: {len(errors)} of {len(futures)} writes failed')
+            raise errors[0]
+
+    def close(self):
+        """
+        Flushes the pending writes and stops the writing threads.
+        """
+        try:
+            self.flush()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def background_writer(config=None):
+    """
+    Returns the writer shared by the whole run, created on first use from the 'background_writer' settings of
+    the loader configuration, and flushed at exit.
+
+    Parameters:
+        config (dict, optional): The 'enabled' and 'max_workers' settings. Only used when the writer is created.
+
+    Returns:
+        BackgroundWriter: The shared writer.
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            config = config or {}
+            max_workers = config.get('max_workers', 2) if config.get('enabled', True) else 0
+            _writer = BackgroundWriter(max_workers)
+            atexit.register(_writer.close)
+
+    return _writer
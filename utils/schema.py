@@ -0,0 +1,138 @@
+from fnmatch import fnmatch
+import pandas as pd
+
+# Compact types of the columns of every dataset. The repeated labels (tickers, topics, months and sentiment labels)
+# are categoricals, the indicators and scores float32, and the periods small integers. The prices and volumes keep
+# their 64-bit types: the targets compare consecutive closes, and a float32 close would round some of them equal.
+# A '*' in a column (or dataset) name matches any text, e.g. 'sma_*' matches every SMA period.
+# 'datetime' stands for a datetime64 column.
+TEC_KEY_COLUMNS = {
+    'ticker': 'category',
+    'date': 'datetime',
+    'year_month': 'category'
+}
+
+MACD_COLUMNS = {
+    'MACD': 'float32',
+    'MACD_Signal': 'float32',
+    'MACD_Hist': 'float32'
+}
+
+ECONOMIC_COLUMNS = {
+    'unemployment': 'float32',
+    'nonfarm_payroll': 'float32',
+    'cpi': 'float32'
+}
+
+# The three news tables share a schema, as their columns do not overlap besides 'article_id'
+NEWS_COLUMNS = {
+    'topic': 'category',
+    'overall_sentiment_score': 'float32',
+    'overall_sentiment_label': 'category',
+    'ticker': 'category',
+    'relevance_score': 'float32',
+    'ticker_sentiment_score': 'float32',
+    'ticker_sentiment_label': 'category',
+    'affected_topic': 'category',
+    'affected_topic_relevance_score': 'float32'
+}
+
+DATASET_SCHEMAS = {
+    'ticker': TEC_KEY_COLUMNS,
+    'macd': {**TEC_KEY_COLUMNS, **MACD_COLUMNS},
+    'sma': {**TEC_KEY_COLUMNS, 'sma': 'float32', 'period': 'int16'},
+    'rsi': {**TEC_KEY_COLUMNS, 'rsi': 'float32', 'period': 'int16'},
+    'sma_*': {**TEC_KEY_COLUMNS, 'sma_*': 'float32'},
+    'rsi_*': {**TEC_KEY_COLUMNS, 'rsi_*': 'float32'},
+    'economic': {'date': 'datetime', 'year_month': 'category', 'value': 'float32'},
+    'news': NEWS_COLUMNS,
+    'news_tickers': NEWS_COLUMNS,
+    'news_topics': NEWS_COLUMNS,
+    'merged_tec_info': {**TEC_KEY_COLUMNS, **MACD_COLUMNS, **ECONOMIC_COLUMNS, 'sma_*': 'float32', 'rsi_*': 'float32'}
+}
+
+# The economic indicator datasets, named after their indicator, share the 'economic' schema
+ECONOMIC_DATASETS = list(ECONOMIC_COLUMNS)
+
+def lookup(mapping, name):
+    """
+    Returns the value of a name in a mapping whose keys may have '*' wildcards, the exact key first.
+    """
+    if name in mapping:
+        return mapping[name]
+    for pattern, value in mapping.items():
+        if '*' in pattern and fnmatch(name, pattern):
+            return value
+
+    return None
+
+def dataset_schema(dataset):
+    """
+    Returns the column types of a dataset, or an empty schema if it has none.
+    """
+    if dataset in ECONOMIC_DATASETS:
+        dataset = 'economic'
+
+    return lookup(DATASET_SCHEMAS, dataset) or {}
+
+def cast_column(series, dtype):
+    """
+    Casts a column to a type of the schema. The numbers stored as text are parsed, and the values which are not
+    numbers are coerced to NaN. An integer column with missing values is left as it is.
+
+    Parameters:
+        series (pandas.Series): The column.
+        dtype (str): The type of the schema.
+
+    Returns:
+        pandas.Series: The cast column.
+    """
+    if dtype == 'datetime':
+        return series if pd.api.types.is_datetime64_any_dtype(series) else pd.to_datetime(series, errors='coerce')
+    if dtype == 'category':
+        if pd.api.types.is_datetime64_any_dtype(series) and series.name == 'year_month':
+            # The months parsed as dates by an older read are kept as 'YYYY-MM', as they are built
+            series = series.dt.strftime('%Y-%m')
+        return series.astype('category')
+
+    values = series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series, errors='coerce')
+    if pd.api.types.is_integer_dtype(dtype) and values.isna().any():
+        return values
+
+    return values.astype(dtype)
+
+def apply_schema(df, dataset):
+    """
+    Casts the columns of a dataset to the compact types of its schema. The columns not in the schema, and the
+    ones already of their type, are left as they are.
+
+    Parameters:
+        df (pandas.DataFrame): The dataset.
+        dataset (str): The name of the dataset, e.g. 'ticker', 'sma_5', 'cpi' or 'news_tickers'.
+
+    Returns:
+        pandas.DataFrame: The dataset with the types of its schema.
+    """
+    schema = dataset_schema(dataset)
+    casts = {}
+    for column in df.columns:
+        dtype = lookup(schema, column)
+        if dtype is None or str(df[column].dtype) == dtype:
+            continue
+        if dtype == 'datetime' and pd.api.types.is_datetime64_any_dtype(df[column]):
+            continue
+        casts[column] = cast_column(df[column], dtype)
+
+    if not casts:
+        return df
+    df = df.copy(deep=False)
+    for column, series in casts.items():
+        df[column] = series
+
+    return df
+
+def memory_usage_mb(df):
+    """
+    Returns the memory used by a dataframe, including the contents of its strings, in MB.
+    """
+    return df.memory_usage(deep=True).sum() / 2 ** 20
@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import pandas as pd
+import utils.storage as storage
+from utils.utils import get_time_now
+
+def file_checksum(path, chunk_size=1 << 20):
+    """
+    Returns the BLAKE2b checksum of the contents of a file, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def frame_checksum(df):
+    """
+    Returns a checksum of the contents of a dataframe: its columns, types and the hash of every row.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def inputs_key(inputs):
+    """
+    Returns the hash identifying the inputs of a stage: checksums, configuration sections or any other
+    JSON-serializable values.
+    """
+    return hashlib.blake2b(json.dumps(inputs, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+class StageManifest:
+
+    def __init__(self, directory='data/stages'):
+        """
+        Manifest of the outputs of the pipeline stages, keyed by a hash of their inputs, so a stage whose inputs
+        have not changed since the last run is skipped and its stored output is loaded instead.
+
+        Every stage records the hash of its inputs (the checksums of the data it reads and the configuration
+        sections it uses) and stores its output dataframe as a Parquet artifact, which keeps the types of the
+        columns. The manifest and the artifacts are written through temporary files, so an interrupted run
+        never leaves an entry pointing to a partial artifact.
+
+        Attributes:
+            directory (str): The folder of the manifest and of the artifacts.
+            path (str): The path of the manifest file.
+            backend (ParquetBackend): The storage backend of the artifacts.
+            entries (dict): The input hash and artifact name of every stage.
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, 'manifest.json')
+        self.backend = storage.ParquetBackend()
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as file:
+                self.entries = json.load(file)
+
+    def lookup(self, stage, key):
+        """
+        Returns the stored output of a stage if it was produced from the same inputs, or None otherwise.
+
+        Parameters:
+            stage (str): The name of the stage.
+            key (str): The hash of the current inputs of the stage.
+
+        Returns:
+            pandas.DataFrame | None: The stored output of the stage.
+        """
+        entry = self.entries.get(stage)
+        if entry is None or entry['key'] != key:
+            return None
+        if not os.path.exists(storage.dataset_path(entry['artifact'], self.backend, self.directory)):
+            return None
+
+        return storage.read_dataset(entry['artifact'], self.backend, directory=self.directory)
+
+    def store(self, stage, key, df):
+        """
+        Stores the output of a stage and records the hash of the inputs it was produced from.
+
+        Parameters:
+            stage (str): The name of the stage.
+            key (str): The hash of the inputs of the stage.
+            df (pandas.DataFrame): The output of the stage.
+        """
+        storage.write_dataset(df, stage, self.backend, self.directory)
+        self.entries[stage] = {'key': key, 'artifact': stage, 'created': get_time_now()}
+        content = json.dumps(self.entries, indent=4)
+
+        def write(temp_path):
+            with open(temp_path, 'w') as file:
+                file.write(content)
+
+        storage.atomic_write(self.path, write)
+
+    def run_stage(self, stage, inputs, run):
+        """
+        Runs a stage unless its inputs match the ones of its stored output, which is then loaded instead.
+
+        Parameters:
+            stage (str): The name of the stage.
+            inputs (dict): The checksums and configuration sections the output of the stage depends on.
+            run (callable): Function running the stage and returning its output dataframe.
+
+        Returns:
+            pandas.DataFrame: The output of the stage.
+        """
+        key = inputs_key(inputs)
+        df = self.lookup(stage, key)
+        if df is not None:
+            print(f'{get_time_now()} :: Stage Manifest: Inputs of {stage} unchanged, loading its stored output')
+            return df
+
+        df = run()
+        self.store(stage, key, df)
+
+        return df
@@ -0,0 +1,565 @@
+import os
+import glob
+import sqlite3
+import threading
+import pandas as pd
+import utils.utils as ut
+from utils.utils import get_time_now
+from utils.schema import apply_schema
+
+# Column used to partition every dataset of the store, besides the month
+PARTITION_COLUMNS = {
+    'ticker': 'ticker',
+    'macd': 'ticker',
+    'sma': 'ticker',
+    'rsi': 'ticker',
+    'news': 'topic'
+}
+
+class CsvBackend:
+    """
+    Storage backend of the datasets as CSV files. The types of the columns are not stored, so the dates must be
+    parsed again on read.
+    """
+    extension = 'csv'
+
+    def read(self, path, columns=None):
+        """
+        Reads a file, optionally only the given columns. Returns an empty DataFrame if the file does not exist.
+        """
+        if columns is None:
+            return ut.read_csv(path)
+        try:
+            return pd.read_csv(path, usecols=lambda column: column in columns)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            return pd.DataFrame()
+
+    def write(self, df, path):
+        """
+        Writes a DataFrame to a file.
+        """
+        df.to_csv(path, encoding='utf-8', index=False)
+
+class ParquetBackend:
+    """
+    Storage backend of the datasets as compressed Parquet files, through pyarrow. The types of the columns are
+    stored with the data, and a read only decodes the requested columns.
+
+    Attributes:
+        compression (str): The compression codec of the files ('zstd', 'snappy', 'gzip' or None).
+    """
+    extension = 'parquet'
+
+    def __init__(self, compression='zstd'):
+        self.compression = compression
+
+    def read(self, path, columns=None):
+        """
+        Reads a file, optionally only the given columns. Returns an empty DataFrame if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        if columns is not None:
+            # The columns missing from the file are ignored, as `CsvBackend` does
+            file_columns = set(parquet_columns(path))
+            columns = [column for column in columns if column in file_columns]
+
+        return pd.read_parquet(path, columns=columns)
+
+    def write(self, df, path):
+        """
+        Writes a DataFrame to a file.
+        """
+        typed_frame(df).to_parquet(path, compression=self.compression, index=False)
+
+class FeatherBackend(ParquetBackend):
+    """
+    Storage backend of the datasets as compressed Feather (Arrow IPC) files, faster to read than Parquet and
+    somewhat larger.
+
+    Attributes:
+        compression (str): The compression codec of the files ('zstd', 'lz4' or 'uncompressed').
+    """
+    extension = 'feather'
+
+    def read(self, path, columns=None):
+        """
+        Reads a file, optionally only the given columns. Returns an empty DataFrame if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        if columns is not None:
+            file_columns = set(parquet_columns(path))
+            columns = [column for column in columns if column in file_columns]
+
+        return pd.read_feather(path, columns=columns)
+
+    def write(self, df, path):
+        """
+        Writes a DataFrame to a file.
+        """
+        typed_frame(df).reset_index(drop=True).to_feather(path, compression=self.compression)
+
+class SqliteBackend:
+    extension = 'sqlite'
+
+    def __init__(self, path='data/aqf.sqlite', primary_keys=None):
+        """
+        Storage backend of the datasets as the tables of an embedded SQLite database, one table per dataset.
+        Instead of rewriting a whole dataset, a write upserts its rows (`INSERT ... ON CONFLICT DO UPDATE`) on
+        the primary key of the table, so saving a month only touches the rows of that month. The reads push
+        the datetime range and ticker predicates down into the query.
+
+        The datasets without primary key, such as the economic indicators, are replaced on every write, as
+        the file backends do.
+
+        Attributes:
+            path (str): Path of the SQLite database file.
+            primary_keys (dict): The key columns of every dataset, the 'combine_configuration' of the loader.
+        """
+        self.path = path
+        self.primary_keys = primary_keys or {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def table_columns(self, name):
+        """
+        Returns the columns of the table of a dataset, or an empty list if it does not exist.
+        """
+        connection = self._connect()
+        try:
+            return [row[1] for row in connection.execute(f'PRAGMA table_info("{name}")').fetchall()]
+        finally:
+            connection.close()
+
+    @staticmethod
+    def sql_type(series):
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(series):
+            return 'REAL'
+        return 'TEXT'
+
+    @staticmethod
+    def sql_values(df):
+        """
+        Converts the rows of a DataFrame to the parameters of a statement: the times (and dates) to
+        'YYYY-MM-DD HH:MM:SS' text, which keeps their order, and the missing values to NULL.
+        """
+        df = typed_frame(df).copy()
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = df[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+        df = df.astype(object).where(df.notna(), None)
+
+        return list(df.itertuples(index=False, name=None))
+
+    def write(self, df, name):
+        """
+        Upserts the rows of a dataset into its table, creating the table, or the columns missing from it, first.
+
+        Parameters:
+            df (pandas.DataFrame): The rows to be written.
+            name (str): The name of the dataset.
+        """
+        keys = self.primary_keys.get(name)
+        columns = list(df.columns)
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        definitions = ', '.join(f'"{column}" {self.sql_type(df[column])}' for column in columns)
+
+        connection = self._connect()
+        try:
+            with connection:
+                if not keys or not set(keys).issubset(columns):
+                    connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+                    if columns:
+                        connection.execute(f'CREATE TABLE "{name}" ({definitions})')
+                        connection.executemany(f'INSERT INTO "{name}" ({quoted}) VALUES ({placeholders})',
+                                               self.sql_values(df))
+                    return
+
+                primary_key = ', '.join(f'"{column}"' for column in keys)
+                connection.execute(f'CREATE TABLE IF NOT EXISTS "{name}" ({definitions}, PRIMARY KEY ({primary_key}))')
+                stored = {row[1] for row in connection.execute(f'PRAGMA table_info("{name}")').fetchall()}
+                for column in columns:
+                    if column not in stored:
+                        connection.execute(f'ALTER TABLE "{name}" ADD COLUMN "{column}" {self.sql_type(df[column])}')
+                if 'datetime' in columns:
+                    connection.execute(f'CREATE INDEX IF NOT EXISTS "{name}_datetime" ON "{name}" ("datetime")')
+
+                updates = ', '.join(f'"{column}" = excluded."{column}"' for column in columns if column not in keys)
+                conflict = f'DO UPDATE SET {updates}' if updates else 'DO NOTHING'
+                connection.executemany(f'INSERT INTO "{name}" ({quoted}) VALUES ({placeholders}) '
+                                       f'ON CONFLICT ({primary_key}) {conflict}', self.sql_values(df))
+        finally:
+            connection.close()
+
+    def read(self, name, columns=None, start=None, end=None, tickers=None):
+        """
+        Reads a dataset from its table, filtering the rows in the query.
+
+        Parameters:
+            name (str): The name of the dataset.
+            columns (list[str], optional): The columns to be read. Defaults to every column.
+            start (str | datetime, optional): The first time to be read, inclusive.
+            end (str | datetime, optional): The last time to be read, exclusive.
+            tickers (list[str], optional): The tickers to be read.
+
+        Returns:
+            pandas.DataFrame: The rows of the dataset, sorted by datetime, or an empty DataFrame if the table
+            does not exist.
+        """
+        table_columns = self.table_columns(name)
+        if not table_columns:
+            return pd.DataFrame()
+
+        selected = [column for column in columns if column in table_columns] if columns else table_columns
+        query = f'SELECT {", ".join(chr(34) + column + chr(34) for column in selected)} FROM "{name}"'
+        conditions, parameters = [], []
+        if 'datetime' in table_columns:
+            if start is not None:
+                conditions.append('"datetime" >= ?')
+                parameters.append(pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+            if end is not None:
+                conditions.append('"datetime" < ?')
+                parameters.append(pd.Timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+        if tickers is not None and 'ticker' in table_columns:
+            conditions.append(f'"ticker" IN ({", ".join("?" for _ in tickers)})')
+            parameters.extend(tickers)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        if 'datetime' in table_columns:
+            query += ' ORDER BY "datetime"'
+
+        connection = self._connect()
+        try:
+            return pd.read_sql_query(query, connection, params=parameters)
+        finally:
+            connection.close()
+
+STORAGE_BACKENDS = {
+    'csv': CsvBackend,
+    'parquet': ParquetBackend,
+    'feather': FeatherBackend,
+    'sqlite': SqliteBackend
+}
+
+def create_backend(storage_config=None, primary_keys=None):
+    """
+    Creates the storage backend described by the 'storage' section of the loader configuration.
+
+    Parameters:
+        storage_config (dict, optional): The 'format' ('csv', 'parquet', 'feather' or 'sqlite'), for the
+            columnar formats the 'compression' of the files, and for SQLite the 'path' of the database.
+            Defaults to CSV.
+        primary_keys (dict, optional): The key columns of every dataset, used by the SQLite upserts.
+
+    Returns:
+        CsvBackend | ParquetBackend | FeatherBackend | SqliteBackend: The storage backend.
+    """
+    storage_config = storage_config or {}
+    storage_format = storage_config.get('format', 'csv')
+    if storage_format not in STORAGE_BACKENDS:
+        raise ValueError(f'Unknown storage format: {storage_format}')
+    if storage_format == 'csv':
+        return CsvBackend()
+    if storage_format == 'sqlite':
+        return SqliteBackend(storage_config.get('path', 'data/aqf.sqlite'), primary_keys)
+
+    return STORAGE_BACKENDS[storage_format](storage_config.get('compression', 'zstd'))
+
+def filter_rows(df, start=None, end=None, tickers=None):
+    """
+    Filters the rows of a dataset read from a file by datetime range (start inclusive, end exclusive) and
+    ticker, the predicates `SqliteBackend` runs in its query.
+    """
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if 'datetime' in df.columns and (start is not None or end is not None):
+        datetimes = pd.to_datetime(df['datetime'], errors='coerce')
+        if start is not None:
+            mask &= datetimes >= pd.Timestamp(start)
+        if end is not None:
+            mask &= datetimes < pd.Timestamp(end)
+    if tickers is not None and 'ticker' in df.columns:
+        mask &= df['ticker'].isin(tickers)
+
+    return df if mask.all() else df[mask].reset_index(drop=True)
+
+def parquet_columns(path):
+    """
+    Returns the names of the columns of a Parquet or Feather file, read from its schema.
+    """
+    import pyarrow.dataset as ds
+
+    file_format = 'feather' if path.endswith('.feather') else 'parquet'
+    return ds.dataset(path, format=file_format).schema.names
+
+def typed_frame(df):
+    """
+    Prepares a DataFrame to be stored in a typed columnar file. The object columns holding a mix of types, which
+    pyarrow cannot store, are cast: dates to datetime, as `retrieve_data` parses them anyway, numbers stored
+    as strings to float, and anything else to string.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame to be stored.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with a single type per column.
+    """
+    casts = {}
+    for column in df.columns[df.dtypes == object]:
+        kind = pd.api.types.infer_dtype(df[column], skipna=True)
+        if kind in ('string', 'empty', 'boolean', 'integer', 'floating', 'decimal'):
+            continue
+        if 'date' in kind:
+            casts[column] = pd.to_datetime(df[column], errors='coerce')
+            continue
+        try:
+            casts[column] = pd.to_numeric(df[column])
+        except (ValueError, TypeError):
+            casts[column] = df[column].astype(str).where(df[column].notna())
+
+    return df.assign(**casts) if casts else df
+
+class PartitionedStore:
+
+    def __init__(self, root='data/store', backend=None):
+        """
+        On-disk store of the loaded datasets, partitioned by dataset, ticker (or news topic) and month. Every
+        partition is a small file at `<root>/<dataset>/<ticker>/<YYYY-MM>.<extension>`, so a fetched slice can
+        be appended to the store and released without reading or holding the rest of the dataset.
+
+        Attributes:
+            root (str): Folder of the store.
+            backend (CsvBackend | ParquetBackend | FeatherBackend): The format of the partition files.
+            lock (threading.Lock): Lock serializing the appends, as two slices of the same partition (e.g. two
+                SMA periods) may be fetched at the same time.
+        """
+        self.root = root
+        self.backend = backend or CsvBackend()
+        self.lock = threading.Lock()
+
+    def partition_path(self, dataset, key, month):
+        """
+        Returns the path of the partition of a dataset for the given ticker (or topic) and month.
+        """
+        return os.path.join(self.root, dataset, str(key), f'{month}.{self.backend.extension}')
+
+    def append(self, dataset, df, subset_columns, partition=None):
+        """
+        Appends a slice to the store. The rows are split by partition, and every partition is merged with its
+        stored rows, dropping the duplicates on `subset_columns` (the new rows are kept), and written back
+        through a temporary file, so an interrupted write never leaves a partial partition.
+
+        Parameters:
+            dataset (str): The name of the dataset, one of the keys of `PARTITION_COLUMNS`.
+            df (pandas.DataFrame): The transformed slice.
+            subset_columns (list): The columns identifying a record of the dataset.
+            partition (tuple, optional): The (ticker or topic, month) partition of the whole slice, for the
+                tables with no 'datetime' column, such as the ticker and topic tables of the news.
+        """
+        if df.empty:
+            return
+
+        if partition is not None:
+            partitions = [(partition, df)]
+        else:
+            months = pd.to_datetime(df['datetime']).dt.strftime('%Y-%m')
+            partitions = df.groupby([df[PARTITION_COLUMNS[dataset]], months], sort=False, observed=True)
+        for (key, month), df_partition in partitions:
+            if 'datetime' in df_partition.columns and self.backend.extension == 'csv':
+                # The stored CSV times are read back as strings
+                df_partition = df_partition.astype({'datetime': str})
+            path = self.partition_path(dataset, key, month)
+            with self.lock:
+                if os.path.exists(path):
+                    df_stored = self.backend.read(path)
+                    df_partition = pd.concat([df_stored, df_partition])
+                    df_partition = df_partition.drop_duplicates(subset=subset_columns, keep='last')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f'{path}.tmp'
+                self.backend.write(df_partition, temp_path)
+                os.replace(temp_path, path)
+
+    def partitions(self, dataset, months=None):
+        """
+        Lists the partition files of a dataset, optionally only the ones of the given months.
+
+        Parameters:
+            dataset (str): The name of the dataset.
+            months (iterable[str], optional): The months ('YYYY-MM') to be listed. Defaults to every month.
+
+        Returns:
+            list[str]: The sorted paths of the partitions.
+        """
+        paths = sorted(glob.glob(os.path.join(self.root, dataset, '*', f'*.{self.backend.extension}')))
+        if months is not None:
+            months = set(months)
+            paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in months]
+
+        return paths
+
+    def read(self, dataset, months=None, columns=None):
+        """
+        Reads a dataset from its partitions.
+
+        Parameters:
+            dataset (str): The name of the dataset.
+            months (iterable[str], optional): The months ('YYYY-MM') to be read. Defaults to every month.
+            columns (list[str], optional): The columns to be read. Defaults to every column.
+
+        Returns:
+            pandas.DataFrame: The rows of the dataset, with the 'datetime' column (if any) parsed and the types
+            of its schema, or an empty DataFrame if nothing is stored.
+        """
+        paths = self.partitions(dataset, months)
+        if not paths:
+            return pd.DataFrame()
+
+        df = pd.concat([self.backend.read(path, columns) for path in paths], ignore_index=True)
+        if 'datetime' in df.columns:
+            df['datetime'] = pd.to_datetime(df['datetime'])
+
+        return apply_schema(df, dataset)
+
+def dataset_path(name, backend, directory='data'):
+    """
+    Returns the path of the file of a whole dataset, e.g. 'data/df_merged_tec_info.parquet'.
+    """
+    return os.path.join(directory, f'df_{name}.{backend.extension}')
+
+def read_dataset(name, backend=None, columns=None, directory='data', start=None, end=None, tickers=None):
+    """
+    Reads a dataset saved by `write_dataset`, optionally only the rows of a datetime range and of some tickers.
+    A dataset not migrated yet to the format of the backend is read from its CSV file.
+
+    Parameters:
+        name (str): The name of the dataset.
+        backend (optional): The storage backend. Defaults to CSV.
+        columns (list[str], optional): The columns to be read. Defaults to every column.
+        directory (str): The folder of the datasets. Defaults to 'data'.
+        start (str | datetime, optional): The first time to be read, inclusive.
+        end (str | datetime, optional): The last time to be read, exclusive.
+        tickers (list[str], optional): The tickers to be read.
+
+    Returns:
+        pandas.DataFrame: The dataset, or an empty DataFrame if it is not saved.
+    """
+    backend = backend or CsvBackend()
+    if isinstance(backend, SqliteBackend):
+        if backend.table_columns(name):
+            return backend.read(name, columns, start, end, tickers)
+        backend = CsvBackend()
+
+    path = dataset_path(name, backend, directory)
+    if not os.path.exists(path) and backend.extension != 'csv':
+        backend = CsvBackend()
+        path = dataset_path(name, backend, directory)
+
+    return filter_rows(backend.read(path, columns), start, end, tickers)
+
+def fsync_path(path):
+    """
+    Flushes a file, or the entries of a folder, to disk. The folders cannot be opened on Windows, where the
+    renames are already durable, so they are skipped.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path, write, sync=False):
+    """
+    Writes a file through a temporary file in the same folder, renamed to the path once complete, so an
+    interrupted write never leaves a partial file.
+
+    Parameters:
+        path (str): The path of the file.
+        write (callable): Function writing the contents to the path it receives.
+        sync (bool): Whether the temporary file is flushed to disk before the rename. Defaults to False.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    write(temp_path)
+    if sync:
+        fsync_path(temp_path)
+    os.replace(temp_path, path)
+
+def write_dataset(df, name, backend=None, directory='data', sync=False):
+    """
+    Saves a dataset in the format of the backend, through a temporary file, so an interrupted write never leaves
+    a partial dataset.
+
+    Parameters:
+        df (pandas.DataFrame): The dataset.
+        name (str): The name of the dataset.
+        backend (optional): The storage backend. Defaults to CSV. The SQLite backend upserts the rows into
+            the table of the dataset.
+        directory (str): The folder of the datasets. Defaults to 'data'.
+        sync (bool): Whether the file is flushed to disk before replacing the previous one. Defaults to False.
+    """
+    backend = backend or CsvBackend()
+    if isinstance(backend, SqliteBackend):
+        backend.write(df, name)
+        return
+
+    atomic_write(dataset_path(name, backend, directory), lambda path: backend.write(df, path), sync)
+
+def migrate_csv(backend, directory='data', store_directory='data/store', remove=False):
+    """
+    One-shot migration of the CSV datasets ('df_*.csv') and of the CSV partitions of the store to the format of
+    the backend. The dates are parsed as `retrieve_data` does, so they are stored typed. With the SQLite backend,
+    the datasets are upserted into their tables and the partitioned store is left as it is.
+
+    Parameters:
+        backend (ParquetBackend | FeatherBackend | SqliteBackend): The storage backend of the migrated files.
+        directory (str): The folder of the datasets. Defaults to 'data'.
+        store_directory (str): The folder of the partitioned store. Defaults to 'data/store'.
+        remove (bool): Whether the CSV files are removed once migrated. Defaults to False.
+
+    Returns:
+        list[str]: The paths of the migrated CSV files.
+    """
+    if backend.extension == 'csv':
+        return []
+
+    paths = sorted(glob.glob(os.path.join(directory, 'df_*.csv')))
+    if not isinstance(backend, SqliteBackend):
+        paths += sorted(glob.glob(os.path.join(store_directory, '*', '*', '*.csv')))
+
+    for path in paths:
+        df = ut.read_csv(path)
+        for column in ['datetime', 'date', 'year_month']:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+        if isinstance(backend, SqliteBackend):
+            backend.write(df, os.path.basename(path)[3:-4])
+        else:
+            temp_path = f'{os.path.splitext(path)[0]}.{backend.extension}.tmp'
+            backend.write(df, temp_path)
+            os.replace(temp_path, temp_path[:-4])
+        if remove:
+            os.remove(path)
+        print(f'{get_time_now()} :: Storage: {path} migrated to {backend.extension}')
+
+    return paths
+
+if __name__ == '__main__':
+    # python -m utils.storage: migrates the CSV files to the format of the 'storage' section of the configuration
+    loader_config = ut.load_config('loader_config')
+    migrate_csv(create_backend(loader_config.get('storage'), loader_config.get('combine_configuration')),
+                store_directory=loader_config.get('store_directory', 'data/store'))
@@ -1,6 +1,7 @@
 import os
 import json
 from datetime import datetime, timedelta
+from utils.schema import apply_schema
 
 def load_config(config_file):
     """
@@ -94,18 +95,18 @@ def generate_current_month():
 def read_csv(file_path):
     """
     Reads a CSV file from the given file path and returns its content as a pandas DataFrame.
-    If the file does not exist, it returns an empty DataFrame.
+    If the file does not exist, or it was saved from an empty DataFrame, it returns an empty DataFrame.
 
     Args:
         file_path (str): The path to the CSV file to be read.
 
     Returns:
         pandas.DataFrame: The content of the CSV file, or an empty DataFrame if the file is
-        not found.
+        not found or has no columns.
     """
     try:
         return pd.read_csv(file_path)
-    except FileNotFoundError:
+    except (FileNotFoundError, pd.errors.EmptyDataError):
         return pd.DataFrame()
 
 
@@ -188,7 +189,7 @@ def get_time_range(year_month):
         last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
     else:  # Otherwise, go to the first day of the next month and subtract one day
         last_day = datetime(year, month + 1, 1) - timedelta(days=1)
-    time_to = last_day.strftime('%Y%m%dT%H%M')
+    time_to = last_day.replace(hour=23, minute=59).strftime('%Y%m%dT%H%M')
 
     return time_from, time_to
 
@@ -241,9 +242,10 @@ import pandas as pd
 def ensure_correct_dtypes(df, dataset_type):
     """
     Ensure that the correct data types are applied to specific columns in a DataFrame,
-    based on the provided `dataset_type`. This function modifies the DataFrame
-    in-place by converting specified columns to float. Conversion errors are coerced
-    to NaN values. It supports two dataset types: "tec" and "news".
+    based on the provided `dataset_type`. This function converts specified columns to
+    numbers, coercing conversion errors to NaN values, and then casts every column to
+    the compact type of the schema of the dataset (`utils.schema`): float32 indicators
+    and scores, and categorical labels. It supports two dataset types: "tec" and "news".
 
     Parameters:
         df (pd.DataFrame): The DataFrame whose columns are to be converted.
@@ -254,13 +256,10 @@ def ensure_correct_dtypes(df, dataset_type):
         pd.DataFrame: The DataFrame with the specified columns converted to the
         correct data types.
     """
-
     if dataset_type == 'tec':
         # Convert MACD-related fields to float
         float_columns = ['MACD', 'MACD_Signal', 'MACD_Hist','volume']
-        for col in float_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        schema_dataset = 'merged_tec_info'
 
     elif dataset_type == 'news':
         # Convert sentiment and relevance score fields to float
@@ -270,8 +269,13 @@ def ensure_correct_dtypes(df, dataset_type):
             'affected_topic_relevance_score',
             'technology_ossm'
         ]
-        for col in float_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        schema_dataset = 'news'
+
+    else:
+        return df
+
+    for col in float_columns:
+        if col in df.columns and not pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
 
-    return df
+    return apply_schema(df, schema_dataset)